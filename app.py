@@ -5,6 +5,8 @@ from pathlib import Path
 
 # Add the current directory to Python path
 sys.path.insert(0, str(Path(__file__).parent))
+# Backend modules import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).parent / 'backend'))
 
 from backend.app import create_app
 
@@ -12,5 +14,6 @@ from backend.app import create_app
 app = create_app()
 
 if __name__ == '__main__':
-    # For development
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Development server only; the debugger is off unless FLASK_DEBUG is set
+    debug = os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true', 'on')
+    app.run(debug=debug, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -4,23 +4,76 @@ from pathlib import Path
 from datetime import datetime, timedelta
 import uuid
 import jwt
-import bcrypt
 from functools import wraps
 
 from flask import Flask, request, jsonify, current_app
 from flask_cors import CORS
-from pymongo import MongoClient
+from pymongo.errors import ExecutionTimeout
 from dotenv import load_dotenv
 
+from async_bridge import runner
+from cache import TTLCache
+from suggest import KINDS, SuggestionIndex
+from documents import generate_mock_cover_letter, generate_mock_resume
+from metrics import command_listener, init_flask_metrics
+from passwords import hash_password, verify_password
+from repositories import MIN_MAX_STALENESS, Repositories, listing_read_preference
+from salary import parse_salary
+from search import MAX_SEARCH_LENGTH, tokenize
+from workflow import MAX_BULK_APPLICATIONS, MAX_BULK_STATUS_UPDATES, STATUSES
+from lifecycle import resolve_expiry
+from ratelimit import LoginRateLimiter
+from idempotency import IdempotencyStore, init_flask_idempotency
+from gazetteer import geo_point, geocode
+
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-def get_db():
-    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
-    client = MongoClient(mongo_url)
-    return client[os.environ.get('DB_NAME', 'smart_job_tracker')]
+# MongoDB connection: one Motor client per process, owned by the async core's loop.
+# Views are synchronous and run on threads (threaded dev server or gunicorn gthread
+# workers); they hand coroutines to the loop with run().
+_repositories = None
+_repositories_pid = None
+
+# Job listing and search reads may go to secondaries; auth and read-after-write paths stay on the primary
+listing_reads = listing_read_preference(
+    os.environ.get('LISTING_READ_PREFERENCE', 'secondaryPreferred'),
+    int(os.environ.get('LISTING_MAX_STALENESS_SECONDS', MIN_MAX_STALENESS)),
+)
+
+def get_repositories():
+    global _repositories, _repositories_pid
+    if _repositories is None or _repositories_pid != os.getpid():
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017/')
+        client = AsyncIOMotorClient(mongo_url, event_listeners=[command_listener], io_loop=runner.loop)
+        _repositories = Repositories(client[os.environ.get('DB_NAME', 'smart_job_tracker')], listing_reads)
+        _repositories_pid = os.getpid()
+    return _repositories
+
+def use_database(database):
+    """Point the app at another Motor-compatible database (benchmarks, tests)."""
+    global _repositories, _repositories_pid
+    _repositories = Repositories(database, listing_reads)
+    _repositories_pid = os.getpid()
+    facet_cache.clear()
+    suggestions.built_at = None
+
+def run(coro):
+    return runner.run(coro)
+
+# Facet counts per normalized listing query; cleared on job writes, TTL bounds staleness across workers
+facet_cache = TTLCache(maxsize=512, ttl=30)
+
+# Typeahead terms, built from the jobs collection on first use
+suggestions = SuggestionIndex()
+# Seconds a request waits for another thread's first build of the index
+SUGGESTION_BUILD_WAIT = 10
+
+# Login brute-force throttling (per IP and per email)
+login_limiter = LoginRateLimiter.from_env()
 
 # JWT Configuration
 JWT_SECRET = os.environ.get('JWT_SECRET', 'your-secret-key-change-in-production')
@@ -33,6 +86,12 @@ def create_app():
     # CORS configuration
     CORS(app, origins=["*"], allow_headers=["*"], methods=["*"])
     
+    # Request latency and Mongo round-trip metrics on /metrics
+    init_flask_metrics(app)
+    
+    # Retried POST/PUT/PATCH/DELETE requests with an Idempotency-Key get the stored first response
+    init_flask_idempotency(app, IdempotencyStore(get_repositories), run)
+    
     # JWT Helper Functions
     def generate_token(user_id, role):
         payload = {
@@ -71,48 +130,6 @@ def create_app():
         
         return decorated
     
-    # Password hashing
-    def hash_password(password):
-        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-    
-    def verify_password(password, hashed):
-        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-    
-    # Mock AI Functions
-    def generate_mock_resume(user_profile):
-        skills = ', '.join(user_profile.get('skills', ['Problem solving', 'Communication']))
-        return f"""
-{user_profile['full_name']}
-Email: {user_profile['email']} | Phone: {user_profile.get('phone', 'Not provided')}
-
-PROFESSIONAL SUMMARY
-Experienced professional with strong background in {skills}. 
-{user_profile.get('experience', 'Seeking new opportunities to contribute and grow.')}
-
-EDUCATION
-{user_profile.get('education', 'Educational background as provided in profile')}
-
-TECHNICAL SKILLS
-{skills}
-
-EXPERIENCE
-{user_profile.get('experience', 'Professional experience as outlined in profile')}
-"""
-    
-    def generate_mock_cover_letter(user_profile, job_details):
-        return f"""Dear Hiring Manager,
-
-I am writing to express my strong interest in the {job_details['title']} position at {job_details['company']}.
-
-With my background in {', '.join(user_profile.get('skills', ['various technologies']))}, I am confident that I would be a valuable addition to your team.
-
-{user_profile.get('experience', 'My experience has prepared me well for this role.')}
-
-I look forward to discussing how my skills and enthusiasm can contribute to {job_details['company']}'s continued success.
-
-Sincerely,
-{user_profile['full_name']}"""
-    
     # Routes
     @app.route('/api/health', methods=['GET'])
     def health_check():
@@ -122,10 +139,10 @@ Sincerely,
     def register():
         try:
             data = request.json
-            db = get_db()
+            repos = get_repositories()
             
             # Check if user exists
-            if db.users.find_one({'email': data['email']}):
+            if run(repos.users.get_by_email(data['email'])):
                 return jsonify({'error': 'User already exists'}), 400
             
             # Create user
@@ -144,7 +161,7 @@ Sincerely,
                 'company_description': data.get('company_description')
             }
             
-            db.users.insert_one(user)
+            run(repos.users.create(user))
             
             # Generate token
             token = generate_token(user['id'], user['role'])
@@ -164,17 +181,24 @@ Sincerely,
     def login():
         try:
             data = request.json
-            db = get_db()
             
-            user = db.users.find_one({'email': data['email']})
+            # Throttle before the lookup and the bcrypt check, which is what a brute-force burst costs us
+            retry_after = run(login_limiter.check(request.remote_addr, data.get('email')))
+            if retry_after:
+                response = jsonify({'error': 'Too many login attempts; try again later'})
+                response.headers['Retry-After'] = str(retry_after)
+                return response, 429
+            
+            repos = get_repositories()
+            user = run(repos.users.get_by_email(data['email']))
             if not user or not verify_password(data['password'], user['password_hash']):
                 return jsonify({'error': 'Invalid credentials'}), 401
+            run(login_limiter.succeeded(request.remote_addr, data.get('email')))
             
             token = generate_token(user['id'], user['role'])
             
             # Remove password hash from response
             user.pop('password_hash')
-            user['_id'] = str(user['_id'])
             
             return jsonify({
                 'token': token,
@@ -188,30 +212,76 @@ Sincerely,
     @require_auth
     def get_current_user():
         try:
-            db = get_db()
-            user = db.users.find_one({'id': request.current_user['user_id']})
+            repos = get_repositories()
+            user = run(repos.users.get(request.current_user['user_id']))
             if not user:
                 return jsonify({'error': 'User not found'}), 404
             
             user.pop('password_hash', None)
-            user['_id'] = str(user['_id'])
             
             return jsonify(user)
             
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
+    def job_filters():
+        """Listing filters from the query string as JobRepository keyword arguments."""
+        near = request.args.get('near')
+        point = None
+        if near:
+            point = geocode(near)
+            if point is None:
+                raise ValueError(f'Unknown location: {near}')
+        search = (request.args.get('search') or '').strip()
+        if len(search) > MAX_SEARCH_LENGTH:
+            raise ValueError(f'search is limited to {MAX_SEARCH_LENGTH} characters')
+        
+        return {
+            'search': search or None,
+            'job_type': request.args.get('job_type') or None,
+            'min_salary': request.args.get('min_salary', type=int),
+            'max_salary': request.args.get('max_salary', type=int),
+            'near': point,
+            'radius_miles': min(request.args.get('radius', 25, type=float), 500) if point else None,
+            'include_duplicates': request.args.get('include_duplicates', '').lower() in ('1', 'true', 'yes')
+        }
+    
     @app.route('/api/jobs', methods=['GET'])
     def get_jobs():
         try:
-            db = get_db()
-            jobs = list(db.jobs.find({'is_active': True}))
-            
-            for job in jobs:
-                job['_id'] = str(job['_id'])
+            filters = job_filters()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        try:
+            repos = get_repositories()
+            jobs = run(repos.jobs.list_active(**filters))
             
             return jsonify(jobs)
             
+        except ExecutionTimeout:
+            return jsonify({'error': 'Query took too long; try a more specific search'}), 503
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/jobs/facets', methods=['GET'])
+    def get_job_facets():
+        try:
+            filters = job_filters()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        try:
+            key = tuple(sorted({**filters, 'search': ' '.join(tokenize(filters['search']))}.items()))
+            facets = facet_cache.get(key)
+            if facets is None:
+                facets = run(get_repositories().jobs.facet_counts(**filters))
+                facet_cache.set(key, facets)
+            
+            return jsonify(facets)
+            
+        except ExecutionTimeout:
+            return jsonify({'error': 'Query took too long; try a more specific search'}), 503
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
@@ -223,7 +293,14 @@ Sincerely,
                 return jsonify({'error': 'Only employers can create jobs'}), 403
             
             data = request.json
-            db = get_db()
+            repos = get_repositories()
+            
+            now = datetime.utcnow()
+            try:
+                requested = datetime.fromisoformat(data['expires_at']) if data.get('expires_at') else None
+                expires_at = resolve_expiry(now, requested)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
             
             job = {
                 'id': str(uuid.uuid4()),
@@ -235,27 +312,68 @@ Sincerely,
                 'location': data['location'],
                 'job_type': data['job_type'],
                 'employer_id': request.current_user['user_id'],
-                'created_at': datetime.utcnow(),
+                'created_at': now,
+                'expires_at': expires_at,
                 'is_active': True
             }
+            job.update(parse_salary(job['salary']))
+            job['location_point'] = geo_point(job['location'])
             
-            db.jobs.insert_one(job)
-            job['_id'] = str(job['_id'])
+            job = run(repos.jobs.create(job))
+            facet_cache.clear()
+            suggestions.add_job(job)
             
             return jsonify(job)
             
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
+    @app.route('/api/jobs/suggest', methods=['GET'])
+    def suggest_jobs():
+        q = (request.args.get('q') or '')[:100]
+        kind = request.args.get('kind')
+        if kind and kind not in KINDS:
+            return jsonify({'error': f'kind must be one of {", ".join(KINDS)}'}), 400
+        limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+        
+        try:
+            if suggestions.claim_refresh():
+                refresh = suggestions.refresh(get_repositories().jobs.suggestion_counts)
+                if suggestions.built_at is None:
+                    run(refresh)
+                else:
+                    # Keep answering from the current index while the background loop rebuilds it
+                    runner.spawn(refresh)
+            elif suggestions.built_at is None:
+                suggestions.wait_built(SUGGESTION_BUILD_WAIT)
+            return jsonify(suggestions.suggest(q, limit=limit, kinds=[kind] if kind else KINDS))
+            
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
+    @app.route('/api/employer/analytics', methods=['GET'])
+    @require_auth
+    def get_employer_analytics():
+        try:
+            if request.current_user['role'] != 'employer':
+                return jsonify({'error': 'Only employers can view analytics'}), 403
+            
+            days = max(1, min(request.args.get('days', 30, type=int), 365))
+            analytics = run(get_repositories().employer_analytics(request.current_user['user_id'], days=days))
+            
+            return jsonify(analytics)
+            
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
     @app.route('/api/jobs/<job_id>', methods=['GET'])
     def get_job(job_id):
         try:
-            db = get_db()
-            job = db.jobs.find_one({'id': job_id})
+            repos = get_repositories()
+            job = run(repos.jobs.get(job_id))
             if not job:
                 return jsonify({'error': 'Job not found'}), 404
             
-            job['_id'] = str(job['_id'])
             return jsonify(job)
             
         except Exception as e:
@@ -269,13 +387,16 @@ Sincerely,
                 return jsonify({'error': 'Only job seekers can apply to jobs'}), 403
             
             data = request.json
-            db = get_db()
+            repos = get_repositories()
+            
+            job = run(repos.jobs.get(data['job_id']))
+            if not job:
+                return jsonify({'error': 'Job not found'}), 404
+            if not job.get('is_active', True):
+                return jsonify({'error': 'Job is no longer accepting applications'}), 400
             
             # Check if already applied
-            existing = db.applications.find_one({
-                'job_id': data['job_id'],
-                'job_seeker_id': request.current_user['user_id']
-            })
+            existing = run(repos.applications.find_for_seeker(data['job_id'], request.current_user['user_id']))
             if existing:
                 return jsonify({'error': 'Already applied to this job'}), 400
             
@@ -289,69 +410,119 @@ Sincerely,
                 'status': 'applied'
             }
             
-            db.applications.insert_one(application)
-            application['_id'] = str(application['_id'])
+            if run(repos.submit_application(job, application)) is None:
+                return jsonify({'error': 'Already applied to this job'}), 400
             
             return jsonify(application)
             
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
+    @app.route('/api/applications/bulk', methods=['POST'])
+    @require_auth
+    def apply_to_jobs():
+        try:
+            if request.current_user['role'] != 'job_seeker':
+                return jsonify({'error': 'Only job seekers can apply to jobs'}), 403
+            
+            data = request.json or {}
+            job_ids = data.get('job_ids')
+            if not isinstance(job_ids, list) or not 1 <= len(job_ids) <= MAX_BULK_APPLICATIONS:
+                return jsonify({'error': f'job_ids must list 1 to {MAX_BULK_APPLICATIONS} ids'}), 400
+            
+            # build runs on the event loop thread, outside the request context
+            job_seeker_id = request.current_user['user_id']
+            
+            def build(job):
+                return {
+                    'id': str(uuid.uuid4()),
+                    'job_id': job['id'],
+                    'job_seeker_id': job_seeker_id,
+                    'resume_content': data['resume_content'],
+                    'cover_letter_content': data['cover_letter_content'],
+                    'applied_at': datetime.utcnow(),
+                    'status': 'applied'
+                }
+            
+            result = run(get_repositories().submit_applications(
+                job_seeker_id, [str(i) for i in job_ids], build
+            ))
+            
+            return jsonify(result)
+            
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
     @app.route('/api/applications', methods=['GET'])
     @require_auth
     def get_applications():
         try:
-            db = get_db()
+            repos = get_repositories()
             
             if request.current_user['role'] == 'job_seeker':
-                applications = list(db.applications.find({
-                    'job_seeker_id': request.current_user['user_id']
-                }))
+                applications = run(repos.applications.list_by_seeker(request.current_user['user_id']))
             else:  # employer
                 # Get applications for employer's jobs
-                employer_jobs = list(db.jobs.find({
-                    'employer_id': request.current_user['user_id']
-                }))
+                employer_jobs = run(repos.jobs.list_by_employer(request.current_user['user_id']))
                 job_ids = [job['id'] for job in employer_jobs]
-                applications = list(db.applications.find({
-                    'job_id': {'$in': job_ids}
-                }))
-            
-            for app in applications:
-                app['_id'] = str(app['_id'])
+                applications = run(repos.applications.list_by_jobs(job_ids))
             
             return jsonify(applications)
             
         except Exception as e:
             return jsonify({'error': str(e)}), 500
     
+    @app.route('/api/applications/status', methods=['PATCH'])
+    @require_auth
+    def update_application_status():
+        try:
+            if request.current_user['role'] != 'employer':
+                return jsonify({'error': 'Only employers can change application status'}), 403
+            
+            data = request.json or {}
+            application_ids = data.get('application_ids')
+            if not isinstance(application_ids, list) or not 1 <= len(application_ids) <= MAX_BULK_STATUS_UPDATES:
+                return jsonify({'error': f'application_ids must list 1 to {MAX_BULK_STATUS_UPDATES} ids'}), 400
+            if data.get('status') not in STATUSES:
+                return jsonify({'error': f'status must be one of {", ".join(STATUSES)}'}), 400
+            
+            result = run(get_repositories().update_application_statuses(
+                request.current_user['user_id'], [str(i) for i in application_ids], data['status'],
+                note=(data.get('note') or None) and str(data['note'])[:500]
+            ))
+            
+            return jsonify(result)
+            
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
     @app.route('/api/ai/generate', methods=['POST'])
     @require_auth
     def generate_document():
         try:
             data = request.json
-            db = get_db()
+            repos = get_repositories()
             
             # Get user profile
-            user = db.users.find_one({'id': request.current_user['user_id']})
+            user = run(repos.users.get(request.current_user['user_id']))
             if not user:
                 return jsonify({'error': 'User not found'}), 404
             
             if data['document_type'] == 'resume':
-                content = generate_mock_resume(user)
+                content = run(generate_mock_resume(user))
             elif data['document_type'] == 'cover_letter':
                 job_id = data.get('job_id')
                 if job_id:
-                    job = db.jobs.find_one({'id': job_id})
+                    job = run(repos.jobs.get(job_id))
                     if job:
-                        content = generate_mock_cover_letter(user, job)
+                        content = run(generate_mock_cover_letter(user, job))
                     else:
                         return jsonify({'error': 'Job not found'}), 404
                 else:
-                    content = generate_mock_cover_letter(user, {
+                    content = run(generate_mock_cover_letter(user, {
                         'title': 'Position',
                         'company': 'Company'
-                    })
+                    }))
             else:
                 return jsonify({'error': 'Invalid document type'}), 400
             
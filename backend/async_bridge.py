@@ -0,0 +1,65 @@
+"""Run the async core from synchronous (threaded WSGI) code.
+
+One event loop runs in a daemon thread per process and owns the Motor client;
+request threads submit coroutines to it and block on the result. The loop is
+started lazily and restarted after ``fork`` so it is safe with gunicorn's
+``--preload`` and threaded (``gthread``) workers.
+"""
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import threading
+
+
+class AsyncRunner:
+    def __init__(self, name: str = "async-core"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop = None
+        self._pid = None
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._loop = asyncio.new_event_loop()
+                self._pid = os.getpid()
+                thread = threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True)
+                thread.start()
+            return self._loop
+
+    def run(self, coro, timeout: float = None):
+        """Run ``coro`` on the background loop and return its result.
+
+        The caller's context variables (e.g. the request being measured) are
+        visible to the coroutine.
+        """
+        loop = self.loop
+        future = concurrent.futures.Future()
+
+        def _start():
+            if not future.set_running_or_notify_cancel():
+                coro.close()
+                return
+            task = loop.create_task(coro)
+
+            def _done(task):
+                if task.cancelled():
+                    future.set_exception(concurrent.futures.CancelledError())
+                elif task.exception() is not None:
+                    future.set_exception(task.exception())
+                else:
+                    future.set_result(task.result())
+
+            task.add_done_callback(_done)
+
+        loop.call_soon_threadsafe(_start, context=contextvars.copy_context())
+        return future.result(timeout)
+
+    def spawn(self, coro) -> concurrent.futures.Future:
+        """Start ``coro`` on the background loop without waiting for it."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+runner = AsyncRunner()
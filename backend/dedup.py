@@ -0,0 +1,77 @@
+"""Near-duplicate job detection with MinHash and locality-sensitive hashing.
+
+Each job's title, description and requirements are reduced to word 3-gram
+shingles and a ``NUM_PERM``-value MinHash signature; the fraction of equal
+positions in two signatures estimates the Jaccard similarity of their
+shingle sets. The signature is cut into ``BANDS`` bands of ``ROWS`` values and
+each band hashed into a key stored in the indexed ``dedup_bands`` array, so
+candidates for a new posting are the few jobs sharing any band key -- one
+indexed ``$in`` lookup instead of a comparison against every job. With 16x4
+bands a pair at 0.8 similarity shares a band with probability > 0.99, while
+pairs below 0.3 rarely do; candidates are then verified against
+``DUPLICATE_THRESHOLD`` on the full signature.
+
+Shingles are hashed with blake2b and the permutations come from a fixed seed,
+so signatures are stable across processes and releases (Python's ``hash()``
+is randomized per process).
+"""
+import hashlib
+import random
+from typing import Iterable, List, Optional
+
+from search import normalize
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+DUPLICATE_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+
+# Most candidate jobs fetched for verification per lookup
+MAX_CANDIDATES = 20
+
+DEDUP_FIELDS = ("title", "description", "requirements")
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def _hash(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def shingles(text: str) -> set:
+    words = normalize(text).split()
+    if len(words) < SHINGLE_SIZE:
+        return {_hash(" ".join(words))} if words else set()
+    return {_hash(" ".join(words[i:i + SHINGLE_SIZE])) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def signature(text: str) -> Optional[List[int]]:
+    values = shingles(text)
+    if not values:
+        return None
+    return [min((a * value + b) % _PRIME for value in values) for a, b in _PERMUTATIONS]
+
+
+def band_keys(sig: List[int]) -> List[str]:
+    keys = []
+    for band in range(BANDS):
+        rows = ",".join(map(str, sig[band * ROWS:(band + 1) * ROWS]))
+        keys.append(f"{band}:{hashlib.blake2b(rows.encode(), digest_size=8).hexdigest()}")
+    return keys
+
+
+def similarity(a: List[int], b: List[int]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def job_text(job: dict, fields: Iterable[str] = DEDUP_FIELDS) -> str:
+    return " ".join(job.get(field) or "" for field in fields)
+
+
+def fingerprint(job: dict) -> dict:
+    """The ``minhash``/``dedup_bands`` fields stored on a job (empty lists for jobs without text)."""
+    sig = signature(job_text(job))
+    return {"minhash": sig or [], "dedup_bands": band_keys(sig) if sig else []}
@@ -0,0 +1,42 @@
+"""Mock AI document generation shared by both backends."""
+
+
+def _skills(user_profile: dict, default: list) -> list:
+    # Profiles store ``skills: None`` when none were given
+    return user_profile.get('skills') or default
+
+
+async def generate_mock_resume(user_profile: dict) -> str:
+    """Mock resume generation - replace with real Gemini API later"""
+    return f"""
+{user_profile['full_name']}
+Email: {user_profile['email']} | Phone: {user_profile.get('phone') or 'Not provided'}
+
+PROFESSIONAL SUMMARY
+Experienced professional with strong background in {', '.join(_skills(user_profile, ['various technologies']))}. 
+{user_profile.get('experience') or 'Seeking new opportunities to contribute and grow.'}
+
+EDUCATION
+{user_profile.get('education') or 'Educational background as provided in profile'}
+
+TECHNICAL SKILLS
+{', '.join(_skills(user_profile, ['Problem solving', 'Communication', 'Team collaboration']))}
+
+EXPERIENCE
+{user_profile.get('experience') or 'Professional experience as outlined in profile'}
+"""
+
+async def generate_mock_cover_letter(user_profile: dict, job_details: dict) -> str:
+    """Mock cover letter generation - replace with real Gemini API later"""
+    return f"""Dear Hiring Manager,
+
+I am writing to express my strong interest in the {job_details['title']} position at {job_details['company']}. 
+
+With my background in {', '.join(_skills(user_profile, ['relevant technologies']))}, I am confident I would be a valuable addition to your team. My experience includes {user_profile.get('experience') or 'various professional experiences'}.
+
+What particularly excites me about this role is the opportunity to work on {job_details['title']} at {job_details['company']}. Based on the job requirements, I believe my skills in {', '.join(_skills(user_profile, ['key areas'])[:3])} align well with what you're looking for.
+
+I am eager to bring my expertise to {job_details['company']} and contribute to your continued success. Thank you for considering my application.
+
+Sincerely,
+{user_profile['full_name']}"""
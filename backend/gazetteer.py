@@ -0,0 +1,109 @@
+"""Offline geocoding of free-form job locations.
+
+Locations are matched against a bundled gazetteer (``data/gazetteer.csv``) so
+job writes never wait on an external geocoding service. Unknown places and
+remote roles geocode to ``None`` and simply drop out of radius searches. A
+city is only matched on its own name when the location names no region or
+country, or names the one that city is in: "Paris, TX" is not Paris, France.
+"""
+import csv
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, FrozenSet, Optional, Tuple
+
+GAZETTEER_PATH = Path(__file__).parent / "data" / "gazetteer.csv"
+
+EARTH_RADIUS_MILES = 3963.2
+
+REMOTE = re.compile(r"\b(remote|anywhere|distributed|work from home|wfh)\b", re.I)
+
+# Spelled-out regions and countries -> the codes and names the gazetteer uses
+US_STATES = {
+    "alabama": "al", "alaska": "ak", "arizona": "az", "arkansas": "ar", "california": "ca", "colorado": "co",
+    "connecticut": "ct", "delaware": "de", "district of columbia": "dc", "washington dc": "dc", "florida": "fl",
+    "georgia": "ga", "hawaii": "hi", "idaho": "id", "illinois": "il", "indiana": "in", "iowa": "ia",
+    "kansas": "ks", "kentucky": "ky", "louisiana": "la", "maine": "me", "maryland": "md", "massachusetts": "ma",
+    "michigan": "mi", "minnesota": "mn", "mississippi": "ms", "missouri": "mo", "montana": "mt", "nebraska": "ne",
+    "nevada": "nv", "new hampshire": "nh", "new jersey": "nj", "new mexico": "nm", "new york": "ny",
+    "north carolina": "nc", "north dakota": "nd", "ohio": "oh", "oklahoma": "ok", "oregon": "or",
+    "pennsylvania": "pa", "rhode island": "ri", "south carolina": "sc", "south dakota": "sd", "tennessee": "tn",
+    "texas": "tx", "utah": "ut", "vermont": "vt", "virginia": "va", "washington": "wa", "west virginia": "wv",
+    "wisconsin": "wi", "wyoming": "wy",
+}
+REGION_ALIASES = {
+    **US_STATES,
+    "ontario": "on", "quebec": "qc", "british columbia": "bc", "alberta": "ab", "victoria": "vic",
+    "new south wales": "nsw", "usa": "us", "united states": "us", "united states of america": "us",
+    "america": "us", "united kingdom": "uk", "england": "uk", "great britain": "uk", "gb": "uk",
+    "canada": "ca", "united arab emirates": "uae", "deutschland": "germany",
+}
+
+
+def _normalize(text: str) -> str:
+    text = re.sub(r"[^\w\s,]", " ", text.lower())
+    return ", ".join(" ".join(part.split()) for part in text.split(",") if part.strip())
+
+
+def _region(part: str) -> str:
+    """Canonical region/country for a location part: "Texas" -> "tx", "NY 10001" -> "ny"."""
+    part = " ".join(word for word in part.split() if not word.isdigit())
+    return REGION_ALIASES.get(part, part)
+
+
+@lru_cache(maxsize=1)
+def _index() -> Tuple[Dict[str, Tuple[float, float]], Dict[str, FrozenSet[str]], FrozenSet[str]]:
+    """Normalized place name -> (longitude, latitude); the most populous city wins a shared name.
+
+    Also returns the region and country of each name's winner, and every region and country known.
+    """
+    index, population, regions = {}, {}, {}
+    known = set(REGION_ALIASES.values())
+    with open(GAZETTEER_PATH, newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            point = (float(row["longitude"]), float(row["latitude"]))
+            size = int(row["population"] or 0)
+            qualifiers = frozenset(_normalize(value) for value in (row["region"], row["country"]) if value)
+            known |= qualifiers
+            names = [row["name"], *filter(None, (row["aliases"] or "").split("|"))]
+            for name in names:
+                keys = [name]
+                if row["region"]:
+                    keys.append(f"{name}, {row['region']}")
+                keys.append(f"{name}, {row['country']}")
+                for key in map(_normalize, keys):
+                    if size > population.get(key, -1):
+                        index[key], population[key] = point, size
+                        regions[key] = qualifiers
+    return index, regions, frozenset(known)
+
+
+@lru_cache(maxsize=4096)
+def geocode(location: Optional[str]) -> Optional[Tuple[float, float]]:
+    """(longitude, latitude) for "Austin, TX", "Bengaluru", "London, UK"...; None if unknown or remote."""
+    if not location or REMOTE.search(location):
+        return None
+    key = _normalize(location)
+    index, regions, known = _index()
+    if key in index:
+        return index[key]
+    city, *qualifiers = key.split(", ")
+    qualifiers = [_region(part) for part in qualifiers]
+    for qualifier in qualifiers:
+        if f"{city}, {qualifier}" in index:
+            return index[f"{city}, {qualifier}"]
+    # The bare name only when no region is given or it is the one given ("Austin, Texas, USA")
+    given = {qualifier for qualifier in qualifiers if qualifier in known}
+    if city in index and (not given or given & regions[city]):
+        return index[city]
+    return None
+
+
+def geo_point(location: Optional[str]) -> Optional[dict]:
+    """GeoJSON point for a job's ``location_point`` field."""
+    point = geocode(location)
+    return {"type": "Point", "coordinates": list(point)} if point else None
+
+
+def radius_radians(miles: float) -> float:
+    return miles / EARTH_RADIUS_MILES
@@ -0,0 +1,258 @@
+"""``Idempotency-Key`` support for mutating requests.
+
+A client that retries a POST/PUT/PATCH/DELETE with the same ``Idempotency-Key``
+gets the first response back instead of running the handler again -- no
+duplicate job or application. Keys are scoped to the method, path and caller
+(a hash of the ``Authorization`` header), so two users can't collide or read
+each other's responses. The auth routes are left out: their responses carry
+tokens, which must not be stored, and a retried login should be checked again.
+Registration is the exception: a retried signup must not fail confusingly with
+"already registered", so a successful one is stored as a token-free marker and
+the retry answers 409 telling the client to log in.
+
+The first request claims the key in the ``idempotency_keys`` collection
+(``pending``), runs, and stores its status, headers and body (``done``);
+5xx responses, responses caused by transient state (401, 408, 409, 423, 425,
+429) and exceptions release the claim so the client can retry.
+Records expire after ``IDEMPOTENCY_TTL`` through a TTL index. A replay is one
+``find_one``, or none when this process has the response in its front cache.
+Reusing a key with a different body is rejected with 422; a retry that
+arrives while the first request is still running gets 409.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+from cache import TTLCache
+from metrics import REGISTRY
+
+logger = logging.getLogger("idempotency")
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MUTATING_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+MAX_KEY_LENGTH = 255
+# Not handled at all: responses carry credentials
+EXCLUDED_PREFIXES = ("/api/auth/",)
+# Handled, but a success is replayed as REGISTERED instead of its response (which carries a token)
+CREDENTIAL_PATHS = frozenset({"/api/auth/register"})
+REGISTERED_STATUS = 409
+REGISTERED_MESSAGE = "Already registered with this Idempotency-Key; log in to get a token"
+# Answers that a retry may not get again (expired token, rate limit, conflict): released, not stored
+TRANSIENT_STATUSES = frozenset({401, 408, 409, 423, 425, 429})
+
+IDEMPOTENCY_TTL = timedelta(hours=24)
+# A pending claim older than this is assumed abandoned (crashed worker) and may be taken over
+PENDING_TIMEOUT = timedelta(seconds=60)
+# Response headers that describe one delivery rather than the stored result
+SKIPPED_HEADERS = frozenset({"content-length", "date", "server", "x-profile-id", "x-profile-summary"})
+
+IDEMPOTENT_REQUESTS = REGISTRY.counter(
+    "idempotent_requests_total", "Requests carrying an Idempotency-Key, by outcome", ("outcome",)
+)
+
+
+class Outcome:
+    NEW = "new"
+    REPLAYED = "replayed"
+    IN_PROGRESS = "in_progress"
+    MISMATCH = "mismatch"
+
+
+def applies(method: str, path: str) -> bool:
+    return method in MUTATING_METHODS and (path in CREDENTIAL_PATHS or not path.startswith(EXCLUDED_PREFIXES))
+
+
+def scoped_key(method: str, path: str, authorization: Optional[str], key: str) -> str:
+    caller = hashlib.sha256((authorization or "").encode()).hexdigest()
+    return hashlib.sha256(f"{method} {path} {caller} {key}".encode()).hexdigest()
+
+
+def fingerprint(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+class IdempotencyStore:
+    """Claims keys and stores responses through ``get_repositories().idempotency``."""
+
+    def __init__(self, get_repositories: Callable, cache_size: int = 10_000):
+        self.get_repositories = get_repositories
+        self.cache = TTLCache(maxsize=cache_size, ttl=IDEMPOTENCY_TTL.total_seconds())
+
+    async def begin(self, key: str, body_fingerprint: str) -> Tuple[str, Optional[dict]]:
+        """Returns ``(outcome, stored response)``; only ``NEW`` means the handler should run."""
+        record = self.cache.get(key)
+        if record is None:
+            repo = self.get_repositories().idempotency
+            record = await repo.get(key)
+            if record is None or record["state"] == "pending":
+                now = datetime.utcnow()
+                if await repo.begin(key, body_fingerprint, now, now - PENDING_TIMEOUT):
+                    IDEMPOTENT_REQUESTS.inc(outcome=Outcome.NEW)
+                    return Outcome.NEW, None
+                record = record or await repo.get(key)
+            if record and record["state"] == "done":
+                self.cache.set(key, record)
+        if record is None or record["state"] != "done":
+            outcome = Outcome.IN_PROGRESS
+        elif record["fingerprint"] != body_fingerprint:
+            outcome = Outcome.MISMATCH
+        else:
+            outcome = Outcome.REPLAYED
+        IDEMPOTENT_REQUESTS.inc(outcome=outcome)
+        return outcome, record.get("response") if record else None
+
+    async def complete(self, key: str, body_fingerprint: str, status: int, headers: List[Tuple[str, str]],
+                       body: bytes, marker_field: Optional[str] = None):
+        """Store the response; with ``marker_field`` (a ``CREDENTIAL_PATHS`` route) a success is stored as
+        ``{marker_field: REGISTERED_MESSAGE}`` with ``REGISTERED_STATUS`` instead."""
+        if status >= 500 or status in TRANSIENT_STATUSES:
+            await self.release(key)
+            return
+        if marker_field is not None and status < 400:
+            status, body = REGISTERED_STATUS, json.dumps({marker_field: REGISTERED_MESSAGE}).encode()
+            headers = [("content-type", "application/json")]
+        response = {"status": status, "headers": [[name, value] for name, value in headers
+                                                  if name.lower() not in SKIPPED_HEADERS], "body": body}
+        try:
+            await self.get_repositories().idempotency.complete(key, response)
+        except Exception:
+            logger.exception("Could not store idempotent response")
+            return
+        self.cache.set(key, {"state": "done", "fingerprint": body_fingerprint, "response": response})
+
+    async def release(self, key: str):
+        try:
+            await self.get_repositories().idempotency.release(key)
+        except Exception:
+            logger.exception("Could not release idempotency key")
+
+
+class IdempotencyMiddleware:
+    """ASGI middleware applying ``IdempotencyStore`` to mutating requests that carry the header."""
+
+    def __init__(self, app, store: IdempotencyStore):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not applies(scope["method"], scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        client_key = headers.get(HEADER.lower())
+        if client_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            await _send_json(send, 400, {"detail": f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters"})
+            return
+
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        body = bytes(body)
+        key = scoped_key(scope["method"], scope["path"], headers.get("authorization"), client_key)
+        body_fingerprint = fingerprint(body)
+
+        outcome, stored = await self.store.begin(key, body_fingerprint)
+        if outcome == Outcome.REPLAYED:
+            await send({"type": "http.response.start", "status": stored["status"],
+                        "headers": [(name.encode("latin-1"), value.encode("latin-1"))
+                                    for name, value in stored["headers"]]
+                        + [(b"content-length", str(len(stored["body"])).encode()),
+                           (REPLAYED_HEADER.lower().encode(), b"true")]})
+            await send({"type": "http.response.body", "body": stored["body"]})
+            return
+        if outcome == Outcome.MISMATCH:
+            await _send_json(send, 422, {"detail": f"{HEADER} was already used with a different request"})
+            return
+        if outcome == Outcome.IN_PROGRESS:
+            await _send_json(send, 409, {"detail": f"A request with this {HEADER} is still in progress"},
+                             [(b"retry-after", b"1")])
+            return
+
+        delivered = False
+
+        async def replay_body():
+            nonlocal delivered
+            if not delivered:
+                delivered = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status, response_headers, response_body = 500, [], bytearray()
+
+        async def capture(message):
+            nonlocal status, response_headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = [(name.decode("latin-1"), value.decode("latin-1"))
+                                    for name, value in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                response_body.extend(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, capture)
+        except BaseException:
+            await self.store.release(key)
+            raise
+        await self.store.complete(key, body_fingerprint, status, response_headers, bytes(response_body),
+                                  "detail" if scope["path"] in CREDENTIAL_PATHS else None)
+
+
+async def _send_json(send, status: int, payload: dict, headers=()):
+    body = json.dumps(payload).encode()
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", b"application/json"),
+                            (b"content-length", str(len(body)).encode()), *headers]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def init_flask_idempotency(app, store: IdempotencyStore, run: Callable):
+    """Register request hooks applying ``store`` to a Flask app; ``run`` executes coroutines."""
+    from flask import Response, g, jsonify, request
+
+    @app.before_request
+    def _idempotency_begin():
+        client_key = request.headers.get(HEADER)
+        if not applies(request.method, request.path) or client_key is None:
+            return None
+        if not client_key or len(client_key) > MAX_KEY_LENGTH:
+            return jsonify({'error': f'{HEADER} must be 1 to {MAX_KEY_LENGTH} characters'}), 400
+        key = scoped_key(request.method, request.path, request.headers.get("Authorization"), client_key)
+        body_fingerprint = fingerprint(request.get_data(cache=True))
+        outcome, stored = run(store.begin(key, body_fingerprint))
+        if outcome == Outcome.REPLAYED:
+            response = Response(stored["body"], status=stored["status"], headers=stored["headers"])
+            response.headers[REPLAYED_HEADER] = "true"
+            return response
+        if outcome == Outcome.MISMATCH:
+            return jsonify({'error': f'{HEADER} was already used with a different request'}), 422
+        if outcome == Outcome.IN_PROGRESS:
+            return jsonify({'error': f'A request with this {HEADER} is still in progress'}), 409, {'Retry-After': '1'}
+        g.idempotency = (key, body_fingerprint, 'error' if request.path in CREDENTIAL_PATHS else None)
+        return None
+
+    @app.after_request
+    def _idempotency_complete(response):
+        claim = g.pop("idempotency", None)
+        if claim is not None:
+            key, body_fingerprint, marker_field = claim
+            run(store.complete(key, body_fingerprint, response.status_code, list(response.headers.items()),
+                               response.get_data(), marker_field))
+        return response
+
+    @app.teardown_request
+    def _idempotency_release(exc):
+        claim = g.pop("idempotency", None)
+        if claim is not None:
+            run(store.release(claim[0]))
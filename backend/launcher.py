@@ -0,0 +1,210 @@
+"""Production entry point for the FastAPI backend: a pre-forking uvicorn supervisor.
+
+    python launcher.py                          # one worker per core on 0.0.0.0:8001
+    python launcher.py --workers 4 --port 8001 --graceful-timeout 30
+
+The master imports ``server`` once (so workers share the imported code
+copy-on-write and boot in milliseconds), binds the listening socket, then
+forks ``--workers`` processes that each run uvicorn on the shared socket with
+uvloop and httptools when they are installed. Each worker opens its own Motor
+client after the fork -- a client must never cross a fork -- and warms it and
+the in-process caches in the app's lifespan handler before serving.
+
+Signals to the master:
+  SIGTERM / SIGINT  stop accepting, let every worker drain in-flight requests
+                    (up to ``--graceful-timeout`` seconds), then exit
+  SIGHUP            rolling restart: replace workers one at a time, starting
+                    each replacement before draining the worker it replaces.
+                    The app is preloaded, so this refreshes connections and
+                    per-process state, not code; deploy new code by
+                    restarting the master.
+Workers that die unexpectedly are replaced.
+
+Per-process state stays per worker: caches, the login rate limiter's buckets,
+the write-behind queue and the expired-job sweeper each run N times.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger("launcher")
+
+
+def default_workers() -> int:
+    """``WEB_CONCURRENCY`` if set, else one worker per available core (async workers don't need more)."""
+    if os.environ.get("WEB_CONCURRENCY"):
+        return max(1, int(os.environ["WEB_CONCURRENCY"]))
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    """Forks uvicorn workers serving ``app`` on one socket and keeps ``workers`` of them alive."""
+
+    def __init__(self, app, sock: socket.socket, workers: int, post_fork: Optional[Callable[[], None]] = None,
+                 graceful_timeout: float = 30.0, **uvicorn_options):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.post_fork = post_fork
+        self.graceful_timeout = graceful_timeout
+        self.uvicorn_options = uvicorn_options
+        self.children: Dict[int, float] = {}  # pid -> started at
+        self._stopping = False
+        self._reload = False
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+                    signal.signal(sig, signal.SIG_DFL)
+                self._serve()
+            except BaseException:
+                logger.exception("Worker %d crashed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+        logger.info("Started worker %d", pid)
+        return pid
+
+    def _serve(self):
+        import uvicorn
+
+        if self.post_fork is not None:
+            self.post_fork()
+        config = uvicorn.Config(self.app, timeout_graceful_shutdown=self.graceful_timeout, **self.uvicorn_options)
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def stop_worker(self, pid: int, wait: bool = True):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        if wait:
+            self._wait_for(pid, self.graceful_timeout + 5)
+
+    def _wait_for(self, pid: int, timeout: float):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+            if done:
+                self.children.pop(pid, None)
+                return
+            time.sleep(0.05)
+        logger.warning("Worker %d did not drain in time; killing it", pid)
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+        self.children.pop(pid, None)
+
+    def reload(self):
+        """Replace each worker: start the new one first so capacity never drops."""
+        for pid in list(self.children):
+            self.spawn()
+            self.stop_worker(pid)
+        logger.info("Rolling restart finished")
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        for _ in range(self.workers):
+            self.spawn()
+        while not self._stopping:
+            if self._reload:
+                self._reload = False
+                self.reload()
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if pid and pid in self.children:
+                self.children.pop(pid)
+                if not self._stopping:
+                    logger.warning("Worker %d exited (status %d); replacing it", pid, status)
+                    self.spawn()
+            elif not pid:
+                time.sleep(0.2)
+        logger.info("Draining %d workers", len(self.children))
+        for pid in list(self.children):
+            self.stop_worker(pid, wait=False)
+        for pid in list(self.children):
+            self._wait_for(pid, self.graceful_timeout + 5)
+        self.sock.close()
+        return 0
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+
+    def _on_reload(self, signum, frame):
+        self._reload = True
+
+
+def serve(app, host: str = "0.0.0.0", port: int = 8001, workers: int = 1,
+          post_fork: Optional[Callable[[], None]] = None, graceful_timeout: float = 30.0, **uvicorn_options) -> int:
+    """Serve an already imported ASGI ``app`` with ``workers`` forked processes (in-process when 1)."""
+    uvicorn_options.setdefault("loop", "auto")  # uvloop when installed
+    uvicorn_options.setdefault("http", "auto")  # httptools when installed
+    sock = bind_socket(host, port)
+    if workers <= 1:
+        import uvicorn
+
+        config = uvicorn.Config(app, timeout_graceful_shutdown=graceful_timeout, **uvicorn_options)
+        uvicorn.Server(config).run(sockets=[sock])
+        return 0
+    return Supervisor(app, sock, workers, post_fork, graceful_timeout, **uvicorn_options).run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.environ.get("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8001)))
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="worker processes (default: WEB_CONCURRENCY or one per core)")
+    parser.add_argument("--graceful-timeout", type=float, default=30.0,
+                        help="seconds a worker may spend draining in-flight requests on shutdown")
+    parser.add_argument("--keep-alive", type=int, default=5, help="idle keep-alive timeout in seconds")
+    parser.add_argument("--forwarded-allow-ips", default=os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+                        help="proxies trusted for X-Forwarded-For (client IPs feed the login rate limiter)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO),
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    # Preload: import the app (routes, models, gazetteer, metrics) and the driver it imports lazily once,
+    # before forking; each worker's lifespan handler then opens its own client
+    import motor.motor_asyncio  # noqa: F401
+    import server
+
+    sys.exit(serve(
+        server.app, args.host, args.port, args.workers,
+        graceful_timeout=args.graceful_timeout,
+        timeout_keep_alive=args.keep_alive,
+        proxy_headers=True,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+        log_level=args.log_level,
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Job expiry and archival.
+
+Jobs expire ``expires_at`` (default: 60 days after posting). A sweep first
+deactivates expired jobs, which drops them out of the listing and its partial
+indexes, then -- ``ARCHIVE_AFTER`` later -- moves them and their applications
+to ``jobs_archive``/``applications_archive`` in batches, so the hot
+collections only hold recent history.
+
+The FastAPI app sweeps in the background every ``JOB_SWEEP_INTERVAL_SECONDS``
+(0 disables it); Flask deployments run ``python migrations.py sweep_jobs``
+from cron. Sweeps are idempotent, so overlapping workers are harmless.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+JOB_TTL = timedelta(days=60)
+MAX_JOB_TTL = timedelta(days=180)
+ARCHIVE_AFTER = timedelta(days=30)
+SWEEP_BATCH_SIZE = 500
+
+logger = logging.getLogger("lifecycle")
+
+
+def resolve_expiry(created_at: datetime, requested: Optional[datetime] = None) -> datetime:
+    """``requested`` as naive UTC (how Mongo dates round-trip), or the default TTL; ValueError if out of range."""
+    if requested is None:
+        return created_at + JOB_TTL
+    if requested.tzinfo is not None:
+        requested = requested.astimezone(timezone.utc).replace(tzinfo=None)
+    if not created_at < requested <= created_at + MAX_JOB_TTL:
+        raise ValueError(f"expires_at must be in the future and within {MAX_JOB_TTL.days} days")
+    return requested
+
+
+async def sweep(repos, now: Optional[datetime] = None, batch_size: int = SWEEP_BATCH_SIZE,
+                archive_after: timedelta = ARCHIVE_AFTER, max_batches: Optional[int] = None) -> dict:
+    """Deactivate expired jobs, then archive those expired more than ``archive_after`` ago."""
+    now = now or datetime.utcnow()
+    result = {"deactivated": await repos.jobs.deactivate_expired(now), "archived_jobs": 0, "archived_applications": 0}
+
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        job_ids = await repos.jobs.list_archivable(now - archive_after, batch_size)
+        if not job_ids:
+            break
+        jobs, applications = await repos.archive_jobs(job_ids)
+        result["archived_jobs"] += jobs
+        result["archived_applications"] += applications
+        batches += 1
+        # Yield between batches so request handling on this loop is not starved
+        await asyncio.sleep(0)
+
+    if any(result.values()):
+        logger.info("Job sweep: %(deactivated)d deactivated, %(archived_jobs)d jobs and "
+                    "%(archived_applications)d applications archived", result)
+    return result
+
+
+class JobSweeper:
+    """Runs ``sweep`` every ``interval`` seconds on the current event loop."""
+
+    def __init__(self, get_repositories: Callable, interval: float):
+        self.get_repositories = get_repositories
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await sweep(self.get_repositories())
+            except Exception:
+                logger.exception("Job sweep failed")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,325 @@
+"""Prometheus-style request and MongoDB instrumentation shared by both backends.
+
+Metrics live in a process-local registry and are rendered in the Prometheus
+text exposition format on ``/metrics``. When running several worker processes
+each worker exposes its own counters, so scrape every worker (or aggregate
+with a sidecar) rather than expecting global totals from one of them.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import monitoring
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# Route label used for Mongo commands issued outside of an HTTP request
+NO_ROUTE = "none"
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEFAULT_SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+DEFAULT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return int(state[-1]) if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, hits in zip(self.buckets, state):
+                cumulative += hits
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {_format_value(state[-1])}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+)
+REQUESTS_IN_PROGRESS = REGISTRY.gauge(
+    "http_requests_in_progress", "HTTP requests currently being served", ("method",)
+)
+RESPONSE_SIZE = REGISTRY.histogram(
+    "http_response_size_bytes", "HTTP response body size by route", ("method", "route"), DEFAULT_SIZE_BUCKETS
+)
+MONGO_COMMANDS = REGISTRY.counter(
+    "mongodb_commands_total", "MongoDB commands issued by route", ("route", "command", "outcome")
+)
+MONGO_COMMAND_LATENCY = REGISTRY.histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by route", ("route", "command")
+)
+MONGO_COMMANDS_PER_REQUEST = REGISTRY.histogram(
+    "mongodb_commands_per_request", "MongoDB round trips per HTTP request", ("route",), DEFAULT_COUNT_BUCKETS
+)
+
+
+class RequestStats:
+    """Mongo activity accumulated for one HTTP request, labelled once the route is known."""
+
+    def __init__(self, route: Callable[[], str] = lambda: NO_ROUTE):
+        self.commands: List[Tuple[str, float, bool]] = []
+        # Route template of the request, once routing has matched it
+        self.route = route
+        self._lock = threading.Lock()
+
+    def record(self, command: str, seconds: float, succeeded: bool):
+        with self._lock:
+            self.commands.append((command, seconds, succeeded))
+
+    def flush(self, route: str):
+        with self._lock:
+            commands, self.commands = self.commands, []
+        for command, seconds, succeeded in commands:
+            _record_command(route, command, seconds, succeeded)
+        MONGO_COMMANDS_PER_REQUEST.observe(len(commands), route=route)
+
+
+# Set by the HTTP middleware; Motor copies the context into its executor threads
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def _record_command(route: str, command: str, seconds: float, succeeded: bool):
+    MONGO_COMMANDS.inc(route=route, command=command, outcome="success" if succeeded else "failure")
+    MONGO_COMMAND_LATENCY.observe(seconds, route=route, command=command)
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Attributes every Mongo command to the HTTP request that issued it."""
+
+    def started(self, event):
+        pass
+
+    def _finish(self, event, succeeded: bool):
+        seconds = event.duration_micros / 1_000_000
+        stats = current_request.get()
+        if stats is None:
+            _record_command(NO_ROUTE, event.command_name, seconds, succeeded)
+        else:
+            stats.record(event.command_name, seconds, succeeded)
+
+    def succeeded(self, event):
+        self._finish(event, True)
+
+    def failed(self, event):
+        self._finish(event, False)
+
+
+command_listener = MongoCommandListener()
+
+
+def observe_request(method: str, route: str, status: int, seconds: float, size: int, stats: RequestStats):
+    REQUEST_LATENCY.observe(seconds, method=method, route=route, status=str(status))
+    RESPONSE_SIZE.observe(size, method=method, route=route)
+    stats.flush(route)
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording latency, in-flight requests, response size and Mongo usage."""
+
+    def __init__(self, app, exclude_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        stats = RequestStats(lambda: getattr(scope.get("route"), "path", None) or "unmatched")
+        token = current_request.set(stats)
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc(method=method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_PROGRESS.dec(method=method)
+            current_request.reset(token)
+            # Use the route template so path parameters don't explode label cardinality
+            observe_request(method, stats.route(), status_code, time.perf_counter() - start, size, stats)
+
+
+def init_flask_metrics(app):
+    """Register request hooks and the ``/metrics`` endpoint on a Flask app."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def _start_request_metrics():
+        if request.path == "/metrics":
+            return
+        rule = request.url_rule.rule if request.url_rule else "unmatched"
+        g.metrics_stats = RequestStats(lambda: rule)
+        g.metrics_token = current_request.set(g.metrics_stats)
+        g.metrics_start = time.perf_counter()
+        REQUESTS_IN_PROGRESS.inc(method=request.method)
+
+    @app.after_request
+    def _record_request_metrics(response):
+        stats = g.pop("metrics_stats", None)
+        if stats is None:
+            return response
+        size = response.calculate_content_length() or 0
+        observe_request(
+            request.method, stats.route(), response.status_code, time.perf_counter() - g.metrics_start, size, stats
+        )
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        token = g.pop("metrics_token", None)
+        if token is not None:
+            REQUESTS_IN_PROGRESS.dec(method=request.method)
+            current_request.reset(token)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(REGISTRY.render(), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,203 @@
+"""One-off data migrations and index maintenance.
+
+    cd backend && python migrations.py ensure_indexes
+    cd backend && python migrations.py backfill_salary [--batch-size 1000]
+    cd backend && python migrations.py reparse_salary [--batch-size 1000]
+    cd backend && python migrations.py backfill_locations [--batch-size 1000]
+    cd backend && python migrations.py regeocode_locations [--batch-size 1000]
+    cd backend && python migrations.py backfill_search_terms [--batch-size 1000]
+    cd backend && python migrations.py rebuild_job_stats
+    cd backend && python migrations.py dedup_jobs [--batch-size 1000]
+    cd backend && python migrations.py backfill_expiry [--batch-size 1000]
+    cd backend && python migrations.py sweep_jobs [--batch-size 1000]
+
+Migrations are idempotent and work in batches so they can run against a live
+database and be re-run after an interruption.
+"""
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateMany, UpdateOne
+
+from dedup import DEDUP_FIELDS, DUPLICATE_THRESHOLD, fingerprint, similarity
+from gazetteer import geo_point
+from lifecycle import resolve_expiry, sweep
+from repositories import Repositories
+from salary import parse_salary
+from search import SEARCH_FIELDS, search_terms
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger("migrations")
+
+
+async def ensure_indexes(db, **_):
+    await Repositories(db).ensure_indexes()
+    logger.info("Indexes are up to date")
+
+
+async def _backfill(collection, query: dict, fields: dict, compute, label: str, batch_size: int) -> int:
+    """``$set`` ``compute(doc)`` on every document matching ``query``, in unordered bulk batches."""
+    cursor = collection.find(query, {"_id": 1, **fields}).batch_size(batch_size)
+    updated = 0
+    batch = []
+    async for doc in cursor:
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": compute(doc)}))
+        if len(batch) >= batch_size:
+            updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+            logger.info("Backfilled %s on %d documents", label, updated)
+    if batch:
+        updated += (await collection.bulk_write(batch, ordered=False)).modified_count
+    logger.info("Done: backfilled %s on %d documents", label, updated)
+    return updated
+
+
+async def backfill_salary(db, batch_size: int = 1000, **_):
+    """Parse ``salary`` into the numeric salary_* fields for jobs written before they existed."""
+    return await _backfill(db.jobs, {"salary_period": {"$exists": False}}, {"salary": 1},
+                           lambda job: parse_salary(job.get("salary")), "salary fields", batch_size)
+
+
+async def reparse_salary(db, batch_size: int = 1000, **_):
+    """Recompute the salary_* fields of every job with a ``salary`` string after a parser change."""
+    return await _backfill(db.jobs, {"salary": {"$type": "string"}}, {"salary": 1},
+                           lambda job: parse_salary(job.get("salary")), "salary fields", batch_size)
+
+
+async def backfill_locations(db, batch_size: int = 1000, **_):
+    """Geocode ``location`` into ``location_point`` for jobs written before it existed."""
+    return await _backfill(db.jobs, {"location_point": {"$exists": False}}, {"location": 1},
+                           lambda job: {"location_point": geo_point(job.get("location"))},
+                           "location_point", batch_size)
+
+
+async def regeocode_locations(db, batch_size: int = 1000, **_):
+    """Recompute ``location_point`` for every job after a gazetteer or geocoder change."""
+    return await _backfill(db.jobs, {"location": {"$type": "string"}}, {"location": 1},
+                           lambda job: {"location_point": geo_point(job.get("location"))},
+                           "location_point", batch_size)
+
+
+async def backfill_search_terms(db, batch_size: int = 1000, **_):
+    """Index title/company/location words into ``search_terms``; search only matches jobs that have them."""
+    return await _backfill(db.jobs, {"search_terms": {"$exists": False}}, {field: 1 for field in SEARCH_FIELDS},
+                           lambda job: {"search_terms": search_terms(job)}, "search_terms", batch_size)
+
+
+async def backfill_expiry(db, batch_size: int = 1000, **_):
+    """Give jobs posted before expiry existed the default ``expires_at`` (created_at + 60 days)."""
+    return await _backfill(db.jobs, {"expires_at": {"$exists": False}}, {"created_at": 1},
+                           lambda job: {"expires_at": resolve_expiry(job.get("created_at") or datetime.utcnow())},
+                           "expires_at", batch_size)
+
+
+async def sweep_jobs(db, batch_size: int = 1000, **_):
+    """Deactivate expired jobs and archive old ones with their applications (cron this for Flask)."""
+    return await sweep(Repositories(db), batch_size=batch_size)
+
+
+async def dedup_jobs(db, batch_size: int = 1000, **_):
+    """Fingerprint unfingerprinted jobs, then flag near-duplicates of the earliest posting in each group.
+
+    Candidate pairs come from one aggregation over LSH band keys shared by one
+    employer's jobs, and are verified on their full MinHash signatures before
+    being merged (union-find). Active jobs flagged earlier but no longer in a
+    group (e.g. matched against another employer) are unflagged.
+    """
+    await _backfill(db.jobs, {"dedup_bands": {"$exists": False}}, {field: 1 for field in DEDUP_FIELDS},
+                    fingerprint, "MinHash fingerprints", batch_size)
+
+    pipeline = [
+        {"$match": {"is_active": True, "dedup_bands.0": {"$exists": True}}},
+        {"$unwind": "$dedup_bands"},
+        {"$group": {"_id": {"employer_id": "$employer_id", "band": "$dedup_bands"},
+                    "jobs": {"$push": {"id": "$id", "created_at": "$created_at"}}}},
+        {"$match": {"jobs.1": {"$exists": True}}},
+    ]
+    buckets, created = [], {}
+    async for bucket in db.jobs.aggregate(pipeline, allowDiskUse=True):
+        buckets.append([job["id"] for job in bucket["jobs"]])
+        created.update((job["id"], job["created_at"]) for job in bucket["jobs"])
+
+    signatures = {}
+    ids = list(created)
+    for start in range(0, len(ids), batch_size):
+        async for job in db.jobs.find({"id": {"$in": ids[start:start + batch_size]}}, {"_id": 0, "id": 1, "minhash": 1}):
+            signatures[job["id"]] = job["minhash"]
+
+    parent = {}
+
+    def root(job_id):
+        while parent.get(job_id, job_id) != job_id:
+            job_id = parent[job_id]
+        return job_id
+
+    for bucket in buckets:
+        # Large buckets are compared against their first member only
+        pairs = ([(a, b) for i, a in enumerate(bucket) for b in bucket[i + 1:]] if len(bucket) <= 50
+                 else [(bucket[0], b) for b in bucket[1:]])
+        for a, b in pairs:
+            if similarity(signatures[a], signatures[b]) >= DUPLICATE_THRESHOLD:
+                ra, rb = root(a), root(b)
+                if ra != rb:
+                    parent[max(ra, rb, key=lambda j: (created[j], j))] = min(ra, rb, key=lambda j: (created[j], j))
+
+    updates = [UpdateOne({"id": job_id}, {"$set": {"duplicate_of": root(job_id)}}) for job_id in parent]
+    updates.append(UpdateMany({"is_active": True, "duplicate_of": {"$ne": None}, "id": {"$nin": list(parent)}},
+                              {"$set": {"duplicate_of": None}}))
+    flagged = 0
+    for start in range(0, len(updates), batch_size):
+        flagged += (await db.jobs.bulk_write(updates[start:start + batch_size], ordered=False)).modified_count
+    logger.info("Done: %d candidate buckets, %d jobs flagged or unflagged as near-duplicates", len(buckets), flagged)
+    return flagged
+
+
+async def rebuild_job_stats(db, batch_size: int = 1000, **_):
+    """Recompute the job_stats counters from applications (after a backfill, or if they drift)."""
+    rebuilt = await Repositories(db).job_stats.rebuild(batch_size=batch_size)
+    logger.info("Done: rebuilt stats for %d jobs", rebuilt)
+    return rebuilt
+
+
+MIGRATIONS = {
+    "ensure_indexes": ensure_indexes,
+    "backfill_salary": backfill_salary,
+    "reparse_salary": reparse_salary,
+    "backfill_locations": backfill_locations,
+    "regeocode_locations": regeocode_locations,
+    "backfill_search_terms": backfill_search_terms,
+    "rebuild_job_stats": rebuild_job_stats,
+    "dedup_jobs": dedup_jobs,
+    "backfill_expiry": backfill_expiry,
+    "sweep_jobs": sweep_jobs,
+}
+
+
+async def run_migration(name: str, **options):
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    try:
+        return await MIGRATIONS[name](client[os.environ['DB_NAME']], **options)
+    finally:
+        client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("migration", choices=sorted(MIGRATIONS))
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(run_migration(args.migration, batch_size=args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
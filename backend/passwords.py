@@ -0,0 +1,25 @@
+"""bcrypt helpers shared by both backends.
+
+bcrypt is deliberately slow (~100ms+ per call), so async callers must use the
+``*_async`` variants, which run it in the default executor instead of blocking
+the event loop.
+"""
+import asyncio
+
+import bcrypt
+
+
+def hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def verify_password(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(None, hash_password, password)
+
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(None, verify_password, password, hashed)
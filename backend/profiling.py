@@ -0,0 +1,229 @@
+"""On-demand profiling for the API workers.
+
+Two tools are available, both inert until an administrator asks for them:
+
+* ``SamplingProfiler`` periodically snapshots the stacks of every thread in the
+  process and aggregates them into flamegraph-compatible collapsed stacks
+  (``frame;frame;frame count``), consumable by ``flamegraph.pl`` or speedscope.
+* ``ProfilingMiddleware`` runs a single request under ``cProfile`` when it
+  carries an ``X-Profile`` header and attaches the summary to the response.
+
+cProfile hooks the whole thread, so on an asyncio worker a profiled request
+also accounts for whatever other coroutines ran on the loop meanwhile.
+``cProfile`` and ``pstats`` are imported on the first profiled request, not at
+worker startup.
+"""
+import io
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    import cProfile
+
+PROFILE_HEADER = "x-profile"
+ADMIN_KEY_HEADER = "x-admin-key"
+
+MAX_SAMPLING_SECONDS = 300
+MAX_STORED_PROFILES = 50
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling all thread stacks from a background thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: Counter = Counter()
+        self.samples = 0
+        self.interval = 0.0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.005, duration: float = 30.0) -> bool:
+        """Start sampling; returns False if a session is already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self._stacks = Counter()
+            self.samples = 0
+            self.interval = interval
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._stop.clear()
+            deadline = time.monotonic() + min(duration, MAX_SAMPLING_SECONDS)
+            self._thread = threading.Thread(
+                target=self._run, args=(deadline,), name="sampling-profiler", daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def stop(self) -> str:
+        """Stop sampling and return the collapsed stacks gathered so far."""
+        thread = self._thread
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+        return self.collapsed()
+
+    def _run(self, deadline: float):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            frames = sys._current_frames()
+            if not names.keys() >= frames.keys():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            self._stop.wait(self.interval)
+        self.stopped_at = time.time()
+
+    def collapsed(self) -> str:
+        stacks = list(self._stacks.items())
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(stacks))
+
+    def status(self) -> dict:
+        return {
+            "running": self.running,
+            "samples": self.samples,
+            "interval": self.interval,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "distinct_stacks": len(self._stacks),
+        }
+
+
+class ProfileStore:
+    """Keeps the most recent per-request cProfile reports in memory."""
+
+    def __init__(self, maxsize: int = MAX_STORED_PROFILES):
+        self.maxsize = maxsize
+        self._reports: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, report: dict) -> str:
+        profile_id = uuid.uuid4().hex
+        with self._lock:
+            self._reports[profile_id] = report
+            while len(self._reports) > self.maxsize:
+                self._reports.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        return self._reports.get(profile_id)
+
+    def list(self) -> list:
+        with self._lock:
+            return [{"id": key, **{k: v for k, v in report.items() if k != "stats"}}
+                    for key, report in self._reports.items()]
+
+
+sampler = SamplingProfiler()
+profile_store = ProfileStore()
+
+
+def format_stats(profiler: "cProfile.Profile", sort: str = "cumulative", limit: int = 40) -> str:
+    import pstats
+
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def summary_header(profiler: "cProfile.Profile", limit: int = 5) -> str:
+    """Compact top-N by cumulative time, small enough for a response header."""
+    import pstats
+
+    stats = pstats.Stats(profiler)
+    entries = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+    parts = []
+    for (filename, lineno, name), (_, _, _, cumtime, _) in entries[:limit]:
+        parts.append(f"{name}@{filename.rsplit('/', 1)[-1]}:{lineno}={cumtime * 1000:.1f}ms")
+    return "; ".join(parts)
+
+
+class ProfilingMiddleware:
+    """Profiles requests carrying ``X-Profile`` when ``authorize`` accepts the admin key.
+
+    Unprofiled requests only pay for one header lookup.
+    """
+
+    def __init__(self, app, authorize: Callable[[Optional[str]], bool], store: ProfileStore = profile_store):
+        self.app = app
+        self.authorize = authorize
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        if PROFILE_HEADER.encode() not in headers:
+            await self.app(scope, receive, send)
+            return
+
+        admin_key = headers.get(ADMIN_KEY_HEADER.encode(), b"").decode("latin-1") or None
+        if not self.authorize(admin_key):
+            await self.app(scope, receive, send)
+            return
+
+        import cProfile
+
+        profiler = cProfile.Profile()
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Hold the headers back until the profile is complete
+                start_message = message
+                return
+            if start_message is not None:
+                profiler.disable()
+                profile_id = self._store(profiler, scope, time.perf_counter() - start)
+                extra = [
+                    (b"x-profile-id", profile_id.encode()),
+                    (b"x-profile-summary", summary_header(profiler).encode("latin-1", "replace")),
+                ]
+                await send({**start_message, "headers": list(start_message.get("headers", [])) + extra})
+                start_message = None
+            await send(message)
+
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+
+    def _store(self, profiler: "cProfile.Profile", scope, seconds: float) -> str:
+        return self.store.add({
+            "method": scope["method"],
+            "path": scope["path"],
+            "duration_ms": round(seconds * 1000, 3),
+            "created_at": time.time(),
+            "stats": format_stats(profiler),
+        })
@@ -0,0 +1,723 @@
+"""Async data access shared by the FastAPI and Flask backends.
+
+Repositories wrap a Motor database and return plain dicts without Mongo's
+``_id``; the HTTP layers decide how to shape responses.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError
+from pymongo.read_preferences import Nearest, PrimaryPreferred, Secondary, SecondaryPreferred, _ServerMode
+
+from gazetteer import radius_radians
+from search import SEARCH_MAX_TIME_MS, search_clause, search_terms
+from suggest import SUGGESTION_MAX_TIME_MS
+from workflow import can_transition
+from idempotency import IDEMPOTENCY_TTL
+from dedup import DUPLICATE_THRESHOLD, MAX_CANDIDATES, fingerprint, similarity
+
+# Upper bound for list endpoints, matching the historical ``to_list(1000)``
+DEFAULT_LIMIT = 1000
+
+# Smallest maxStalenessSeconds MongoDB accepts
+MIN_MAX_STALENESS = 90
+READ_MODES = {"secondaryPreferred": SecondaryPreferred, "secondary": Secondary, "nearest": Nearest,
+              "primaryPreferred": PrimaryPreferred}
+
+DUPLICATE_KEY = 11000
+
+# Applications copied to the archive (and deleted) per round trip
+ARCHIVE_PAGE_SIZE = 1000
+
+NO_ID = {"_id": 0}
+ACTIVE = {"is_active": True}
+# Job reads also drop the derived search and dedup fields
+JOB_FIELDS = {"_id": 0, "search_terms": 0, "minhash": 0, "dedup_bands": 0}
+
+# Sort orders accepted by JobRepository.list_active
+SALARY_SORTS = {
+    "salary_desc": [("salary_max", DESCENDING)],
+    "salary_asc": [("salary_min", ASCENDING)],
+}
+
+# (is_active, ...) compound indexes replaced by partial indexes on active jobs
+SUPERSEDED_JOB_INDEXES = [
+    "is_active_1_salary_max_-1", "is_active_1_salary_min_1",
+    "is_active_1_location_point_2dsphere", "is_active_1_search_terms_1", "dedup_bands_1",
+]
+
+# Annualized salary_max (salary_min if open-ended) band edges for facet counts; the last band is open-ended
+SALARY_BANDS = [0, 50_000, 75_000, 100_000, 150_000, 200_000, float("inf")]
+FACET_LOCATION_LIMIT = 20
+
+
+class UserRepository:
+    def __init__(self, db):
+        self.collection = db.users
+
+    async def get(self, user_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": user_id}, NO_ID)
+
+    async def get_by_email(self, email: str) -> Optional[dict]:
+        return await self.collection.find_one({"email": email}, NO_ID)
+
+    async def get_many(self, user_ids: Iterable[str]) -> Dict[str, dict]:
+        ids = list(set(user_ids))
+        if not ids:
+            return {}
+        users = await self.collection.find({"id": {"$in": ids}}, NO_ID).to_list(len(ids))
+        return {user["id"]: user for user in users}
+
+    async def create(self, user: dict) -> dict:
+        await self.collection.insert_one(dict(user))
+        return user
+
+
+def listing_read_preference(mode: str = "secondaryPreferred",
+                            max_staleness: int = MIN_MAX_STALENESS) -> Optional[_ServerMode]:
+    """Read preference for listing reads that tolerate replica lag; ``None`` for ``primary``."""
+    if mode == "primary":
+        return None
+    if mode not in READ_MODES:
+        raise ValueError(f"Unknown read preference {mode!r}; use primary or one of {', '.join(READ_MODES)}")
+    return READ_MODES[mode](max_staleness=max(max_staleness, MIN_MAX_STALENESS))
+
+
+class JobRepository:
+    def __init__(self, db, listing_read_preference: Optional[_ServerMode] = None):
+        self.collection = db.jobs
+        # Public listing, search, facets and typeahead terms may be served by a secondary a little behind the
+        # primary; lookups by id, employer pages and everything around a write read the primary
+        self.listing = (db.get_collection("jobs", read_preference=listing_read_preference)
+                        if listing_read_preference is not None else self.collection)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": job_id}, JOB_FIELDS)
+
+    async def get_for_employer(self, job_id: str, employer_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": job_id, "employer_id": employer_id}, JOB_FIELDS)
+
+    async def get_many(self, job_ids: Iterable[str]) -> Dict[str, dict]:
+        ids = list(set(job_ids))
+        if not ids:
+            return {}
+        jobs = await self.collection.find({"id": {"$in": ids}}, JOB_FIELDS).to_list(len(ids))
+        return {job["id"]: job for job in jobs}
+
+    async def ensure_indexes(self):
+        # Listing indexes cover active jobs only, so they stay small as inactive history accumulates;
+        # queries must include {"is_active": True} to use them.
+        # Salary range filters and salary sorts on the active listing
+        await self.collection.create_index([("salary_max", DESCENDING)], partialFilterExpression=ACTIVE)
+        await self.collection.create_index([("salary_min", ASCENDING)], partialFilterExpression=ACTIVE)
+        # Radius searches; sparse by nature since remote/unknown locations have no point
+        await self.collection.create_index([("location_point", GEOSPHERE)], partialFilterExpression=ACTIVE)
+        # Keyword search: anchored prefix regexes on the lowercased words become index range scans
+        await self.collection.create_index([("search_terms", ASCENDING)], partialFilterExpression=ACTIVE)
+        # Near-duplicate candidate lookups by LSH band key, among one employer's postings
+        await self.collection.create_index([("employer_id", ASCENDING), ("dedup_bands", ASCENDING)],
+                                           partialFilterExpression=ACTIVE)
+        # Expiry sweeps
+        await self.collection.create_index([("expires_at", ASCENDING)], partialFilterExpression=ACTIVE)
+        await self.collection.create_index([("employer_id", ASCENDING)])
+        existing = await self.collection.index_information()
+        for name in SUPERSEDED_JOB_INDEXES:
+            if name in existing:
+                await self.collection.drop_index(name)
+
+    async def deactivate_expired(self, now: datetime) -> int:
+        result = await self.collection.update_many(
+            {**ACTIVE, "expires_at": {"$lte": now}},
+            {"$set": {"is_active": False, "deactivated_at": now}},
+        )
+        return result.modified_count
+
+    async def list_archivable(self, expired_before: datetime, limit: int) -> List[str]:
+        """Ids of inactive jobs that expired before ``expired_before``."""
+        cursor = self.collection.find({"is_active": False, "expires_at": {"$lte": expired_before}}, {"_id": 0, "id": 1})
+        return [job["id"] for job in await cursor.to_list(limit)]
+
+    @staticmethod
+    def _active_filters(search: Optional[str] = None, job_type: Optional[str] = None,
+                        min_salary: Optional[int] = None, max_salary: Optional[int] = None,
+                        near: Optional[Tuple[float, float]] = None, radius_miles: Optional[float] = None,
+                        include_duplicates: bool = False) -> Dict[str, dict]:
+        """The listing's filter clauses keyed by facet ("base" always applies)."""
+        base = dict(ACTIVE)
+        if not include_duplicates:
+            # Matches jobs never checked for duplicates too
+            base["duplicate_of"] = None
+
+        clause = search_clause(search)
+        if clause:
+            base.update(clause)
+
+        # ``near`` is (longitude, latitude); $centerSphere keeps the caller's sort instead of $near's distance order
+        if near is not None:
+            base["location_point"] = {
+                "$geoWithin": {"$centerSphere": [list(near), radius_radians(radius_miles)]}
+            }
+
+        # Ranges overlap: the job pays at least min_salary at its top end, at most max_salary at its bottom.
+        # An open-ended range ("$150k+", "Up to $120K") has no bound on that side, so it matches
+        ranges = []
+        if min_salary is not None:
+            ranges.append({"$or": [{"salary_max": {"$gte": min_salary}},
+                                   {"salary_max": None, "salary_min": {"$ne": None}}]})
+        if max_salary is not None:
+            ranges.append({"$or": [{"salary_min": {"$lte": max_salary}},
+                                   {"salary_min": None, "salary_max": {"$ne": None}}]})
+        salary = {"$and": ranges} if ranges else {}
+
+        return {"base": base, "job_type": {"job_type": job_type} if job_type else {}, "salary": salary}
+
+    async def list_active(self, search: Optional[str] = None, job_type: Optional[str] = None,
+                          min_salary: Optional[int] = None, max_salary: Optional[int] = None,
+                          sort: Optional[str] = None, near: Optional[Tuple[float, float]] = None,
+                          radius_miles: Optional[float] = None, include_duplicates: bool = False,
+                          limit: int = DEFAULT_LIMIT) -> List[dict]:
+        filters = self._active_filters(search, job_type, min_salary, max_salary, near, radius_miles,
+                                       include_duplicates)
+        query = {**filters["base"], **filters["job_type"], **filters["salary"]}
+
+        cursor = self.listing.find(query, JOB_FIELDS).max_time_ms(SEARCH_MAX_TIME_MS)
+        if sort:
+            cursor = cursor.sort(SALARY_SORTS[sort])
+        return await cursor.to_list(limit)
+
+    async def facet_counts(self, search: Optional[str] = None, job_type: Optional[str] = None,
+                           min_salary: Optional[int] = None, max_salary: Optional[int] = None,
+                           near: Optional[Tuple[float, float]] = None, radius_miles: Optional[float] = None,
+                           include_duplicates: bool = False, location_limit: int = FACET_LOCATION_LIMIT) -> dict:
+        """Counts per job_type, location and salary band for a listing query, in one $facet aggregation.
+
+        Each facet ignores its own filter, so the UI can show what picking another
+        value would return; ``total`` applies every filter.
+        """
+        filters = self._active_filters(search, job_type, min_salary, max_salary, near, radius_miles,
+                                       include_duplicates)
+        by_type, by_salary = filters["job_type"], filters["salary"]
+
+        def counts(match: dict, group_by: str, limit: int) -> List[dict]:
+            return [{"$match": match}, {"$group": {"_id": group_by, "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1, "_id": 1}}, {"$limit": limit}]
+
+        pipeline = [
+            {"$match": filters["base"]},
+            {"$facet": {
+                "total": [{"$match": {**by_type, **by_salary}}, {"$count": "count"}],
+                "job_type": counts(by_salary, "$job_type", 50),
+                "location": counts({**by_type, **by_salary}, "$location", location_limit),
+                "salary_band": [
+                    {"$match": by_type},
+                    # "$60k+" falls in its minimum's band; missing salaries map below the first boundary
+                    # so they land in the default bucket
+                    {"$bucket": {"groupBy": {"$ifNull": ["$salary_max", {"$ifNull": ["$salary_min", -1]}]},
+                                 "boundaries": SALARY_BANDS, "default": "unspecified"}},
+                ],
+            }},
+        ]
+        result = (await self.listing.aggregate(pipeline, maxTimeMS=SEARCH_MAX_TIME_MS).to_list(1))[0]
+
+        bands = {band["_id"]: band["count"] for band in result["salary_band"]}
+        salary_bands = [
+            {"min": low, "max": high if high != float("inf") else None, "count": bands[low]}
+            for low, high in zip(SALARY_BANDS, SALARY_BANDS[1:]) if low in bands
+        ]
+        if "unspecified" in bands:
+            salary_bands.append({"min": None, "max": None, "count": bands["unspecified"]})
+
+        return {
+            "total": result["total"][0]["count"] if result["total"] else 0,
+            "job_type": [{"value": row["_id"], "count": row["count"]} for row in result["job_type"]],
+            "location": [{"value": row["_id"], "count": row["count"]} for row in result["location"]],
+            "salary_band": salary_bands,
+        }
+
+    async def suggestion_counts(self, per_kind: int = 50_000) -> Dict[str, List[tuple]]:
+        """(value, active job count) for every distinct title, company and location, in one aggregation."""
+        def counts(field: str) -> List[dict]:
+            return [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}}, {"$limit": per_kind}]
+
+        pipeline = [
+            {"$match": ACTIVE},
+            {"$facet": {kind: counts(kind) for kind in ("title", "company", "location")}},
+        ]
+        result = (await self.listing.aggregate(pipeline, maxTimeMS=SUGGESTION_MAX_TIME_MS).to_list(1))[0]
+        return {kind: [(row["_id"], row["count"]) for row in rows] for kind, rows in result.items()}
+
+    async def list_by_employer(self, employer_id: str, limit: int = DEFAULT_LIMIT) -> List[dict]:
+        return await self.collection.find({"employer_id": employer_id}, JOB_FIELDS).to_list(limit)
+
+    async def find_duplicate(self, fingerprint: dict, employer_id: str,
+                             exclude_id: Optional[str] = None) -> Optional[str]:
+        """Id of the employer's most similar active, non-duplicate job at or above DUPLICATE_THRESHOLD, if any.
+
+        Only the same employer's postings count: another company's similar text is not a repost.
+        """
+        if not fingerprint["dedup_bands"]:
+            return None
+        query = {**ACTIVE, "employer_id": employer_id, "duplicate_of": None,
+                 "dedup_bands": {"$in": fingerprint["dedup_bands"]}}
+        if exclude_id:
+            query["id"] = {"$ne": exclude_id}
+        candidates = await self.collection.find(query, {"_id": 0, "id": 1, "minhash": 1}).to_list(MAX_CANDIDATES)
+        scored = [(similarity(fingerprint["minhash"], job["minhash"]), job["id"]) for job in candidates]
+        best = max(scored, default=None)
+        return best[1] if best and best[0] >= DUPLICATE_THRESHOLD else None
+
+    async def create(self, job: dict) -> dict:
+        """Insert a job with its derived fields; returns it with ``duplicate_of`` set for near-duplicates."""
+        derived = fingerprint(job)
+        job = {**job, "duplicate_of": await self.find_duplicate(derived, job["employer_id"])}
+        await self.collection.insert_one({**job, **derived, "search_terms": search_terms(job)})
+        return job
+
+
+class ApplicationRepository:
+    def __init__(self, db):
+        self.collection = db.applications
+
+    async def find_for_seeker(self, job_id: str, job_seeker_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"job_id": job_id, "job_seeker_id": job_seeker_id}, NO_ID)
+
+    async def list_by_seeker(self, job_seeker_id: str, limit: int = DEFAULT_LIMIT) -> List[dict]:
+        return await self.collection.find({"job_seeker_id": job_seeker_id}, NO_ID).to_list(limit)
+
+    async def list_by_job(self, job_id: str, limit: int = DEFAULT_LIMIT) -> List[dict]:
+        return await self.collection.find({"job_id": job_id}, NO_ID).to_list(limit)
+
+    async def list_by_jobs(self, job_ids: Iterable[str], limit: int = DEFAULT_LIMIT) -> List[dict]:
+        return await self.collection.find({"job_id": {"$in": list(job_ids)}}, NO_ID).to_list(limit)
+
+    async def ensure_indexes(self):
+        # Bulk status updates look applications up by id; archival moves them by job_id. Unique ids make
+        # retried write-behind batches idempotent; the earlier non-unique index has the same name
+        existing = await self.collection.index_information()
+        if "id_1" in existing and not existing["id_1"].get("unique"):
+            await self.collection.drop_index("id_1")
+        await self.collection.create_index("id", unique=True)
+        await self.collection.create_index("job_id")
+        # A seeker's applications, and at most one application per seeker and job even when two requests race
+        # past the "already applied" check (fails while existing data still holds such duplicates)
+        await self.collection.create_index([("job_seeker_id", ASCENDING), ("job_id", ASCENDING)], unique=True)
+
+    async def get_many(self, application_ids: Iterable[str], fields: Optional[dict] = None) -> Dict[str, dict]:
+        ids = list(set(application_ids))
+        if not ids:
+            return {}
+        projection = {"_id": 0, "id": 1, **fields} if fields else NO_ID
+        applications = await self.collection.find({"id": {"$in": ids}}, projection).to_list(len(ids))
+        return {app["id"]: app for app in applications}
+
+    async def applied_job_ids(self, job_seeker_id: str, job_ids: Iterable[str]) -> set:
+        """Which of ``job_ids`` the seeker has already applied to, in one query."""
+        ids = list(set(job_ids))
+        if not ids:
+            return set()
+        cursor = self.collection.find({"job_seeker_id": job_seeker_id, "job_id": {"$in": ids}},
+                                      {"_id": 0, "job_id": 1})
+        return {app["job_id"] for app in await cursor.to_list(len(ids))}
+
+    async def create(self, application: dict) -> Optional[dict]:
+        """Store ``application``; ``None`` if the seeker already has one for the job."""
+        try:
+            await self.collection.insert_one(dict(application))
+        except DuplicateKeyError:
+            return None
+        return application
+
+    async def create_many(self, applications: List[dict]) -> Dict[str, str]:
+        """Insert in one unordered ``insert_many``; returns ``{application id: error}`` for rejected documents.
+
+        An application already stored under its id (same job and seeker) counts as inserted, so a retried
+        batch is not stored twice.
+        """
+        if not applications:
+            return {}
+        try:
+            await self.collection.insert_many([dict(app) for app in applications], ordered=False)
+        except BulkWriteError as exc:
+            write_errors = exc.details.get("writeErrors", [])
+            errors = {applications[error["index"]]["id"]: error.get("errmsg", "insert_failed")
+                      for error in write_errors}
+            duplicates = {applications[error["index"]]["id"]: applications[error["index"]] for error in write_errors
+                          if error.get("code") == DUPLICATE_KEY}
+            if duplicates:
+                stored = self.collection.find({"id": {"$in": list(duplicates)}},
+                                              {"_id": 0, "id": 1, "job_id": 1, "job_seeker_id": 1})
+                for app in await stored.to_list(len(duplicates)):
+                    sent = duplicates[app["id"]]
+                    if (app["job_id"], app["job_seeker_id"]) == (sent["job_id"], sent["job_seeker_id"]):
+                        errors.pop(app["id"], None)
+            return errors
+        return {}
+
+    async def set_status(self, ids_by_status: Dict[str, List[str]], status: str, change: dict) -> int:
+        """Move applications to ``status`` in one bulk write, appending ``change`` to their history.
+
+        Each update is guarded by the status the caller validated against, so a
+        concurrent change is skipped rather than overwritten.
+        """
+        requests = [
+            UpdateMany({"id": {"$in": ids}, "status": current},
+                       {"$set": {"status": status, "status_updated_at": change["at"]},
+                        "$push": {"status_history": {**change, "from_status": current, "status": status}}})
+            for current, ids in ids_by_status.items() if ids
+        ]
+        if not requests:
+            return 0
+        return (await self.collection.bulk_write(requests, ordered=False)).modified_count
+
+
+class JobStatsRepository:
+    """Per-job application counters, maintained with ``$inc`` so dashboards read O(jobs) documents.
+
+    One document per job: ``applications``, ``by_status`` and ``by_day``
+    (``"YYYY-MM-DD"`` in UTC) counts. ``rebuild`` recomputes them from the
+    applications collection.
+    """
+
+    def __init__(self, db):
+        self.collection = db.job_stats
+        self.db = db
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("job_id", unique=True)
+        await self.collection.create_index("employer_id")
+
+    async def record_application(self, job: dict, application: dict):
+        day = application["applied_at"].strftime("%Y-%m-%d")
+        await self.collection.update_one(
+            {"job_id": job["id"]},
+            {"$inc": {"applications": 1, f"by_status.{application['status']}": 1, f"by_day.{day}": 1},
+             "$setOnInsert": {"employer_id": job["employer_id"]}},
+            upsert=True,
+        )
+
+    async def record_applications(self, jobs: Dict[str, dict], applications: List[dict]):
+        """``record_application`` for many applications in one bulk write, one update per job."""
+        increments: Dict[str, Dict[str, int]] = {}
+        for app in applications:
+            inc = increments.setdefault(app["job_id"], {})
+            for field in ("applications", f"by_status.{app['status']}",
+                          f"by_day.{app['applied_at'].strftime('%Y-%m-%d')}"):
+                inc[field] = inc.get(field, 0) + 1
+        requests = [
+            UpdateOne({"job_id": job_id},
+                      {"$inc": inc, "$setOnInsert": {"employer_id": jobs[job_id]["employer_id"]}},
+                      upsert=True)
+            for job_id, inc in increments.items()
+        ]
+        if requests:
+            await self.collection.bulk_write(requests, ordered=False)
+
+    async def record_status_changes(self, counts: Dict[Tuple[str, str], int], new_status: str):
+        """Apply ``{(job_id, old_status): count}`` moves to ``new_status`` in one bulk write.
+
+        A counter holding less than ``count`` (a stats document that predates it,
+        or drift) is floored at zero rather than going negative. The floor comes
+        first and the bulk write is ordered, so exactly one of each pair applies.
+        """
+        requests = []
+        for (job_id, old_status), count in counts.items():
+            if not count or old_status == new_status:
+                continue
+            old, new = f"by_status.{old_status}", f"by_status.{new_status}"
+            requests += [
+                UpdateOne({"job_id": job_id, old: {"$not": {"$gte": count}}}, {"$set": {old: 0}, "$inc": {new: count}}),
+                UpdateOne({"job_id": job_id, old: {"$gte": count}}, {"$inc": {old: -count, new: count}}),
+            ]
+        if requests:
+            await self.collection.bulk_write(requests, ordered=True)
+
+    async def list_by_employer(self, employer_id: str, limit: int = DEFAULT_LIMIT) -> List[dict]:
+        return await self.collection.find({"employer_id": employer_id}, NO_ID).to_list(limit)
+
+    async def rebuild(self, batch_size: int = 1000) -> int:
+        """Recompute every job's counters with one aggregation over applications.
+
+        Applications submitted while this runs may be missed until the next
+        rebuild, so run it off-peak (``python migrations.py rebuild_job_stats``).
+        """
+        pipeline = [
+            {"$group": {
+                "_id": {"job_id": "$job_id", "status": "$status",
+                        "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$applied_at"}}},
+                "count": {"$sum": 1},
+            }},
+        ]
+        stats = {}
+        async for row in self.db.applications.aggregate(pipeline, allowDiskUse=True):
+            key = row["_id"]
+            doc = stats.setdefault(key["job_id"], {"job_id": key["job_id"], "applications": 0,
+                                                   "by_status": {}, "by_day": {}})
+            doc["applications"] += row["count"]
+            doc["by_status"][key["status"]] = doc["by_status"].get(key["status"], 0) + row["count"]
+            doc["by_day"][key["day"]] = doc["by_day"].get(key["day"], 0) + row["count"]
+
+        job_ids = list(stats)
+        rebuilt = 0
+        for start in range(0, len(job_ids), batch_size):
+            chunk = job_ids[start:start + batch_size]
+            employers = await self.db.jobs.find({"id": {"$in": chunk}}, {"_id": 0, "id": 1, "employer_id": 1}) \
+                .to_list(len(chunk))
+            requests = [
+                ReplaceOne({"job_id": job["id"]}, {**stats[job["id"]], "employer_id": job["employer_id"]}, upsert=True)
+                for job in employers
+            ]
+            if requests:
+                await self.collection.bulk_write(requests, ordered=False)
+                rebuilt += len(requests)
+        return rebuilt
+
+
+class IdempotencyRepository:
+    """Stored responses of requests sent with an ``Idempotency-Key``, expired by a TTL index.
+
+    A record is ``pending`` while the first request runs and ``done`` once its
+    response is stored; ``key`` already combines method, path, caller and the
+    client's key.
+    """
+
+    def __init__(self, db):
+        self.collection = db.idempotency_keys
+
+    async def ensure_indexes(self, ttl_seconds: int):
+        await self.collection.create_index("key", unique=True)
+        await self.collection.create_index("created_at", expireAfterSeconds=ttl_seconds)
+
+    async def get(self, key: str) -> Optional[dict]:
+        return await self.collection.find_one({"key": key}, NO_ID)
+
+    async def begin(self, key: str, fingerprint: str, now: datetime, stale_before: datetime) -> bool:
+        """Claim ``key`` for a new request; also takes over a pending claim older than ``stale_before``."""
+        try:
+            await self.collection.insert_one({"key": key, "fingerprint": fingerprint, "state": "pending",
+                                              "created_at": now})
+            return True
+        except DuplicateKeyError:
+            result = await self.collection.update_one(
+                {"key": key, "state": "pending", "created_at": {"$lt": stale_before}},
+                {"$set": {"fingerprint": fingerprint, "created_at": now}},
+            )
+            return result.modified_count == 1
+
+    async def complete(self, key: str, response: dict):
+        await self.collection.update_one({"key": key}, {"$set": {"state": "done", "response": response}})
+
+    async def release(self, key: str):
+        await self.collection.delete_one({"key": key, "state": "pending"})
+
+
+class SlowQueryRepository:
+    """The slow command log (``slowlog``), a capped collection read newest first."""
+
+    def __init__(self, db):
+        self.db = db
+        self.collection = db.slow_queries
+
+    async def ensure_collection(self, size_bytes: int):
+        if "slow_queries" not in await self.db.list_collection_names():
+            try:
+                await self.db.create_collection("slow_queries", capped=True, size=size_bytes)
+            except CollectionInvalid:
+                pass  # created meanwhile by another worker
+
+    async def add(self, entries: List[dict]):
+        await self.collection.insert_many(entries, ordered=False)
+
+    async def recent(self, limit: int = 50, route: Optional[str] = None, collection: Optional[str] = None,
+                     min_ms: Optional[float] = None) -> List[dict]:
+        query = {}
+        if route:
+            query["route"] = route
+        if collection:
+            query["collection"] = collection
+        if min_ms is not None:
+            query["duration_ms"] = {"$gte": min_ms}
+        # Insertion order is time order in a capped collection
+        return await self.collection.find(query, NO_ID).sort("$natural", DESCENDING).limit(limit).to_list(limit)
+
+
+class Repositories:
+    """All repositories bound to one database; ``listing_read_preference`` routes job listing reads."""
+
+    def __init__(self, db, listing_read_preference: Optional[_ServerMode] = None):
+        self.db = db
+        self.users = UserRepository(db)
+        self.jobs = JobRepository(db, listing_read_preference)
+        self.applications = ApplicationRepository(db)
+        self.job_stats = JobStatsRepository(db)
+        self.idempotency = IdempotencyRepository(db)
+        self.slow_queries = SlowQueryRepository(db)
+
+    async def ensure_indexes(self):
+        await self.jobs.ensure_indexes()
+        await self.applications.ensure_indexes()
+        await self.job_stats.ensure_indexes()
+        await self.idempotency.ensure_indexes(int(IDEMPOTENCY_TTL.total_seconds()))
+        await self.db.jobs_archive.create_index("id", unique=True)
+        await self.db.applications_archive.create_index("id", unique=True)
+        await self.db.applications_archive.create_index("job_id")
+
+    async def archive_jobs(self, job_ids: List[str]) -> Tuple[int, int]:
+        """Move jobs and their applications to ``jobs_archive``/``applications_archive``.
+
+        Copies are upserts keyed by ``id`` and happen before the deletes, so an
+        interrupted run is finished by the next one without duplicates. Only the
+        applications actually copied are deleted, a page at a time until none are
+        left, so one written meanwhile is archived by a later page instead of lost.
+        Returns (jobs, applications) moved.
+        """
+        if not job_ids:
+            return 0, 0
+        jobs = await self.db.jobs.find({"id": {"$in": job_ids}}, {"_id": 0}).to_list(len(job_ids))
+        if not jobs:
+            return 0, 0
+        copied_jobs = [job["id"] for job in jobs]
+        await self._archive(self.db.jobs_archive, jobs)
+
+        moved = 0
+        while True:
+            applications = await self.db.applications.find({"job_id": {"$in": copied_jobs}},
+                                                            {"_id": 0}).to_list(ARCHIVE_PAGE_SIZE)
+            if not applications:
+                break
+            await self._archive(self.db.applications_archive, applications)
+            await self.db.applications.delete_many({"id": {"$in": [app["id"] for app in applications]}})
+            moved += len(applications)
+
+        await self.db.jobs.delete_many({"id": {"$in": copied_jobs}})
+        return len(jobs), moved
+
+    @staticmethod
+    async def _archive(collection, docs: List[dict]):
+        await collection.bulk_write([ReplaceOne({"id": doc["id"]}, doc, upsert=True) for doc in docs], ordered=False)
+
+    async def submit_application(self, job: dict, application: dict) -> Optional[dict]:
+        """Store an application and count it in the job's stats; ``None`` if the seeker already applied."""
+        if await self.applications.create(application) is None:
+            return None
+        await self.job_stats.record_application(job, application)
+        return application
+
+    async def submit_applications(self, job_seeker_id: str, job_ids: List[str],
+                                  build: Callable[[dict], dict]) -> dict:
+        """Apply to many jobs at once; ``build(job)`` returns the application to store for a job.
+
+        One ``$in`` read for the jobs, one for existing applications, one
+        unordered ``insert_many`` and one job_stats bulk write, however many
+        jobs are listed. Returns the stored applications and per-job failures
+        (``not_found``, ``inactive``, ``already_applied``, ``insert_failed``).
+        """
+        ids = list(dict.fromkeys(job_ids))
+        jobs = await self.jobs.get_many(ids)
+        applied = await self.applications.applied_job_ids(job_seeker_id, jobs)
+
+        result = {"applied": [], "failed": []}
+        pending = []
+        for job_id in ids:
+            job = jobs.get(job_id)
+            if not job:
+                result["failed"].append({"job_id": job_id, "reason": "not_found"})
+            elif not job.get("is_active", True):
+                result["failed"].append({"job_id": job_id, "reason": "inactive"})
+            elif job_id in applied:
+                result["failed"].append({"job_id": job_id, "reason": "already_applied"})
+            else:
+                pending.append(build(job))
+
+        errors = await self.store_applications(jobs, pending)
+        result["applied"] = [app for app in pending if app["id"] not in errors]
+        result["failed"].extend({"job_id": app["job_id"], "reason": "insert_failed"}
+                                for app in pending if app["id"] in errors)
+        return result
+
+    async def store_applications(self, jobs: Dict[str, dict], applications: List[dict]) -> Dict[str, str]:
+        """Insert already-validated applications and count them, two writes in all; returns insert errors."""
+        errors = await self.applications.create_many(applications)
+        await self.job_stats.record_applications(jobs, [app for app in applications if app["id"] not in errors])
+        return errors
+
+    async def update_application_statuses(self, employer_id: str, application_ids: List[str], status: str,
+                                          note: Optional[str] = None) -> dict:
+        """Validate and apply a bulk status change for an employer's applications.
+
+        Two reads (applications, their jobs) and two bulk writes (applications,
+        job_stats) regardless of how many applications are listed.
+        """
+        ids = list(dict.fromkeys(application_ids))
+        applications = await self.applications.get_many(ids, {"job_id": 1, "status": 1})
+        jobs = await self.jobs.get_many(app["job_id"] for app in applications.values())
+
+        result = {"status": status, "updated": [], "unchanged": [], "failed": []}
+        ids_by_status, moves = {}, {}
+        for application_id in ids:
+            app = applications.get(application_id)
+            job = jobs.get(app["job_id"]) if app else None
+            if not job or job["employer_id"] != employer_id:
+                result["failed"].append({"id": application_id, "reason": "not_found"})
+            elif app["status"] == status:
+                result["unchanged"].append(application_id)
+            elif not can_transition(app["status"], status):
+                result["failed"].append({"id": application_id, "reason": f"invalid_transition_from_{app['status']}"})
+            else:
+                ids_by_status.setdefault(app["status"], []).append(application_id)
+                key = (app["job_id"], app["status"])
+                moves[key] = moves.get(key, 0) + 1
+                result["updated"].append(application_id)
+
+        change = {"at": datetime.utcnow(), "by": employer_id, "note": note}
+        modified = await self.applications.set_status(ids_by_status, status, change)
+        if modified != len(result["updated"]):
+            # Lost a race with another status change; the skipped rows keep their newer status
+            current = await self.applications.get_many(result["updated"], {"status": 1})
+            lost = [app_id for app_id in result["updated"] if current.get(app_id, {}).get("status") != status]
+            result["updated"] = [app_id for app_id in result["updated"] if app_id not in lost]
+            result["failed"].extend({"id": app_id, "reason": "conflict"} for app_id in lost)
+            for app_id in lost:
+                key = (applications[app_id]["job_id"], applications[app_id]["status"])
+                moves[key] -= 1
+        await self.job_stats.record_status_changes(moves, status)
+        return result
+
+    async def employer_analytics(self, employer_id: str, days: int = 30) -> dict:
+        """Dashboard numbers from the employer's jobs and their stats documents: O(jobs), not O(applications)."""
+        jobs = await self.jobs.list_by_employer(employer_id)
+        stats = {doc["job_id"]: doc for doc in await self.job_stats.list_by_employer(employer_id)}
+
+        by_status, by_day, per_job = {}, {}, []
+        for job in jobs:
+            doc = stats.get(job["id"], {})
+            for status, count in doc.get("by_status", {}).items():
+                by_status[status] = by_status.get(status, 0) + count
+            for day, count in doc.get("by_day", {}).items():
+                by_day[day] = by_day.get(day, 0) + count
+            per_job.append({"job_id": job["id"], "title": job["title"], "is_active": job.get("is_active", True),
+                            "applications": doc.get("applications", 0), "by_status": doc.get("by_status", {})})
+
+        today = datetime.utcnow()
+        window = [(today - timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(days - 1, -1, -1)]
+        per_job.sort(key=lambda row: row["applications"], reverse=True)
+        return {
+            "total_jobs": len(jobs),
+            "total_applications": sum(row["applications"] for row in per_job),
+            "by_status": {status: count for status, count in by_status.items() if count},
+            "by_day": [{"date": day, "count": by_day.get(day, 0)} for day in window],
+            "jobs": per_job,
+        }
+
+    async def applications_with_jobs(self, job_seeker_id: str) -> List[tuple]:
+        """A seeker's applications paired with their jobs in two queries, skipping deleted jobs."""
+        applications = await self.applications.list_by_seeker(job_seeker_id)
+        jobs = await self.jobs.get_many(app["job_id"] for app in applications)
+        return [(app, jobs[app["job_id"]]) for app in applications if app["job_id"] in jobs]
+
+    async def applications_with_applicants(self, job_id: str) -> List[tuple]:
+        """A job's applications paired with their applicants in two queries, skipping deleted users."""
+        applications = await self.applications.list_by_job(job_id)
+        users = await self.users.get_many(app["job_seeker_id"] for app in applications)
+        return [(app, users[app["job_seeker_id"]]) for app in applications if app["job_seeker_id"] in users]
@@ -0,0 +1,125 @@
+"""Normalize free-form salary strings into numeric, filterable fields.
+
+``salary_min``/``salary_max`` are stored annualized (hourly x 2080, monthly x 12,
+...) so a single range filter compares "$45/hr" and "$90,000 - $110,000"
+meaningfully; ``salary_period`` records how the employer phrased it and the
+original ``salary`` string is kept for display. Currencies are not converted.
+
+When some amounts carry a currency ("$80k", "80,000 USD", "12 LPA") the
+unmarked numbers around them ("2 years", "5 days") are ignored, and
+"401(k)" is never an amount. Indian lakh/crore amounts ("₹12 LPA",
+"15 lakhs") are expanded and stored as INR.
+"""
+import re
+from typing import Optional
+
+ANNUAL_MULTIPLIERS = {"hour": 2080, "day": 260, "week": 52, "month": 12, "year": 1}
+
+CURRENCY_SYMBOLS = {"$": "USD", "£": "GBP", "€": "EUR", "₹": "INR", "¥": "JPY"}
+CURRENCY_CODES = {"USD", "EUR", "GBP", "CAD", "AUD", "INR", "JPY", "CHF", "SGD", "NZD"}
+
+PERIOD_PATTERNS = [
+    ("hour", re.compile(r"(/\s*h(ou)?r\b|/\s*h\b|per\s+hour|hourly|an\s+hour|\bp/?h\b)", re.I)),
+    ("day", re.compile(r"(/\s*day\b|per\s+day|daily|a\s+day)", re.I)),
+    ("week", re.compile(r"(/\s*w(ee)?k\b|per\s+week|weekly|a\s+week)", re.I)),
+    ("month", re.compile(r"(/\s*mo(nth)?\b|per\s+month|monthly|a\s+month|\bp/?m\b)", re.I)),
+    ("year", re.compile(r"(/\s*y(ea)?r\b|per\s+(year|annum)|annual(ly)?|a\s+year|\bp\.?a\b\.?|yearly|(?<![a-z])lpa\b)",
+                        re.I)),
+]
+
+AMOUNT = re.compile(r"(\d+(?:[.,]\d+)*)\s*(k|m|lpa|lakhs?|lacs?|crores?|cr)?(?![a-zA-Z])", re.I)
+UP_TO = re.compile(r"\b(up\s+to|max(imum)?|under)\b", re.I)
+AT_LEAST = re.compile(r"\b(from|min(imum)?|at\s+least|starting(\s+at)?)\b", re.I)
+# "$150k+", not "$150,000/year + bonus"
+PLUS = re.compile(r"\s*\+")
+RETIREMENT_PLAN = re.compile(r"\b401\s*\(?k\)?", re.I)
+
+CURRENCY_BEFORE = re.compile(r"([$£€₹¥]|\b(%s))\s*$" % "|".join(sorted(CURRENCY_CODES)), re.I)
+CURRENCY_AFTER = re.compile(r"\s*(%s)\b" % "|".join(sorted(CURRENCY_CODES)), re.I)
+RANGE_SEPARATOR = re.compile(r"\s*(-|–|—|to)\s*", re.I)
+
+SUFFIXES = {"k": 1_000, "m": 1_000_000, "lpa": 100_000, "lakh": 100_000, "lakhs": 100_000, "lac": 100_000,
+            "lacs": 100_000, "cr": 10_000_000, "crore": 10_000_000, "crores": 10_000_000}
+INDIAN_SUFFIXES = frozenset(SUFFIXES) - {"k", "m"}
+
+# Bare amounts below this are taken to be hourly rates ("$45" vs "$45,000")
+HOURLY_THRESHOLD = 1000
+
+EMPTY = {"salary_min": None, "salary_max": None, "salary_currency": None, "salary_period": None}
+
+
+def _amount(number: str, suffix: Optional[str]) -> float:
+    # "80,000" and "1.200.000" use separators for thousands; "45.50" is a decimal
+    if re.fullmatch(r"\d{1,3}([.,]\d{3})+", number):
+        value = float(re.sub(r"[.,]", "", number))
+    else:
+        value = float(number.replace(",", ""))
+    if suffix:
+        value *= SUFFIXES[suffix.lower()]
+    return value
+
+
+def _amounts(text: str) -> list:
+    """``(value, at_least)`` for each amount; only the currency-marked ones when there are any."""
+    matches = list(AMOUNT.finditer(text))
+    marked = [bool(CURRENCY_BEFORE.search(text, 0, match.start()) or CURRENCY_AFTER.match(text, match.end())
+                   or (match.group(2) or "").lower() in INDIAN_SUFFIXES)
+              for match in matches]
+    suffixes = [match.group(2) for match in matches]
+    for i in range(len(matches) - 1):
+        if not RANGE_SEPARATOR.fullmatch(text, matches[i].end(), matches[i + 1].start()):
+            continue
+        # "$80,000 - 100,000" and "12-15 lakhs": both bounds share the currency; "$60-75k": and the multiplier
+        marked[i] = marked[i + 1] = marked[i] or marked[i + 1]
+        if suffixes[i] is None:
+            suffixes[i] = suffixes[i + 1]
+    found = [(_amount(match.group(1), suffix), bool(PLUS.match(text, match.end())), is_marked)
+             for match, suffix, is_marked in zip(matches, suffixes, marked)]
+    return [(value, at_least) for value, at_least, is_marked in found if is_marked or not any(marked)]
+
+
+def _currency(text: str) -> Optional[str]:
+    for symbol, code in CURRENCY_SYMBOLS.items():
+        if symbol in text:
+            return code
+    for token in re.findall(r"[A-Za-z]{3}", text.upper()):
+        if token in CURRENCY_CODES:
+            return token
+    if any(suffix and suffix.lower() in INDIAN_SUFFIXES for _, suffix in AMOUNT.findall(text)):
+        return "INR"
+    return None
+
+
+def parse_salary(text: Optional[str]) -> dict:
+    """Parse e.g. "$80,000 - $100,000", "$45/hr", "€60k-€75k", "Up to $120K", "₹12 LPA", "Competitive"."""
+    if not text:
+        return dict(EMPTY)
+
+    text = RETIREMENT_PLAN.sub(" ", text)
+    parsed = _amounts(text)
+    if not parsed:
+        return dict(EMPTY)
+    amounts = [value for value, _ in parsed]
+
+    # "$60-75k": a bare lower bound borrows the multiplier of the upper bound
+    if len(amounts) >= 2 and amounts[0] < HOURLY_THRESHOLD <= amounts[1] and amounts[1] / amounts[0] >= 100:
+        amounts[0] *= 1_000
+
+    period = next((name for name, pattern in PERIOD_PATTERNS if pattern.search(text)), None)
+    if period is None:
+        period = "hour" if max(amounts) < HOURLY_THRESHOLD else "year"
+    multiplier = ANNUAL_MULTIPLIERS[period]
+
+    low, high = min(amounts[:2]), max(amounts[:2])
+    if len(amounts) == 1:
+        if UP_TO.search(text):
+            low = None
+        elif parsed[0][1] or AT_LEAST.search(text):
+            high = None
+
+    return {
+        "salary_min": round(low * multiplier) if low is not None else None,
+        "salary_max": round(high * multiplier) if high is not None else None,
+        "salary_currency": _currency(text),
+        "salary_period": period,
+    }
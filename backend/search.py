@@ -0,0 +1,51 @@
+"""Keyword search over jobs without handing user input to the regex engine.
+
+Raw search text used to go straight into ``$regex`` on three fields, so input
+like ``(a+)+$`` or ``.*.*.*a`` made the server backtrack through every job.
+Instead each job stores ``search_terms`` -- the lowercased words of its title,
+company and location -- and a search becomes one escaped, ``^``-anchored,
+case-sensitive prefix regex per word. Anchored prefixes on a lowercased field
+are served as range scans over the single-field ``search_terms`` index, which
+is partial on ``is_active: true`` so listing queries (always on active jobs)
+can use it.
+"""
+import re
+from typing import List, Optional
+
+# Complexity limits: longer input is rejected by the API, extra words are ignored
+MAX_SEARCH_LENGTH = 100
+MAX_SEARCH_TERMS = 6
+MAX_TERM_LENGTH = 30
+
+# Server-side budget for listing queries; a slow search fails instead of tying up the cluster
+SEARCH_MAX_TIME_MS = 2000
+
+SEARCH_FIELDS = ("title", "company", "location")
+
+
+def normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Distinct lowercased words of ``text``, in order, within the complexity limits."""
+    terms = []
+    for word in normalize((text or "")[:MAX_SEARCH_LENGTH]).split():
+        word = word[:MAX_TERM_LENGTH]
+        if word not in terms:
+            terms.append(word)
+    return terms[:MAX_SEARCH_TERMS]
+
+
+def search_terms(job: dict) -> List[str]:
+    """The ``search_terms`` field stored on a job."""
+    return sorted({word for field in SEARCH_FIELDS for word in normalize(job.get(field) or "").split()})
+
+
+def search_clause(text: Optional[str]) -> Optional[dict]:
+    """Every word must prefix-match some word of the title, company or location."""
+    terms = tokenize(text)
+    if not terms:
+        return None
+    clauses = [{"search_terms": {"$regex": f"^{re.escape(term)}"}} for term in terms]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
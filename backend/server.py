@@ -1,29 +1,120 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, Query, Request, status, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import ExecutionTimeout
+import asyncio
 import os
 import logging
 from pathlib import Path
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, Field
 from typing import List, Optional
 import uuid
+import hmac
 from datetime import datetime, timedelta
 import jwt
-import bcrypt
 from enum import Enum
 
+from documents import generate_mock_cover_letter, generate_mock_resume
+from passwords import hash_password_async, verify_password_async
+from repositories import MIN_MAX_STALENESS, Repositories, listing_read_preference
+from cache import TTLCache
+from suggest import KINDS, SuggestionIndex
+from salary import parse_salary
+from search import MAX_SEARCH_LENGTH, tokenize
+from workflow import MAX_BULK_APPLICATIONS, MAX_BULK_STATUS_UPDATES
+from lifecycle import JobSweeper, resolve_expiry
+from ratelimit import LoginRateLimiter
+from writebehind import WriteBehindFull, WriteBehindQueue, retry
+from idempotency import IdempotencyMiddleware, IdempotencyStore
+from singleflight import SingleFlight
+from slowlog import SlowQueryLog
+from gazetteer import geo_point, geocode
+from metrics import CONTENT_TYPE_LATEST, REGISTRY, PrometheusMiddleware, command_listener
+from profiling import ProfilingMiddleware, profile_store, sampler
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, opened by the lifespan handler in the process that serves requests
+# (after the launcher forks); importing this module touches neither the network nor MONGO_URL
+client = None
+db = None
+repos = None
+
+# Job listing, search, facet and typeahead reads tolerate replica lag and go to secondaries when there are any;
+# auth, lookups by id and read-after-write paths (my-jobs after posting, applications) stay on the primary
+listing_reads = listing_read_preference(
+    os.environ.get('LISTING_READ_PREFERENCE', 'secondaryPreferred'),
+    int(os.environ.get('LISTING_MAX_STALENESS_SECONDS', MIN_MAX_STALENESS)),
+)
+
+def create_client():
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    listeners = [command_listener] + ([slow_queries] if slow_queries is not None else [])
+    # minPoolSize keeps warm connections open so the first requests after startup don't pay for handshakes
+    return AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=listeners,
+                              minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', 0)))
+
+# Facet counts per normalized listing query; cleared on job writes, TTL bounds staleness across workers
+facet_cache = TTLCache(maxsize=512, ttl=30)
+
+# Typeahead terms, built from the jobs collection at startup and refreshed in the background
+suggestions = SuggestionIndex()
+# Fire-and-forget tasks, referenced until they finish
+background_tasks = set()
+
+# Concurrent identical job reads share one in-flight query (results are shared; don't mutate them)
+job_reads = SingleFlight("jobs")
+
+# Commands slower than SLOW_QUERY_MS go to the capped slow_queries collection (explained if SLOW_QUERY_EXPLAIN=on)
+slow_queries = SlowQueryLog.from_env(lambda: repos)
+
+async def _store_applications(batch):
+    # A retried batch skips applications an earlier attempt stored (unique ids); the stats write is retried
+    # on its own so a failure there doesn't re-run the insert
+    jobs = {job["id"]: job for job, _ in batch}
+    applications = [app for _, app in batch]
+    errors = await repos.applications.create_many(applications)
+    stored = [app for app in applications if app["id"] not in errors]
+    await retry(lambda: repos.job_stats.record_applications(jobs, stored), "Counting queued applications")
+    return errors
+
+# Optional write-behind for POST /applications: acknowledged at once, inserted in micro-batches
+application_writer = WriteBehindQueue(
+    _store_applications, name="applications",
+    max_batch=int(os.environ.get('APPLICATION_BATCH_SIZE', 500)),
+    max_delay=float(os.environ.get('APPLICATION_BATCH_DELAY_MS', 20)) / 1000,
+    max_pending=int(os.environ.get('APPLICATION_QUEUE_LIMIT', 10000)),
+) if os.environ.get('APPLICATION_WRITE_BEHIND', '').lower() in ('1', 'true', 'on') else None
+
+def use_database(database):
+    """Point the app at another Motor-compatible database (benchmarks, tests)."""
+    global db, repos
+    db = database
+    repos = Repositories(database, listing_reads)
+    facet_cache.clear()
+    suggestions.built_at = None
+
+def connect():
+    """Open the Motor client for ``DB_NAME``."""
+    global client
+    client = create_client()
+    use_database(client[os.environ['DB_NAME']])
+
+@asynccontextmanager
+async def lifespan(app):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
 
 # Create the main app without a prefix
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -33,6 +124,12 @@ JWT_SECRET = "your-secret-key-change-in-production"
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_HOURS = 24
 
+# Admin endpoints (profiling, diagnostics) are disabled unless a key is configured
+ADMIN_API_KEY = os.environ.get('ADMIN_API_KEY')
+
+# Login brute-force throttling (per IP and per email)
+login_limiter = LoginRateLimiter.from_env()
+
 # Security
 security = HTTPBearer()
 
@@ -47,6 +144,18 @@ class JobType(str, Enum):
     CONTRACT = "contract"
     INTERNSHIP = "internship"
 
+class ApplicationStatus(str, Enum):
+    APPLIED = "applied"
+    SCREENING = "screening"
+    INTERVIEWING = "interviewing"
+    OFFERED = "offered"
+    HIRED = "hired"
+    REJECTED = "rejected"
+
+class JobSort(str, Enum):
+    SALARY_DESC = "salary_desc"
+    SALARY_ASC = "salary_asc"
+
 # Models
 class User(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -93,7 +202,19 @@ class Job(BaseModel):
     job_type: JobType
     employer_id: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    expires_at: Optional[datetime] = None
     is_active: bool = True
+    # Id of an earlier near-identical posting; duplicates are hidden from listings by default
+    duplicate_of: Optional[str] = None
+    
+    # Parsed from salary at write time, annualized
+    salary_min: Optional[int] = None
+    salary_max: Optional[int] = None
+    salary_currency: Optional[str] = None
+    salary_period: Optional[str] = None
+    
+    # GeoJSON point geocoded from location at write time; None for remote/unknown places
+    location_point: Optional[dict] = None
 
 class JobCreate(BaseModel):
     title: str
@@ -103,6 +224,7 @@ class JobCreate(BaseModel):
     salary: Optional[str] = None
     location: str
     job_type: JobType
+    expires_at: Optional[datetime] = None  # defaults to 60 days from posting, at most 180
 
 class Application(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -112,51 +234,52 @@ class Application(BaseModel):
     cover_letter_content: str
     applied_at: datetime = Field(default_factory=datetime.utcnow)
     status: str = "applied"
+    status_updated_at: Optional[datetime] = None
+    status_history: List[dict] = []
 
 class ApplicationCreate(BaseModel):
     job_id: str
     resume_content: str
     cover_letter_content: str
 
-class AIDocumentRequest(BaseModel):
-    job_id: Optional[str] = None
-    document_type: str  # "resume" or "cover_letter"
-
-# Mock AI Document Generation
-async def generate_mock_resume(user_profile: dict) -> str:
-    """Mock resume generation - replace with real Gemini API later"""
-    return f"""
-{user_profile['full_name']}
-Email: {user_profile['email']} | Phone: {user_profile.get('phone', 'Not provided')}
-
-PROFESSIONAL SUMMARY
-Experienced professional with strong background in {', '.join(user_profile.get('skills', ['various technologies']))}. 
-{user_profile.get('experience', 'Seeking new opportunities to contribute and grow.')}
-
-EDUCATION
-{user_profile.get('education', 'Educational background as provided in profile')}
-
-TECHNICAL SKILLS
-{', '.join(user_profile.get('skills', ['Problem solving', 'Communication', 'Team collaboration']))}
+class BulkApplicationCreate(BaseModel):
+    job_ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_APPLICATIONS)
+    resume_content: str
+    cover_letter_content: str
 
-EXPERIENCE
-{user_profile.get('experience', 'Professional experience as outlined in profile')}
-"""
+class ApplicationStatusUpdate(BaseModel):
+    application_ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_STATUS_UPDATES)
+    status: ApplicationStatus
+    note: Optional[str] = Field(None, max_length=500)
 
-async def generate_mock_cover_letter(user_profile: dict, job_details: dict) -> str:
-    """Mock cover letter generation - replace with real Gemini API later"""
-    return f"""Dear Hiring Manager,
+class FacetCount(BaseModel):
+    value: str
+    count: int
 
-I am writing to express my strong interest in the {job_details['title']} position at {job_details['company']}. 
+class SalaryBand(BaseModel):
+    min: Optional[int] = None
+    max: Optional[int] = None  # None on the open-ended top band and on "unspecified"
+    count: int
 
-With my background in {', '.join(user_profile.get('skills', ['relevant technologies']))}, I am confident I would be a valuable addition to your team. My experience includes {user_profile.get('experience', 'various professional experiences')}.
+class JobFacets(BaseModel):
+    total: int
+    job_type: List[FacetCount]
+    location: List[FacetCount]
+    salary_band: List[SalaryBand]
 
-What particularly excites me about this role is the opportunity to work on {job_details['title']} at {job_details['company']}. Based on the job requirements, I believe my skills in {', '.join(user_profile.get('skills', ['key areas'])[:3])} align well with what you're looking for.
+class SuggestionKind(str, Enum):
+    TITLE = "title"
+    COMPANY = "company"
+    LOCATION = "location"
 
-I am eager to bring my expertise to {job_details['company']} and contribute to your continued success. Thank you for considering my application.
+class Suggestion(BaseModel):
+    value: str
+    kind: SuggestionKind
+    count: int
 
-Sincerely,
-{user_profile['full_name']}"""
+class AIDocumentRequest(BaseModel):
+    job_id: Optional[str] = None
+    document_type: str  # "resume" or "cover_letter"
 
 # Auth Helper Functions
 def create_access_token(data: dict):
@@ -165,12 +288,6 @@ def create_access_token(data: dict):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
-
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         token = credentials.credentials
@@ -179,7 +296,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         if user_id is None:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        user_dict = await db.users.find_one({"id": user_id})
+        user_dict = await repos.users.get(user_id)
         if user_dict is None:
             raise HTTPException(status_code=401, detail="User not found")
         
@@ -189,21 +306,30 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+def is_admin_key(key: Optional[str]) -> bool:
+    if not ADMIN_API_KEY or not key:
+        return False
+    return hmac.compare_digest(key.encode('utf-8'), ADMIN_API_KEY.encode('utf-8'))
+
+async def require_admin(x_admin_key: Optional[str] = Header(None)):
+    if not is_admin_key(x_admin_key):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
 # Routes
 @api_router.post("/auth/register")
 async def register(user_data: UserCreate):
     # Check if user already exists
-    existing_user = await db.users.find_one({"email": user_data.email})
+    existing_user = await repos.users.get_by_email(user_data.email)
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
     user_dict = user_data.dict()
-    user_dict["password_hash"] = hash_password(user_data.password)
+    user_dict["password_hash"] = await hash_password_async(user_data.password)
     del user_dict["password"]
     
     user = User(**user_dict)
-    await db.users.insert_one(user.dict())
+    await repos.users.create(user.dict())
     
     # Create access token
     access_token = create_access_token({"sub": user.id})
@@ -211,14 +337,21 @@ async def register(user_data: UserCreate):
     return {"access_token": access_token, "token_type": "bearer", "user": user}
 
 @api_router.post("/auth/login")
-async def login(login_data: UserLogin):
-    user_dict = await db.users.find_one({"email": login_data.email})
+async def login(login_data: UserLogin, request: Request):
+    # Throttle before the lookup and the bcrypt check, which is what a brute-force burst costs us
+    retry_after = await login_limiter.check(request.client.host if request.client else None, login_data.email)
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Too many login attempts; try again later",
+                            headers={"Retry-After": str(retry_after)})
+    
+    user_dict = await repos.users.get_by_email(login_data.email)
     if not user_dict:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     user = User(**user_dict)
-    if not verify_password(login_data.password, user.password_hash):
+    if not await verify_password_async(login_data.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    await login_limiter.succeeded(request.client.host if request.client else None, login_data.email)
     
     access_token = create_access_token({"sub": user.id})
     return {"access_token": access_token, "token_type": "bearer", "user": user}
@@ -232,33 +365,96 @@ async def create_job(job_data: JobCreate, current_user: User = Depends(get_curre
     if current_user.role != UserRole.EMPLOYER:
         raise HTTPException(status_code=403, detail="Only employers can post jobs")
     
+    now = datetime.utcnow()
+    try:
+        expires_at = resolve_expiry(now, job_data.expires_at)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     job_dict = job_data.dict()
     job_dict["employer_id"] = current_user.id
+    job_dict["created_at"] = now
+    job_dict["expires_at"] = expires_at
+    job_dict.update(parse_salary(job_data.salary))
+    job_dict["location_point"] = geo_point(job_data.location)
     job = Job(**job_dict)
     
-    await db.jobs.insert_one(job.dict())
+    job = Job(**await repos.jobs.create(job.dict()))
+    facet_cache.clear()
+    suggestions.add_job(job_dict)
     return job
 
-@api_router.get("/jobs", response_model=List[Job])
-async def get_jobs(search: Optional[str] = None, job_type: Optional[JobType] = None):
-    query = {"is_active": True}
-    
-    if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"company": {"$regex": search, "$options": "i"}},
-            {"location": {"$regex": search, "$options": "i"}}
-        ]
+def job_filters(
+    search: Optional[str] = Query(None, max_length=MAX_SEARCH_LENGTH, description="Words matched as prefixes"),
+    job_type: Optional[JobType] = None,
+    min_salary: Optional[int] = Query(None, ge=0, description="Annualized; matches jobs paying at least this"),
+    max_salary: Optional[int] = Query(None, ge=0, description="Annualized; matches jobs paying at most this"),
+    near: Optional[str] = Query(None, max_length=100, description="Place name, e.g. 'Austin, TX'"),
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lng: Optional[float] = Query(None, ge=-180, le=180),
+    radius: float = Query(25, gt=0, le=500, description="Miles around near or lat/lng"),
+    include_duplicates: bool = Query(False, description="Also list postings flagged as near-duplicates"),
+) -> dict:
+    """Listing filters shared by /jobs and /jobs/facets, as JobRepository keyword arguments."""
+    point = None
+    if (lat is None) != (lng is None):
+        raise HTTPException(status_code=400, detail="lat and lng must be given together")
+    if lat is not None:
+        point = (lng, lat)
+    elif near:
+        point = geocode(near)
+        if point is None:
+            raise HTTPException(status_code=400, detail=f"Unknown location: {near}")
     
-    if job_type:
-        query["job_type"] = job_type
-    
-    jobs = await db.jobs.find(query).to_list(1000)
+    return {
+        "search": search.strip() if search and search.strip() else None,
+        "job_type": job_type.value if job_type else None,
+        "min_salary": min_salary,
+        "max_salary": max_salary,
+        "near": point,
+        "radius_miles": radius if point else None,
+        "include_duplicates": include_duplicates,
+    }
+
+@api_router.get("/jobs", response_model=List[Job])
+async def get_jobs(filters: dict = Depends(job_filters), sort: Optional[JobSort] = None):
+    sort = sort.value if sort else None
+    key = ("list", sort, tuple(sorted(filters.items())))
+    jobs = await job_reads.do(key, lambda: repos.jobs.list_active(sort=sort, **filters))
     return [Job(**job) for job in jobs]
 
+@api_router.get("/jobs/facets", response_model=JobFacets)
+async def get_job_facets(filters: dict = Depends(job_filters)):
+    # Searches that tokenize the same ("Senior  ENG", "senior eng") share an entry
+    key = tuple(sorted({**filters, "search": " ".join(tokenize(filters["search"]))}.items()))
+    facets = facet_cache.get(key)
+    if facets is None:
+        # A cache miss on a popular query is read once, not once per waiting request
+        facets = await job_reads.do(("facets", key), lambda: repos.jobs.facet_counts(**filters))
+        facet_cache.set(key, facets)
+    return facets
+
+@api_router.get("/jobs/suggest", response_model=List[Suggestion])
+async def suggest_jobs(
+    q: str = Query(..., min_length=1, max_length=100),
+    kind: Optional[SuggestionKind] = None,
+    limit: int = Query(10, ge=1, le=50),
+):
+    if suggestions.built_at is None:
+        # Nothing to serve yet: concurrent first requests share one aggregation
+        suggestions.build(await job_reads.do(("suggest",), repos.jobs.suggestion_counts))
+    elif suggestions.claim_refresh():
+        # Stale: keep answering from the current index while one background task rebuilds it
+        refresh = asyncio.get_running_loop().create_task(
+            suggestions.refresh(lambda: job_reads.do(("suggest",), repos.jobs.suggestion_counts))
+        )
+        background_tasks.add(refresh)
+        refresh.add_done_callback(background_tasks.discard)
+    return suggestions.suggest(q, limit=limit, kinds=[kind.value] if kind else KINDS)
+
 @api_router.get("/jobs/{job_id}", response_model=Job)
 async def get_job(job_id: str):
-    job_dict = await db.jobs.find_one({"id": job_id})
+    job_dict = await job_reads.do(("get", job_id), lambda: repos.jobs.get(job_id))
     if not job_dict:
         raise HTTPException(status_code=404, detail="Job not found")
     return Job(**job_dict)
@@ -268,9 +464,19 @@ async def get_my_jobs(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.EMPLOYER:
         raise HTTPException(status_code=403, detail="Only employers can view their jobs")
     
-    jobs = await db.jobs.find({"employer_id": current_user.id}).to_list(1000)
+    jobs = await repos.jobs.list_by_employer(current_user.id)
     return [Job(**job) for job in jobs]
 
+@api_router.get("/employer/analytics")
+async def get_employer_analytics(
+    days: int = Query(30, ge=1, le=365),
+    current_user: User = Depends(get_current_user),
+):
+    if current_user.role != UserRole.EMPLOYER:
+        raise HTTPException(status_code=403, detail="Only employers can view analytics")
+    
+    return await repos.employer_analytics(current_user.id, days=days)
+
 @api_router.post("/generate-document")
 async def generate_document(request: AIDocumentRequest, current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.JOB_SEEKER:
@@ -284,7 +490,7 @@ async def generate_document(request: AIDocumentRequest, current_user: User = Dep
         if not request.job_id:
             raise HTTPException(status_code=400, detail="Job ID required for cover letter")
         
-        job_dict = await db.jobs.find_one({"id": request.job_id})
+        job_dict = await repos.jobs.get(request.job_id)
         if not job_dict:
             raise HTTPException(status_code=404, detail="Job not found")
         
@@ -300,86 +506,170 @@ async def apply_for_job(application_data: ApplicationCreate, current_user: User
         raise HTTPException(status_code=403, detail="Only job seekers can apply for jobs")
     
     # Check if job exists
-    job_dict = await db.jobs.find_one({"id": application_data.job_id})
+    job_dict = await repos.jobs.get(application_data.job_id)
     if not job_dict:
         raise HTTPException(status_code=404, detail="Job not found")
+    if not job_dict.get("is_active", True):
+        raise HTTPException(status_code=400, detail="Job is no longer accepting applications")
     
-    # Check if already applied
-    existing_application = await db.applications.find_one({
-        "job_id": application_data.job_id,
-        "job_seeker_id": current_user.id
-    })
-    if existing_application:
+    # Check if already applied (including applications still queued for write-behind)
+    key = (application_data.job_id, current_user.id)
+    existing_application = await repos.applications.find_for_seeker(application_data.job_id, current_user.id)
+    if existing_application or (application_writer is not None and application_writer.is_pending(key)):
         raise HTTPException(status_code=400, detail="Already applied for this job")
     
     application_dict = application_data.dict()
     application_dict["job_seeker_id"] = current_user.id
     application = Application(**application_dict)
     
-    await db.applications.insert_one(application.dict())
+    if application_writer is None:
+        if await repos.submit_application(job_dict, application.dict()) is None:
+            raise HTTPException(status_code=400, detail="Already applied for this job")
+        return application
+    try:
+        await application_writer.put((job_dict, application.dict()), key=key)
+    except WriteBehindFull:
+        raise HTTPException(status_code=503, detail="Too many applications in flight, retry shortly",
+                            headers={"Retry-After": "1"})
     return application
 
+@api_router.post("/applications/bulk")
+async def apply_for_jobs(application_data: BulkApplicationCreate, current_user: User = Depends(get_current_user)):
+    if current_user.role != UserRole.JOB_SEEKER:
+        raise HTTPException(status_code=403, detail="Only job seekers can apply for jobs")
+    
+    def build(job: dict) -> dict:
+        return Application(
+            job_id=job["id"],
+            job_seeker_id=current_user.id,
+            resume_content=application_data.resume_content,
+            cover_letter_content=application_data.cover_letter_content,
+        ).dict()
+    
+    return await repos.submit_applications(current_user.id, application_data.job_ids, build)
+
 @api_router.get("/my-applications", response_model=List[dict])
 async def get_my_applications(current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.JOB_SEEKER:
         raise HTTPException(status_code=403, detail="Only job seekers can view their applications")
     
-    applications = await db.applications.find({"job_seeker_id": current_user.id}).to_list(1000)
-    
-    # Fetch job details for each application
+    # Applications and their jobs in two queries
     result = []
-    for app in applications:
-        job_dict = await db.jobs.find_one({"id": app["job_id"]})
-        if job_dict:
-            application_dict = Application(**app)
-            result.append({
-                "id": application_dict.id,
-                "job_id": application_dict.job_id,
-                "job_seeker_id": application_dict.job_seeker_id,
-                "resume_content": application_dict.resume_content,
-                "cover_letter_content": application_dict.cover_letter_content,
-                "applied_at": application_dict.applied_at,
-                "status": application_dict.status,
-                "job": Job(**job_dict)
-            })
+    for app, job_dict in await repos.applications_with_jobs(current_user.id):
+        application_dict = Application(**app)
+        result.append({
+            "id": application_dict.id,
+            "job_id": application_dict.job_id,
+            "job_seeker_id": application_dict.job_seeker_id,
+            "resume_content": application_dict.resume_content,
+            "cover_letter_content": application_dict.cover_letter_content,
+            "applied_at": application_dict.applied_at,
+            "status": application_dict.status,
+            "status_updated_at": application_dict.status_updated_at,
+            "job": Job(**job_dict)
+        })
     
     return result
 
+@api_router.patch("/applications/status")
+async def update_application_status(update: ApplicationStatusUpdate, current_user: User = Depends(get_current_user)):
+    if current_user.role != UserRole.EMPLOYER:
+        raise HTTPException(status_code=403, detail="Only employers can change application status")
+    
+    return await repos.update_application_statuses(
+        current_user.id, update.application_ids, update.status.value, note=update.note
+    )
+
 @api_router.get("/job-applications/{job_id}")
 async def get_job_applications(job_id: str, current_user: User = Depends(get_current_user)):
     if current_user.role != UserRole.EMPLOYER:
         raise HTTPException(status_code=403, detail="Only employers can view applications")
     
     # Check if job belongs to employer
-    job_dict = await db.jobs.find_one({"id": job_id, "employer_id": current_user.id})
+    job_dict = await repos.jobs.get_for_employer(job_id, current_user.id)
     if not job_dict:
         raise HTTPException(status_code=404, detail="Job not found or unauthorized")
     
-    applications = await db.applications.find({"job_id": job_id}).to_list(1000)
-    
-    # Fetch applicant details
+    # Applications and their applicants in two queries
     result = []
-    for app in applications:
-        user_dict = await db.users.find_one({"id": app["job_seeker_id"]})
-        if user_dict:
-            user = User(**user_dict)
-            result.append({
-                **app,
-                "applicant": {
-                    "id": user.id,
-                    "full_name": user.full_name,
-                    "email": user.email,
-                    "skills": user.skills,
-                    "experience": user.experience,
-                    "education": user.education
-                }
-            })
+    for app, user_dict in await repos.applications_with_applicants(job_id):
+        user = User(**user_dict)
+        result.append({
+            **app,
+            "applicant": {
+                "id": user.id,
+                "full_name": user.full_name,
+                "email": user.email,
+                "skills": user.skills,
+                "experience": user.experience,
+                "education": user.education
+            }
+        })
     
     return result
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE_LATEST)
+
+# Admin: slow query log
+@api_router.get("/admin/slow-queries", dependencies=[Depends(require_admin)])
+async def list_slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    route: Optional[str] = None,
+    collection: Optional[str] = None,
+    min_ms: Optional[float] = Query(None, ge=0),
+):
+    if slow_queries is not None:
+        # Include this worker's entries that haven't been written yet
+        await slow_queries.flush()
+    return await repos.slow_queries.recent(limit, route=route, collection=collection, min_ms=min_ms)
+
+# Admin: on-demand profiling
+@api_router.post("/admin/profiling/start", dependencies=[Depends(require_admin)])
+async def start_profiling(interval: float = 0.005, duration: float = 30.0):
+    if interval <= 0 or duration <= 0:
+        raise HTTPException(status_code=400, detail="interval and duration must be positive")
+    if not sampler.start(interval=interval, duration=duration):
+        raise HTTPException(status_code=409, detail="Profiler already running")
+    return sampler.status()
+
+@api_router.post("/admin/profiling/stop", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def stop_profiling():
+    return sampler.stop()
+
+@api_router.get("/admin/profiling/status", dependencies=[Depends(require_admin)])
+async def profiling_status():
+    return sampler.status()
+
+@api_router.get("/admin/profiling/collapsed", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def profiling_collapsed():
+    return sampler.collapsed()
+
+@api_router.get("/admin/profiling/requests", dependencies=[Depends(require_admin)])
+async def list_request_profiles():
+    return profile_store.list()
+
+@api_router.get("/admin/profiling/requests/{profile_id}", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def get_request_profile(profile_id: str):
+    report = profile_store.get(profile_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return report["stats"]
+
+# Queries that exhaust their maxTimeMS budget
+@app.exception_handler(ExecutionTimeout)
+async def query_timeout_handler(request, exc):
+    return JSONResponse(status_code=503, content={"detail": "Query took too long; try a more specific search"})
+
 # Include the router in the main app
 app.include_router(api_router)
 
+# Retried POST/PUT/PATCH/DELETE requests with an Idempotency-Key get the stored first response
+app.add_middleware(IdempotencyMiddleware, store=IdempotencyStore(lambda: repos))
+app.add_middleware(ProfilingMiddleware, authorize=is_admin_key)
+app.add_middleware(PrometheusMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -395,6 +685,41 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+# Deactivates and archives expired jobs in the background
+sweeper = JobSweeper(lambda: repos, interval=float(os.environ.get('JOB_SWEEP_INTERVAL_SECONDS', 300)))
+
+async def startup():
+    # A database injected with use_database() (benchmarks, tests) is kept
+    if repos is None:
+        connect()
+    try:
+        await repos.ensure_indexes()
+    except Exception:
+        logger.exception("Could not create MongoDB indexes; run `python migrations.py ensure_indexes`")
+    if os.environ.get('STARTUP_WARMUP', 'on').lower() not in ('0', 'off', 'false'):
+        await warm_up()
+    sweeper.start()
+    if application_writer is not None:
+        application_writer.start()
+    if slow_queries is not None:
+        slow_queries.start()
+
+async def warm_up():
+    """Open a pooled connection and build the typeahead index before the first request needs them."""
+    try:
+        await db.command("ping")
+        suggestions.build(await repos.jobs.suggestion_counts())
+    except Exception:
+        logger.exception("Startup warm-up failed; caches will fill on first use")
+
+async def shutdown():
+    global client, db, repos
+    await sweeper.stop()
+    if application_writer is not None:
+        # Acknowledged applications still queued are written before the client closes
+        await application_writer.stop()
+    if slow_queries is not None:
+        await slow_queries.stop()
+    if client is not None:
+        client.close()
+        client = db = repos = None
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""Request coalescing ("single-flight") for identical concurrent reads.
+
+When a job goes viral, thousands of requests for it arrive within the same
+few milliseconds and each would send the same ``find_one``. ``SingleFlight.do``
+runs the read once per key at a time: the first caller starts it, callers
+arriving while it is in flight await the same result (or exception), and the
+key is forgotten as soon as the read finishes -- this is not a cache, nothing
+is served after the database answered.
+
+The read runs in its own task, so a caller that disconnects doesn't cancel it
+for the others. Results are shared objects: callers must not mutate them.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from metrics import DEFAULT_COUNT_BUCKETS, REGISTRY
+
+T = TypeVar("T")
+
+SINGLEFLIGHT_CALLS = REGISTRY.counter(
+    "singleflight_calls_total", "Coalesced reads by group; outcome is executed or shared", ("group", "outcome")
+)
+SINGLEFLIGHT_IN_FLIGHT = REGISTRY.gauge("singleflight_in_flight", "Distinct keys being read", ("group",))
+# Callers served by one execution of a key; the tail shows how hot the hottest keys get
+SINGLEFLIGHT_FANOUT = REGISTRY.histogram(
+    "singleflight_callers_per_key", "Callers sharing one read of a key", ("group",),
+    DEFAULT_COUNT_BUCKETS + (500, 1000, 5000),
+)
+
+
+class SingleFlight:
+    def __init__(self, group: str):
+        self.group = group
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._callers: Dict[Hashable, int] = {}
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._callers[key] = 1
+            SINGLEFLIGHT_CALLS.inc(group=self.group, outcome="executed")
+            SINGLEFLIGHT_IN_FLIGHT.inc(group=self.group)
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self._callers[key] += 1
+            SINGLEFLIGHT_CALLS.inc(group=self.group, outcome="shared")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            SINGLEFLIGHT_FANOUT.observe(self._callers.pop(key), group=self.group)
+            SINGLEFLIGHT_IN_FLIGHT.dec(group=self.group)
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller went away
+            task.exception()
@@ -0,0 +1,278 @@
+"""Slow MongoDB query log with explain summaries.
+
+``SlowQueryLog`` is a PyMongo command listener. A command that takes at least
+``SLOW_QUERY_MS`` is recorded with the route that issued it, its shape (field
+names and operators; every value replaced by ``"?"``) and its duration. The
+log writes entries in batches to the capped ``slow_queries`` collection from the
+event loop, never from the driver's thread.
+
+With ``SLOW_QUERY_EXPLAIN=on`` (off by default: an ``executionStats`` explain
+reruns the query, adding load just when the database is slow) the first time a
+shape shows up, and again every ``EXPLAIN_INTERVAL``, the log also explains the
+original command and keeps only a summary -- plan stages, indexes used, keys
+and documents examined, documents returned -- so values never reach the log.
+
+Read the log with ``GET /api/admin/slow-queries``.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Optional
+
+from pymongo import monitoring
+
+from cache import TTLCache
+from metrics import NO_ROUTE, REGISTRY, current_request
+
+logger = logging.getLogger("slowlog")
+
+SLOW_QUERIES_COLLECTION = "slow_queries"
+SLOW_LOG_BYTES = 16 * 1024 * 1024
+DEFAULT_THRESHOLD_MS = 100
+EXPLAIN_INTERVAL = 600  # seconds before a known shape is explained again
+MAX_EXPLAINS_PER_FLUSH = 5
+MAX_SHAPE_ITEMS = 20
+
+# Added by the driver, not part of the query
+DRIVER_FIELDS = frozenset({"lsid", "txnNumber", "autocommit", "startTransaction", "apiVersion", "apiStrict",
+                           "apiDeprecationErrors"})
+# Driver housekeeping, and our own explains
+IGNORED_COMMANDS = frozenset({"explain", "hello", "isMaster", "ismaster", "endSessions", "killCursors", "ping",
+                              "saslStart", "saslContinue", "buildInfo"})
+EXPLAINABLE_COMMANDS = frozenset({"find", "aggregate", "count", "distinct", "update", "delete", "findAndModify"})
+# Specifications rather than data: kept as they are
+SPEC_FIELDS = frozenset({"sort", "projection", "hint", "$sort", "$project", "key"})
+
+SLOW_QUERIES = REGISTRY.counter(
+    "mongodb_slow_queries_total", "MongoDB commands slower than SLOW_QUERY_MS by route", ("route", "command")
+)
+
+
+def redact(value, expression: bool = False):
+    """The shape of ``value``: keys and operators survive, values become ``"?"``.
+
+    ``$field`` paths are kept only in ``expression`` positions (aggregation
+    stages other than ``$match``, and ``$expr``); in a query filter or an update
+    a string starting with ``$`` is just a value, possibly a user's.
+    """
+    if isinstance(value, dict):
+        shape = {}
+        for key, item in value.items():
+            if key in SPEC_FIELDS:
+                shape[key] = item
+            elif key == "pipeline" and isinstance(item, list):
+                shape[key] = redact_pipeline(item)
+            else:
+                shape[key] = redact(item, expression or key == "$expr")
+        return shape
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [redact(item, expression) for item in value[:MAX_SHAPE_ITEMS]]
+        return "?"
+    if expression and isinstance(value, str) and value.startswith("$"):
+        return value
+    return "?"
+
+
+def redact_pipeline(stages: list) -> list:
+    """``redact`` for aggregation stages: ``$match`` is a query, other stages are expressions."""
+    shape = []
+    for stage in stages[:MAX_SHAPE_ITEMS]:
+        if not isinstance(stage, dict):
+            shape.append("?")
+            continue
+        redacted = {}
+        for op, spec in stage.items():
+            if op == "$facet" and isinstance(spec, dict):
+                redacted[op] = {name: redact_pipeline(sub) if isinstance(sub, list) else "?"
+                                for name, sub in spec.items()}
+            elif op in SPEC_FIELDS:
+                redacted[op] = spec
+            else:
+                redacted[op] = redact(spec, expression=op != "$match")
+        shape.append(redacted)
+    return shape
+
+
+def command_body(command: dict) -> dict:
+    return {key: value for key, value in command.items() if key not in DRIVER_FIELDS and not key.startswith("$")}
+
+
+def command_shape(name: str, command: dict) -> dict:
+    shape = redact(command_body(command))
+    shape[name] = command.get(name) if isinstance(command.get(name), str) else "?"
+    if "documents" in command:
+        shape["documents"] = len(command["documents"])
+    return shape
+
+
+def fingerprint(shape: dict) -> str:
+    return hashlib.sha1(json.dumps(shape, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _find(doc, key: str):
+    """First value stored under ``key`` anywhere in an explain document."""
+    if isinstance(doc, dict):
+        if key in doc:
+            return doc[key]
+        children = doc.values()
+    elif isinstance(doc, list):
+        children = doc
+    else:
+        return None
+    for child in children:
+        found = _find(child, key)
+        if found is not None:
+            return found
+    return None
+
+
+def _plan_stages(plan, stages: list, indexes: list):
+    if not isinstance(plan, dict):
+        return
+    if "stage" in plan:
+        stages.append(plan["stage"])
+        if plan.get("indexName"):
+            indexes.append(plan["indexName"])
+    for key in ("queryPlan", "inputStage"):
+        _plan_stages(plan.get(key), stages, indexes)
+    for child in plan.get("inputStages", ()):
+        _plan_stages(child, stages, indexes)
+
+
+def summarize_explain(explain: dict) -> dict:
+    """Plan and work done, from an ``executionStats`` explain of find, aggregate, update, ..."""
+    stages, indexes = [], []
+    _plan_stages(_find(explain, "winningPlan"), stages, indexes)
+    stats = _find(explain, "executionStats") or {}
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "keys_examined": stats.get("totalKeysExamined"),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "returned": stats.get("nReturned"),
+        "execution_ms": stats.get("executionTimeMillis"),
+    }
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    """Records commands over ``threshold_ms`` and writes them every ``interval`` seconds."""
+
+    def __init__(self, get_repositories: Callable, threshold_ms: float = DEFAULT_THRESHOLD_MS,
+                 interval: float = 5.0, explain: bool = False, max_pending: int = 1000):
+        self.get_repositories = get_repositories
+        self.threshold_ms = threshold_ms
+        self.interval = interval
+        self.explain = explain
+        # Filled from the driver's threads, drained on the event loop
+        self._pending = deque(maxlen=max_pending)
+        self._in_flight = {}
+        self._explained = TTLCache(maxsize=10_000, ttl=EXPLAIN_INTERVAL)
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_env(cls, get_repositories: Callable) -> Optional["SlowQueryLog"]:
+        """``SLOW_QUERY_MS`` (default 100, ``off`` disables) and ``SLOW_QUERY_EXPLAIN`` (default off)."""
+        threshold = os.environ.get("SLOW_QUERY_MS", str(DEFAULT_THRESHOLD_MS)).strip().lower()
+        if threshold in ("off", "none", ""):
+            return None
+        explain = os.environ.get("SLOW_QUERY_EXPLAIN", "off").lower() in ("1", "on", "true")
+        return cls(get_repositories, float(threshold), explain=explain)
+
+    # Command monitoring (driver threads)
+    def started(self, event):
+        if event.command_name not in IGNORED_COMMANDS:
+            self._in_flight[(event.connection_id, event.request_id)] = (event.command, time.time())
+
+    def succeeded(self, event):
+        self._finish(event, None)
+
+    def failed(self, event):
+        self._finish(event, event.failure)
+
+    def _finish(self, event, failure):
+        started = self._in_flight.pop((event.connection_id, event.request_id), None)
+        duration_ms = event.duration_micros / 1000
+        if started is None or duration_ms < self.threshold_ms:
+            return
+        command, started_at = started
+        name = event.command_name
+        collection = command.get("collection") if name == "getMore" else command.get(name)
+        if collection == SLOW_QUERIES_COLLECTION:
+            return
+        stats = current_request.get()
+        route = stats.route() if stats is not None else NO_ROUTE
+        shape = command_shape(name, command)
+        entry = {
+            "ts": datetime.utcfromtimestamp(started_at), "route": route, "command": name,
+            "collection": collection if isinstance(collection, str) else None,
+            "duration_ms": round(duration_ms, 1), "ok": failure is None, "shape": shape,
+            "fingerprint": fingerprint(shape),
+        }
+        if failure is not None:
+            entry["error"] = {"code": failure.get("code"), "name": failure.get("codeName")}
+        SLOW_QUERIES.inc(route=route, command=name)
+        self._pending.append((entry, command))
+
+    # Writer (event loop)
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        try:
+            await self.get_repositories().slow_queries.ensure_collection(SLOW_LOG_BYTES)
+        except Exception as exc:
+            logger.warning("Could not create the capped %s collection: %s", SLOW_QUERIES_COLLECTION, exc)
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def flush(self) -> int:
+        batch = []
+        while self._pending:
+            batch.append(self._pending.popleft())
+        if not batch:
+            return 0
+        repos = self.get_repositories()
+        explains = 0
+        for entry, command in batch:
+            if not self.explain or entry["command"] not in EXPLAINABLE_COMMANDS:
+                continue
+            summary = self._explained.get(entry["fingerprint"])
+            if summary is None and explains < MAX_EXPLAINS_PER_FLUSH:
+                explains += 1
+                summary = await self._explain(repos, command)
+                self._explained.set(entry["fingerprint"], summary)
+            entry["explain"] = summary or None
+        try:
+            await repos.slow_queries.add([entry for entry, _ in batch])
+        except Exception:
+            logger.exception("Could not write %d slow query entries", len(batch))
+            return 0
+        return len(batch)
+
+    async def _explain(self, repos, command: dict) -> dict:
+        # Reruns the query with its real values; only the summary is kept
+        try:
+            explain = await repos.db.command({"explain": command_body(command), "verbosity": "executionStats"})
+        except Exception as exc:
+            logger.debug("explain failed: %s", exc)
+            return {}
+        return summarize_explain(explain)
@@ -0,0 +1,128 @@
+"""In-memory typeahead over job titles, companies and locations.
+
+Terms live in one sorted list and prefix lookups use ``bisect``, so answering
+a keystroke costs no database round-trip. Each value is indexed under every
+word ("senior data engineer" matches "dat" and "eng") and ranked by how many
+active jobs use it. The index is per process: it is built from one
+aggregation, updated in place when this process posts a job, and rebuilt
+after ``max_age`` seconds to pick up jobs posted by other workers. Rebuilds
+of a stale index run in the background (``claim_refresh`` then ``refresh``)
+while lookups keep using the old one, so no keystroke waits on the
+aggregation once the index exists.
+"""
+import bisect
+import heapq
+import logging
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from search import normalize
+
+logger = logging.getLogger("suggest")
+
+KINDS = ("title", "company", "location")
+
+# Upper bound on index entries scanned per lookup; keeps one-letter prefixes cheap
+MAX_SCAN = 5000
+# Server-side budget for the counts aggregation; it runs off the request path, so it may take longer than a listing
+SUGGESTION_MAX_TIME_MS = 10_000
+# After a failed rebuild the old index is served this long before the next attempt
+RETRY_AFTER = 60.0
+
+
+class SuggestionIndex:
+    def __init__(self, max_age: float = 300.0):
+        self.max_age = max_age
+        self.built_at: Optional[float] = None
+        self._terms: List[Tuple[str, str, str]] = []  # sorted (term, kind, value)
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._built = threading.Event()
+
+    @property
+    def stale(self) -> bool:
+        return self.built_at is None or time.monotonic() - self.built_at > self.max_age
+
+    def __len__(self):
+        return len(self._counts)
+
+    @staticmethod
+    def _terms_for(kind: str, value: str) -> Iterable[Tuple[str, str, str]]:
+        words = normalize(value).split()
+        for i in range(len(words)):
+            yield " ".join(words[i:]), kind, value
+
+    def build(self, counts: Dict[str, Iterable[Tuple[str, int]]]):
+        """Replace the index with ``{kind: [(value, count), ...]}``."""
+        terms, totals = [], {}
+        for kind, rows in counts.items():
+            for value, count in rows:
+                if value:
+                    totals[(kind, value)] = count
+                    terms.extend(self._terms_for(kind, value))
+        terms.sort()
+        with self._lock:
+            self._terms, self._counts = terms, totals
+            self.built_at = time.monotonic()
+        self._built.set()
+
+    def wait_built(self, timeout: float) -> bool:
+        """Block until a first build finished (threaded callers that lost ``claim_refresh`` at startup)."""
+        return self._built.wait(timeout)
+
+    def claim_refresh(self) -> bool:
+        """True for the single caller that should rebuild a stale index; ``refresh`` releases the claim."""
+        with self._lock:
+            if self._refreshing or not self.stale:
+                return False
+            self._refreshing = True
+            return True
+
+    async def refresh(self, load: Callable[[], Awaitable[Dict[str, Iterable[Tuple[str, int]]]]]):
+        """Rebuild from ``await load()`` after ``claim_refresh``; on failure keep the old index a while longer."""
+        try:
+            self.build(await load())
+        except Exception:
+            logger.exception("Rebuilding the typeahead index failed")
+            with self._lock:
+                if self.built_at is not None:
+                    self.built_at = time.monotonic() - self.max_age + min(RETRY_AFTER, self.max_age)
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def add(self, kind: str, value: Optional[str], count: int = 1):
+        if not value:
+            return
+        with self._lock:
+            key = (kind, value)
+            if key not in self._counts:
+                for term in self._terms_for(kind, value):
+                    bisect.insort(self._terms, term)
+                self._counts[key] = 0
+            self._counts[key] += count
+
+    def add_job(self, job: dict):
+        for kind in KINDS:
+            self.add(kind, job.get(kind))
+
+    def suggest(self, prefix: str, limit: int = 10, kinds: Iterable[str] = KINDS) -> List[dict]:
+        """Most frequent values with a word starting with ``prefix``."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        kinds = set(kinds)
+        with self._lock:
+            terms, counts = self._terms, self._counts
+            start = bisect.bisect_left(terms, (prefix,))
+            matches = set()
+            for i in range(start, min(start + MAX_SCAN, len(terms))):
+                term, kind, value = terms[i]
+                if not term.startswith(prefix):
+                    break
+                if kind in kinds:
+                    matches.add((kind, value))
+            best = heapq.nsmallest(limit, matches, key=lambda match: (-counts[match], len(match[1]), match[1]))
+            return [{"value": value, "kind": kind, "count": counts[(kind, value)]} for kind, value in best]
@@ -0,0 +1,29 @@
+"""Application status workflow.
+
+Employers move applications forward through the hiring pipeline; ``rejected``
+is reachable from any open state and, like ``hired``, is final.
+"""
+from typing import Dict, FrozenSet
+
+APPLIED = "applied"
+
+TRANSITIONS: Dict[str, FrozenSet[str]] = {
+    "applied": frozenset({"screening", "interviewing", "rejected"}),
+    "screening": frozenset({"interviewing", "rejected"}),
+    "interviewing": frozenset({"offered", "rejected"}),
+    "offered": frozenset({"hired", "rejected"}),
+    "hired": frozenset(),
+    "rejected": frozenset(),
+}
+
+STATUSES = tuple(TRANSITIONS)
+
+# Most status changes in one bulk request
+MAX_BULK_STATUS_UPDATES = 1000
+
+# Most jobs applied to in one bulk request
+MAX_BULK_APPLICATIONS = 100
+
+
+def can_transition(current: str, new: str) -> bool:
+    return new in TRANSITIONS.get(current, ())
@@ -0,0 +1,175 @@
+"""Write-behind buffering: acknowledge writes at once, store them in micro-batches.
+
+``WriteBehindQueue.put`` returns as soon as an item is queued; a background
+task hands the queue to ``flush`` in batches of at most ``max_batch`` items,
+waiting at most ``max_delay`` seconds for a batch to fill. Under a burst that
+turns thousands of single-document inserts into a few ``insert_many`` calls.
+
+Durability: an acknowledged item lives only in this process until its batch
+is flushed -- up to ``max_delay`` plus the flush time. ``stop`` (called from
+the app's shutdown hook) flushes everything still queued, so a graceful
+restart loses nothing; a crash or SIGKILL loses the unflushed tail. A failing
+flush is retried with backoff while new writes keep queueing, so ``flush``
+must be safe to repeat for a batch it partly stored. ``flush`` may return
+``{item id: error}`` for items it rejected: those are logged and counted as
+dropped (their callers were already acknowledged); once the queue
+holds ``max_pending`` items ``put`` waits up to ``put_timeout`` for room and
+then raises ``WriteBehindFull`` (the API answers 503) -- backpressure instead
+of unbounded memory.
+
+Queued items are not in the database yet, so reads miss them until the flush;
+``is_pending`` lets callers check keys (e.g. "already applied") that would
+otherwise race.
+"""
+import asyncio
+import logging
+from collections import Counter
+from typing import Any, Awaitable, Callable, Hashable, List, Optional, TypeVar
+
+from metrics import DEFAULT_COUNT_BUCKETS, REGISTRY
+
+logger = logging.getLogger("writebehind")
+
+QUEUE_DEPTH = REGISTRY.gauge("write_behind_queue_depth", "Items acknowledged but not yet flushed", ("queue",))
+FLUSHED = REGISTRY.counter("write_behind_flushed_total", "Items flushed to the database", ("queue",))
+FLUSH_FAILURES = REGISTRY.counter("write_behind_flush_failures_total", "Failed flush attempts", ("queue",))
+DROPPED = REGISTRY.counter(
+    "write_behind_dropped_total", "Acknowledged items the flush rejected or gave up on", ("queue",)
+)
+REJECTED = REGISTRY.counter("write_behind_rejected_total", "Writes refused because the queue was full", ("queue",))
+BATCH_SIZE = REGISTRY.histogram(
+    "write_behind_batch_size", "Items per flush", ("queue",), DEFAULT_COUNT_BUCKETS + (500, 1000)
+)
+
+MAX_RETRY_DELAY = 5.0
+SHUTDOWN_RETRIES = 3
+STEP_ATTEMPTS = 3
+
+T = TypeVar("T")
+
+
+def retry_delay(attempt: int) -> float:
+    return min(MAX_RETRY_DELAY, 0.1 * 2 ** attempt)
+
+
+async def retry(fn: Callable[[], Awaitable[T]], what: str, attempts: int = STEP_ATTEMPTS) -> T:
+    """Run one step of a flush, retrying it alone so earlier steps of the batch aren't repeated."""
+    for attempt in range(1, attempts + 1):
+        try:
+            return await fn()
+        except Exception:
+            if attempt == attempts:
+                raise
+            logger.warning("%s failed (attempt %d); retrying", what, attempt, exc_info=True)
+            await asyncio.sleep(retry_delay(attempt))
+
+
+class WriteBehindFull(Exception):
+    """The queue stayed full for ``put_timeout`` seconds."""
+
+
+class WriteBehindQueue:
+    def __init__(self, flush: Callable[[List[Any]], Awaitable[Any]], name: str = "default",
+                 max_batch: int = 500, max_delay: float = 0.02, max_pending: int = 10_000,
+                 put_timeout: float = 1.0):
+        self.flush = flush
+        self.name = name
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._keys = Counter()
+        self._task: Optional[asyncio.Task] = None
+        self._has_items: Optional[asyncio.Event] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._closing = False
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(self.max_pending)
+            self._has_items, self._batch_full = asyncio.Event(), asyncio.Event()
+            self._closing = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Flush everything queued, then stop the background task."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._has_items.set()
+        self._batch_full.set()
+        await self._task
+        self._task = None
+
+    def is_pending(self, key: Hashable) -> bool:
+        return self._keys[key] > 0
+
+    async def put(self, item, key: Optional[Hashable] = None):
+        if self._task is None or self._closing:
+            raise WriteBehindFull("write-behind queue is not running")
+        try:
+            self._queue.put_nowait((key, item))
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put((key, item)), self.put_timeout)
+            except asyncio.TimeoutError:
+                REJECTED.inc(queue=self.name)
+                raise WriteBehindFull(f"{self.max_pending} writes already queued") from None
+        if key is not None:
+            self._keys[key] += 1
+        QUEUE_DEPTH.set(self._queue.qsize(), queue=self.name)
+        self._has_items.set()
+        if self._queue.qsize() >= self.max_batch:
+            self._batch_full.set()
+
+    async def _run(self):
+        while True:
+            await self._has_items.wait()
+            if self._queue.empty():
+                if self._closing:
+                    return
+                self._has_items.clear()
+                continue
+            if self._queue.qsize() < self.max_batch and not self._closing:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_full.clear()
+            batch = [self._queue.get_nowait() for _ in range(min(self.max_batch, self._queue.qsize()))]
+            await self._flush_batch(batch)
+            QUEUE_DEPTH.set(self._queue.qsize(), queue=self.name)
+
+    async def _flush_batch(self, batch):
+        items = [item for _, item in batch]
+        attempt = 0
+        while True:
+            try:
+                errors = await self.flush(items)
+                if errors:
+                    DROPPED.inc(len(errors), queue=self.name)
+                    logger.error("Flush rejected %d of %d acknowledged %s writes: %s", len(errors), len(items),
+                                 self.name, dict(list(errors.items())[:10]))
+                FLUSHED.inc(len(items) - len(errors or ()), queue=self.name)
+                break
+            except Exception:
+                attempt += 1
+                FLUSH_FAILURES.inc(queue=self.name)
+                if self._closing and attempt >= SHUTDOWN_RETRIES:
+                    DROPPED.inc(len(items), queue=self.name)
+                    logger.exception("Dropping %d queued %s writes after %d failed flushes at shutdown",
+                                     len(items), self.name, attempt)
+                    break
+                logger.exception("Flushing %d %s writes failed (attempt %d); retrying", len(items), self.name, attempt)
+                await asyncio.sleep(retry_delay(attempt))
+        for key, _ in batch:
+            if key is not None:
+                self._keys[key] -= 1
+                if not self._keys[key]:
+                    del self._keys[key]
+        BATCH_SIZE.observe(len(items), queue=self.name)
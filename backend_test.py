@@ -4,6 +4,7 @@ Comprehensive Backend API Testing for Smart Job Tracker
 Tests all authentication, job management, AI document generation, and application system endpoints
 """
 
+import os
 import requests
 import json
 import sys
@@ -12,7 +13,7 @@ import random
 from typing import Dict, Any, Optional
 
 # Backend URL from environment
-BACKEND_URL = "https://2f24e3f7-369e-430c-babb-ae3802580ea2.preview.emergentagent.com/api"
+BACKEND_URL = os.environ.get("BACKEND_URL", "https://2f24e3f7-369e-430c-babb-ae3802580ea2.preview.emergentagent.com/api")
 
 class JobTrackerAPITester:
     def __init__(self):
@@ -0,0 +1,134 @@
+"""Applying to many jobs: one ``POST /api/applications`` per job vs. one ``POST /api/applications/bulk``.
+
+    python -m benchmarks.bulk_apply --sessions 40 --jobs-per-session 30
+    python -m benchmarks.bulk_apply --backend flask --mongo mongodb://localhost:27017/
+
+Boots the backend once; half the seekers apply to their jobs one request at a
+time (each request re-authenticates, re-fetches the job and re-checks for a
+duplicate), the other half send the same number of jobs in a single bulk
+request. Sessions run ``--concurrency`` at a time. Reports per-session latency,
+applications stored per second and, against a real ``mongod``, MongoDB
+commands per session from ``/metrics``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.run import ROOT_DIR, percentile, wait_until_ready
+
+TOKEN_KEYS = {"fastapi": "access_token", "flask": "token"}
+BODY = {"resume_content": "Resume", "cover_letter_content": "Cover letter"}
+COMMANDS_RE = re.compile(r'^mongodb_commands_total\{route="POST /api/applications(/bulk)?"[^}]*\} (\S+)$', re.M)
+
+
+async def mongo_commands(client) -> float:
+    response = await client.get("/metrics")
+    return sum(float(value) for _, value in COMMANDS_RE.findall(response.text))
+
+
+async def per_job(client, headers, job_ids) -> int:
+    stored = 0
+    for job_id in job_ids:
+        response = await client.post("/api/applications", headers=headers, json={"job_id": job_id, **BODY})
+        stored += response.status_code == 200
+    return stored
+
+
+async def bulk(client, headers, job_ids) -> int:
+    response = await client.post("/api/applications/bulk", headers=headers, json={"job_ids": job_ids, **BODY})
+    response.raise_for_status()
+    return len(response.json()["applied"])
+
+
+async def run_mode(client, apply, sessions, concurrency) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, stored = [], 0
+
+    async def session(headers, job_ids):
+        nonlocal stored
+        async with semaphore:
+            start = time.perf_counter()
+            count = await apply(client, headers, job_ids)
+            latencies.append((time.perf_counter() - start) * 1000)
+            stored += count
+
+    commands = await mongo_commands(client)
+    start = time.perf_counter()
+    await asyncio.gather(*(session(headers, job_ids) for headers, job_ids in sessions))
+    elapsed = time.perf_counter() - start
+    commands = await mongo_commands(client) - commands
+    latencies.sort()
+    return {"sessions": len(sessions), "stored": stored, "seconds": round(elapsed, 2),
+            "applications_per_s": round(stored / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50), 1), "p95_ms": round(percentile(latencies, 95), 1),
+            "mongo_commands_per_session": round(commands / len(sessions), 1) if commands else None}
+
+
+async def compare(base_url, manifest, args) -> dict:
+    rng = random.Random(args.seed)
+    seekers = manifest["seekers"][:args.sessions * 2]
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        sessions = []
+        for email in seekers:
+            response = await client.post("/api/auth/login", json={"email": email, "password": manifest["password"]})
+            response.raise_for_status()
+            headers = {"Authorization": f"Bearer {response.json()[TOKEN_KEYS[args.backend]]}"}
+            sessions.append((headers, rng.sample(manifest["job_ids"], args.jobs_per_session)))
+        half = len(sessions) // 2
+        return {
+            "per_job": await run_mode(client, per_job, sessions[:half], args.concurrency),
+            "bulk": await run_mode(client, bulk, sessions[half:], args.concurrency),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["fastapi", "flask"], default="fastapi")
+    parser.add_argument("--mongo", default="memory", help="'memory' or a MongoDB URL")
+    parser.add_argument("--port", type=int, default=8003)
+    parser.add_argument("--sessions", type=int, default=40, help="seeker sessions per mode")
+    parser.add_argument("--jobs-per-session", type=int, default=30)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=1000, help="jobs to seed")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    manifest_path = Path(tempfile.mkstemp(suffix=".json")[1])
+    env = {**os.environ, "PYTHONPATH": str(ROOT_DIR), "LOGIN_RATE_LIMIT_PER_IP": "off",
+           "LOGIN_RATE_LIMIT_PER_EMAIL": "off"}
+    command = [sys.executable, "-m", "benchmarks.serve", "--backend", args.backend, "--mongo", args.mongo,
+               "--port", str(args.port), "--seekers", str(args.sessions * 2), "--jobs", str(args.jobs),
+               "--applications", "0", "--manifest", str(manifest_path)]
+    process = subprocess.Popen(command, cwd=ROOT_DIR, env=env)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_until_ready(base_url, process))
+        results = asyncio.run(compare(base_url, json.loads(manifest_path.read_text()), args))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        manifest_path.unlink(missing_ok=True)
+
+    print(f"{args.sessions} sessions x {args.jobs_per_session} jobs, concurrency {args.concurrency} ({args.backend})")
+    for name, row in results.items():
+        commands = row["mongo_commands_per_session"]
+        print(f"{name:<8} p50 {row['p50_ms']:>9} ms  p95 {row['p95_ms']:>9} ms  "
+              f"{row['applications_per_s']:>8} applications/s  ({row['stored']} stored in {row['seconds']}s)"
+              + (f"  {commands} mongo commands/session" if commands else ""))
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
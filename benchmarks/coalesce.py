@@ -0,0 +1,156 @@
+"""N concurrent identical requests vs. the MongoDB commands they cause, with and without single-flight.
+
+    python -m benchmarks.coalesce --requests 1000 --rtt-ms 5
+
+Runs the FastAPI app in-process (httpx ASGI transport) on an in-memory
+database whose ``jobs`` collection handles (primary and listing) count commands. Each read is held until
+every request of the burst has reached its read, then delayed by ``--rtt-ms``
+of simulated round trip, so the burst really is concurrent (the in-memory
+database is synchronous and would otherwise finish each read before the next
+request arrives). Fires ``--requests`` simultaneous ``GET /api/jobs/{id}``
+and ``GET /api/jobs`` requests, first with ``server.job_reads`` bypassed,
+then with it in place. Exits non-zero unless each coalesced burst cost
+exactly one command.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017/")
+os.environ.setdefault("DB_NAME", "smart_job_tracker_bench")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+import httpx  # noqa: E402
+
+from benchmarks.seed import build_dataset, seed_database  # noqa: E402
+from benchmarks.serve import BENCH_DB_NAME, _memory_database, _sync_database  # noqa: E402
+
+
+class ReadCounter:
+    """Reads sent through any ``CountingCollection``; each waits for ``gate`` plus ``rtt``."""
+
+    def __init__(self, rtt: float):
+        self.rtt = rtt
+        self.commands = 0
+        self.gate = asyncio.Event()
+
+    async def round_trip(self):
+        self.commands += 1
+        await self.gate.wait()
+        await asyncio.sleep(self.rtt)
+
+
+class CountingCollection:
+    """Delegates to a Motor-compatible collection, sending each read through ``counter``."""
+
+    def __init__(self, collection, counter: ReadCounter):
+        self._collection = collection
+        self._counter = counter
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    async def find_one(self, *args, **kwargs):
+        await self._counter.round_trip()
+        return await self._collection.find_one(*args, **kwargs)
+
+    def find(self, *args, **kwargs):
+        cursor = self._collection.find(*args, **kwargs)
+        to_list = cursor.to_list
+
+        async def counted_to_list(length=None):
+            await self._counter.round_trip()
+            return await to_list(length)
+
+        cursor.to_list = counted_to_list
+        return cursor
+
+
+class NoCoalescing:
+    async def do(self, key, fn):
+        return await fn()
+
+
+class ReadGate:
+    """Wraps ``server.job_reads``, opening ``counter.gate`` once ``expected`` requests have reached it."""
+
+    def __init__(self, reads, counter):
+        self.reads = reads
+        self.counter = counter
+        self.expected = 0
+        self.reached = 0
+
+    async def do(self, key, fn):
+        self.reached += 1
+        if self.reached >= self.expected:
+            self.counter.gate.set()
+        return await self.reads.do(key, fn)
+
+
+async def burst(client, gate, counter, path, requests) -> dict:
+    counter.commands = 0
+    counter.gate.clear()
+    gate.expected, gate.reached = requests, 0
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(client.get(path) for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {"requests": requests, "ok": sum(r.status_code == 200 for r in responses),
+            "mongo_commands": counter.commands, "seconds": round(elapsed, 3)}
+
+
+async def run(args) -> dict:
+    import server
+
+    sync_db = _sync_database("memory", BENCH_DB_NAME)
+    dataset = build_dataset(10, 5, args.jobs, 0)
+    seed_database(sync_db, dataset)
+    server.use_database(_memory_database(sync_db))
+    counter = ReadCounter(args.rtt_ms / 1000)
+    jobs = server.repos.jobs
+    # Lookups by id read the primary handle, listings the (possibly secondary) listing handle
+    jobs.listing = CountingCollection(jobs.listing, counter)
+    jobs.collection = CountingCollection(jobs.collection, counter)
+    job_id = next(job["id"] for job in dataset["jobs"] if job["is_active"])
+
+    coalescing = server.job_reads
+    results = {}
+    transport = httpx.ASGITransport(app=server.app)
+    limits = httpx.Limits(max_connections=None)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits) as client:
+        for mode, reads in (("direct", NoCoalescing()), ("single-flight", coalescing)):
+            gate = server.job_reads = ReadGate(reads, counter)
+            results[mode] = {
+                "job_detail": await burst(client, gate, counter, f"/api/jobs/{job_id}", args.requests),
+                "job_list": await burst(client, gate, counter, "/api/jobs?search=engineer", args.requests),
+            }
+    server.job_reads = coalescing
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="concurrent identical requests per burst")
+    parser.add_argument("--rtt-ms", type=float, default=5.0, help="simulated MongoDB round trip")
+    parser.add_argument("--jobs", type=int, default=500, help="jobs to seed")
+    parser.add_argument("--output", help="write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    print(f"{'mode':<14} {'endpoint':<11} {'requests':>8} {'200s':>6} {'mongo cmds':>10} {'seconds':>8}")
+    for mode, endpoints in results.items():
+        for endpoint, row in endpoints.items():
+            print(f"{mode:<14} {endpoint:<11} {row['requests']:>8} {row['ok']:>6} {row['mongo_commands']:>10} "
+                  f"{row['seconds']:>8}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+    coalesced = results["single-flight"].values()
+    if any(row["mongo_commands"] != 1 or row["ok"] != row["requests"] for row in coalesced):
+        sys.exit("single-flight: a burst of identical requests cost more than one MongoDB command")
+
+
+if __name__ == "__main__":
+    main()
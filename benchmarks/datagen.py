@@ -0,0 +1,383 @@
+"""Synthetic data generator for scale testing (1M+ jobs, 10M+ applications).
+
+    python -m benchmarks.datagen --mongo mongodb://localhost:27017/ --db-name smart_job_tracker_scale \\
+        --seekers 500000 --employers 20000 --jobs 1000000 --applications 10000000 --workers 8 --drop
+
+Documents match what ``backend/server.py`` writes. Generation is deterministic:
+work is split into fixed-size chunks, each drawn from its own RNG seeded by
+``(seed, kind, chunk)``, so the same seed yields the same documents regardless
+of ``--workers`` or batch size. Ids are derived from the entity index, which
+lets applications reference jobs and users without keeping them in memory.
+
+Popularity is heavy-tailed: a few employers post most jobs, a few jobs attract
+most applications and a few seekers apply to many jobs.
+"""
+import argparse
+import functools
+import itertools
+import math
+import multiprocessing
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import bcrypt
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from gazetteer import geo_point  # noqa: E402
+from lifecycle import JOB_TTL  # noqa: E402
+from salary import parse_salary  # noqa: E402
+from search import search_terms  # noqa: E402
+
+PASSWORD = "BenchPass123!"
+
+# Fixed so output does not depend on how the work is scheduled
+CHUNK_SIZE = 10_000
+
+EPOCH = datetime(2023, 1, 1)
+POSTING_SPAN = timedelta(days=730)
+EVERGREEN = timedelta(days=365 * 100)
+
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "Wei", "Priya", "Carlos", "Fatima", "Olga", "Kenji", "Amara", "Luca", "Sofia", "Ahmed", "Chloe",
+               "Mateo", "Aisha", "Noah", "Yuki", "Ivan", "Zara", "Omar", "Emma", "Raj"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Chen", "Patel", "Kim", "Nguyen", "Müller", "Rossi", "Silva", "Okafor", "Tanaka", "Kowalski",
+              "Hussain", "Ivanova", "Dubois", "Andersen", "Cohen", "Singh", "Lopez", "Walker", "Hall", "Young"]
+SKILLS = ["Python", "JavaScript", "TypeScript", "React", "Vue", "Angular", "Node.js", "FastAPI", "Django", "Flask",
+          "MongoDB", "PostgreSQL", "MySQL", "Redis", "AWS", "GCP", "Azure", "Docker", "Kubernetes", "Terraform",
+          "Go", "Rust", "Java", "Kotlin", "Swift", "C#", ".NET", "SQL", "Pandas", "Machine Learning", "Figma",
+          "Excel", "Salesforce", "SEO", "Copywriting", "Project Management", "Scrum", "Customer Service",
+          "Accounting", "Sales"]
+DEGREES = ["High School Diploma", "Associate's in Business", "Bachelor's in Computer Science",
+           "Bachelor's in Marketing", "Bachelor's in Economics", "Master's in Data Science", "MBA",
+           "Master's in Software Engineering", "PhD in Physics", "Coding Bootcamp Certificate"]
+SENIORITY = ["Junior", "", "", "Senior", "Senior", "Lead", "Staff", "Principal", "Intern"]
+ROLES = ["Software Engineer", "Backend Engineer", "Frontend Developer", "Full Stack Developer", "Data Analyst",
+         "Data Scientist", "DevOps Engineer", "Product Manager", "UX Designer", "QA Engineer", "Mobile Developer",
+         "Site Reliability Engineer", "Marketing Manager", "Sales Representative", "Account Executive",
+         "Customer Success Manager", "Technical Writer", "Business Analyst", "HR Generalist", "Accountant"]
+COMPANY_WORDS = ["Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Hooli", "Vandelay", "Soylent", "Tyrell",
+                 "Cyberdyne", "Aperture", "Wonka", "Gringotts", "Oscorp", "Nakatomi", "Massive", "Pied Piper",
+                 "Monarch", "Blue Sun"]
+COMPANY_SUFFIXES = ["Labs", "Technologies", "Systems", "Solutions", "Group", "Inc", "Analytics", "Software",
+                    "Health", "Logistics", "Financial", "Media"]
+# (location, weight) -- big metros dominate, long tail of smaller cities
+LOCATIONS = [
+    ("Remote", 18), ("San Francisco, CA", 10), ("New York, NY", 12), ("Seattle, WA", 7), ("Austin, TX", 6),
+    ("Boston, MA", 5), ("Chicago, IL", 5), ("Los Angeles, CA", 6), ("Denver, CO", 3), ("Atlanta, GA", 3),
+    ("Miami, FL", 2), ("Portland, OR", 2), ("Washington, DC", 3), ("Dallas, TX", 3), ("Houston, TX", 2),
+    ("Phoenix, AZ", 2), ("San Diego, CA", 2), ("Minneapolis, MN", 1), ("Raleigh, NC", 1), ("Pittsburgh, PA", 1),
+    ("Toronto, ON", 2), ("London, UK", 3), ("Berlin, Germany", 2), ("Bangalore, India", 2), ("Remote - US", 3),
+]
+JOB_TYPES = [("full_time", 70), ("contract", 15), ("part_time", 10), ("internship", 5)]
+
+
+def _weighted(pairs):
+    values, weights = zip(*pairs)
+    return list(values), list(itertools.accumulate(weights))
+
+
+LOCATION_VALUES, LOCATION_CUM = _weighted(LOCATIONS)
+JOB_TYPE_VALUES, JOB_TYPE_CUM = _weighted(JOB_TYPES)
+
+
+class DatasetSpec:
+    def __init__(self, seekers: int, employers: int, jobs: int, applications: int, seed: int = 42,
+                 password_hash: str = None, parse_salaries: bool = True):
+        self.seekers = seekers
+        self.employers = max(1, employers)
+        self.jobs = jobs
+        self.applications = applications
+        self.seed = seed
+        self.parse_salaries = parse_salaries
+        # One bcrypt hash shared by every account keeps generation fast
+        self.password_hash = password_hash or bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        self._namespace = uuid.uuid5(uuid.NAMESPACE_OID, f"smart-job-tracker:{seed}")
+
+    def entity_id(self, kind: str, index: int) -> str:
+        return str(uuid.uuid5(self._namespace, f"{kind}:{index}"))
+
+    def rng(self, kind: str, chunk: int) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{chunk}")
+
+    def job_created_at(self, index: int) -> datetime:
+        return EPOCH + POSTING_SPAN * (index / max(1, self.jobs))
+
+
+def _skewed_index(rng: random.Random, n: int, alpha: float) -> int:
+    """Heavy-tailed pick in [0, n): small indices are far more likely for alpha > 1."""
+    return min(n - 1, int(n * rng.random() ** alpha))
+
+
+@functools.lru_cache(maxsize=None)
+def _scatter_step(n: int) -> int:
+    step = 2_654_435_761 % n or 1
+    while math.gcd(step, n) != 1:
+        step += 1
+    return step
+
+
+def _scatter(index: int, n: int) -> int:
+    """Bijective shuffle of [0, n) so popular items are spread across the id space."""
+    return (index * _scatter_step(n) + 7) % n
+
+
+def company_name(index: int) -> str:
+    word = COMPANY_WORDS[index % len(COMPANY_WORDS)]
+    suffix = COMPANY_SUFFIXES[(index // len(COMPANY_WORDS)) % len(COMPANY_SUFFIXES)]
+    generation = index // (len(COMPANY_WORDS) * len(COMPANY_SUFFIXES))
+    return f"{word} {suffix}" + (f" {generation + 1}" if generation else "")
+
+
+def salary_string(rng: random.Random, job_type: str):
+    """Free-form salary text in the many shapes employers actually type."""
+    roll = rng.random()
+    if roll < 0.12:
+        return None
+    if roll < 0.17:
+        return rng.choice(["Competitive", "DOE", "Negotiable", "Competitive salary + equity"])
+    if job_type in ("part_time", "internship") or roll < 0.27:
+        rate = rng.randrange(15, 120)
+        return rng.choice([f"${rate}/hr", f"${rate} per hour", f"${rate}-${rate + rng.randrange(5, 30)}/hour"])
+    low = rng.randrange(35, 250) * 1000
+    high = low + rng.randrange(5, 60) * 1000
+    fmt = rng.random()
+    if fmt < 0.45:
+        return f"${low:,} - ${high:,}"
+    if fmt < 0.65:
+        return f"${low // 1000}k-${high // 1000}k"
+    if fmt < 0.75:
+        return f"${high // 1000}K"
+    if fmt < 0.82:
+        return f"{low}"
+    if fmt < 0.90:
+        return f"£{low:,} - £{high:,} per annum"
+    return f"€{low // 1000}k - €{high // 1000}k"
+
+
+def generate_seekers(spec: DatasetSpec, chunk: int) -> list:
+    rng = spec.rng("seeker", chunk)
+    docs = []
+    for i in range(chunk * CHUNK_SIZE, min(spec.seekers, (chunk + 1) * CHUNK_SIZE)):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        years = min(40, int(rng.expovariate(1 / 6)))
+        skills = rng.sample(SKILLS, rng.randint(2, 8))
+        docs.append({
+            "id": spec.entity_id("seeker", i),
+            "email": f"{first.lower()}.{last.lower()}.{i}@example.com",
+            "password_hash": spec.password_hash,
+            "role": "job_seeker",
+            "full_name": f"{first} {last}",
+            "created_at": EPOCH + timedelta(seconds=rng.randrange(int(POSTING_SPAN.total_seconds()))),
+            "skills": skills,
+            "experience": f"{years} years of experience with {', '.join(skills[:2])}" if years else "Entry level",
+            "education": rng.choice(DEGREES),
+            "phone": f"+1-{rng.randrange(200, 999)}-555-{rng.randrange(10000):04d}" if rng.random() < 0.8 else None,
+            "company_name": None,
+            "company_description": None,
+        })
+    return docs
+
+
+def generate_employers(spec: DatasetSpec, chunk: int) -> list:
+    rng = spec.rng("employer", chunk)
+    docs = []
+    for i in range(chunk * CHUNK_SIZE, min(spec.employers, (chunk + 1) * CHUNK_SIZE)):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        company = company_name(i)
+        docs.append({
+            "id": spec.entity_id("employer", i),
+            "email": f"hr.{i}@{company.lower().replace(' ', '')}.example.com",
+            "password_hash": spec.password_hash,
+            "role": "employer",
+            "full_name": f"{first} {last}",
+            "created_at": EPOCH + timedelta(seconds=rng.randrange(int(POSTING_SPAN.total_seconds()))),
+            "skills": None,
+            "experience": None,
+            "education": None,
+            "phone": None,
+            "company_name": company,
+            "company_description": f"{company} builds {rng.choice(['software', 'hardware', 'services', 'platforms'])} "
+                                   f"for {rng.choice(['enterprises', 'consumers', 'healthcare', 'retail', 'finance'])}.",
+        })
+    return docs
+
+
+def generate_jobs(spec: DatasetSpec, chunk: int) -> list:
+    rng = spec.rng("job", chunk)
+    docs = []
+    for i in range(chunk * CHUNK_SIZE, min(spec.jobs, (chunk + 1) * CHUNK_SIZE)):
+        employer = _scatter(_skewed_index(rng, spec.employers, 2.5), spec.employers)
+        seniority, role = rng.choice(SENIORITY), rng.choice(ROLES)
+        title = f"{seniority} {role}".strip()
+        job_type = rng.choices(JOB_TYPE_VALUES, cum_weights=JOB_TYPE_CUM)[0]
+        if seniority == "Intern":
+            job_type = "internship"
+        required = rng.sample(SKILLS, rng.randint(3, 6))
+        salary = salary_string(rng, job_type)
+        doc = {
+            "id": spec.entity_id("job", i),
+            "title": title,
+            "company": company_name(employer),
+            "description": (f"We are hiring a {title} to join our {rng.choice(['growing', 'remote-first', 'award-winning', 'fast-paced'])} "
+                            f"team. You will work with {', '.join(required[:3])} and collaborate across "
+                            f"{rng.choice(['engineering', 'product', 'sales', 'operations'])}."),
+            "requirements": f"{rng.randint(0, 10)}+ years experience; {', '.join(required)}",
+            "salary": salary,
+            "location": rng.choices(LOCATION_VALUES, cum_weights=LOCATION_CUM)[0],
+            "job_type": job_type,
+            "employer_id": spec.entity_id("employer", employer),
+            "created_at": spec.job_created_at(i),
+            "is_active": rng.random() < 0.9,
+        }
+        # Active jobs stay listed however old the generated dates are; inactive ones expired on schedule
+        doc["expires_at"] = doc["created_at"] + (EVERGREEN if doc["is_active"] else JOB_TTL)
+        if spec.parse_salaries:
+            doc.update(parse_salary(salary))
+            doc["location_point"] = geo_point(doc["location"])
+            doc["search_terms"] = search_terms(doc)
+        docs.append(doc)
+    return docs
+
+
+def application_counts(spec: DatasetSpec) -> list:
+    """Applications per seeker: Pareto-distributed, summing exactly to ``spec.applications``."""
+    if not spec.seekers or not spec.jobs:
+        return [0] * spec.seekers
+    rng = spec.rng("activity", 0)
+    cap = max(1, spec.jobs // 2)
+    weights = [rng.paretovariate(1.3) for _ in range(spec.seekers)]
+    scale = spec.applications / sum(weights)
+    counts = [min(cap, int(weight * scale)) for weight in weights]
+    remainder = spec.applications - sum(counts)
+    index = 0
+    while remainder > 0 and index < spec.seekers * 4:
+        seeker = index % spec.seekers
+        if counts[seeker] < cap:
+            counts[seeker] += 1
+            remainder -= 1
+        index += 1
+    return counts
+
+
+def generate_applications(spec: DatasetSpec, chunk: int, counts: list) -> list:
+    """Applications of the seekers in one chunk; each seeker applies to distinct jobs."""
+    rng = spec.rng("application", chunk)
+    docs = []
+    for seeker in range(chunk * CHUNK_SIZE, min(spec.seekers, (chunk + 1) * CHUNK_SIZE)):
+        seeker_id = spec.entity_id("seeker", seeker)
+        chosen = set()
+        attempts = 0
+        while len(chosen) < counts[seeker]:
+            attempts += 1
+            # Very active seekers exhaust the popular head; fall back to uniform picks
+            if attempts > 10 * counts[seeker]:
+                chosen.add(rng.randrange(spec.jobs))
+            else:
+                chosen.add(_scatter(_skewed_index(rng, spec.jobs, 3.0), spec.jobs))
+        for job in sorted(chosen):
+            applied_at = spec.job_created_at(job) + timedelta(seconds=rng.randrange(30 * 86400))
+            docs.append({
+                "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+                "job_id": spec.entity_id("job", job),
+                "job_seeker_id": seeker_id,
+                "resume_content": f"Resume of seeker {seeker}",
+                "cover_letter_content": "Dear Hiring Manager, I am excited to apply for this role.",
+                "applied_at": applied_at,
+                "status": "applied",
+            })
+    return docs
+
+
+def chunks(total: int) -> range:
+    return range(math.ceil(total / CHUNK_SIZE))
+
+
+# -- Bulk loading ------------------------------------------------------------
+
+_worker_db = None
+_worker_counts = None
+
+
+def _init_worker(mongo_url: str, db_name: str, counts):
+    global _worker_db, _worker_counts
+    from pymongo import MongoClient
+    _worker_db = MongoClient(mongo_url, w=1)[db_name]
+    _worker_counts = counts
+
+
+def _load_chunk(task):
+    spec, collection, kind, chunk, batch_size = task
+    if kind == "seekers":
+        docs = generate_seekers(spec, chunk)
+    elif kind == "employers":
+        docs = generate_employers(spec, chunk)
+    elif kind == "jobs":
+        docs = generate_jobs(spec, chunk)
+    else:
+        docs = generate_applications(spec, chunk, _worker_counts)
+    for start in range(0, len(docs), batch_size):
+        _worker_db[collection].insert_many(docs[start:start + batch_size], ordered=False)
+    return collection, len(docs)
+
+
+def load(spec: DatasetSpec, mongo_url: str, db_name: str, workers: int = 4, batch_size: int = 5000,
+         drop: bool = False, log=print) -> dict:
+    """Generate and bulk insert the dataset with ``workers`` processes; returns docs/second per collection."""
+    from pymongo import MongoClient
+    if drop:
+        db = MongoClient(mongo_url)[db_name]
+        for name in ("users", "jobs", "applications", "job_stats"):
+            db.drop_collection(name)
+
+    counts = application_counts(spec)
+    plan = [
+        ("users", "seekers", spec.seekers),
+        ("users", "employers", spec.employers),
+        ("jobs", "jobs", spec.jobs),
+        ("applications", "applications", spec.seekers if spec.applications else 0),
+    ]
+    rates = {}
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers, initializer=_init_worker, initargs=(mongo_url, db_name, counts)) as pool:
+        for collection, kind, total in plan:
+            tasks = [(spec, collection, kind, chunk, batch_size) for chunk in chunks(total)]
+            started = time.perf_counter()
+            inserted = 0
+            for _, n in pool.imap_unordered(_load_chunk, tasks):
+                inserted += n
+            elapsed = time.perf_counter() - started
+            rates[kind] = {"documents": inserted, "seconds": round(elapsed, 2),
+                           "docs_per_second": round(inserted / elapsed) if elapsed else 0}
+            log(f"{kind:<13} {inserted:>12,} docs in {elapsed:8.1f}s ({rates[kind]['docs_per_second']:,}/s)")
+    return rates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default="mongodb://localhost:27017/", help="MongoDB URL")
+    parser.add_argument("--db-name", default="smart_job_tracker_scale")
+    parser.add_argument("--seekers", type=int, default=100_000)
+    parser.add_argument("--employers", type=int, default=5_000)
+    parser.add_argument("--jobs", type=int, default=1_000_000)
+    parser.add_argument("--applications", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--drop", action="store_true", help="drop users/jobs/applications (and job_stats) first")
+    parser.add_argument("--raw-salaries", action="store_true",
+                        help="omit the derived salary_*, location_point and search_terms fields, "
+                             "e.g. to exercise the backfill migrations")
+    args = parser.parse_args(argv)
+
+    spec = DatasetSpec(args.seekers, args.employers, args.jobs, args.applications, seed=args.seed,
+                       parse_salaries=not args.raw_salaries)
+    load(spec, args.mongo, args.db_name, workers=args.workers, batch_size=args.batch_size, drop=args.drop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Radius search vs. regex location matching on a large jobs collection.
+
+    python -m benchmarks.datagen --mongo mongodb://localhost:27017 --jobs 1000000 --drop
+    python -m benchmarks.geo --mongo mongodb://localhost:27017 --radius 50
+
+Needs a real ``mongod``: mongomock does not implement ``$geoWithin``. Each
+center is queried both ways -- the 2dsphere ``$centerSphere`` filter the API
+uses and the case-insensitive ``location`` regex it replaces -- and the
+report gives latency percentiles plus documents examined from ``explain``.
+"""
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from gazetteer import geocode, radius_radians  # noqa: E402
+from repositories import NO_ID, Repositories  # noqa: E402
+
+from benchmarks.run import percentile  # noqa: E402
+from benchmarks.serve import BENCH_DB_NAME  # noqa: E402
+
+CENTERS = ["Austin, TX", "San Francisco, CA", "New York, NY", "Seattle, WA", "Denver, CO", "London, UK"]
+
+
+def geo_query(center: str, radius_miles: float) -> dict:
+    return {"is_active": True, "location_point": {
+        "$geoWithin": {"$centerSphere": [list(geocode(center)), radius_radians(radius_miles)]}}}
+
+
+def regex_query(center: str) -> dict:
+    return {"is_active": True, "location": {"$regex": re.escape(center.split(",")[0]), "$options": "i"}}
+
+
+async def ensure_indexes(mongo: str, db_name: str):
+    client = AsyncIOMotorClient(mongo)
+    try:
+        await Repositories(client[db_name]).ensure_indexes()
+    finally:
+        client.close()
+
+
+def measure(collection, query: dict, repeat: int, limit: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        matched = len(list(collection.find(query, NO_ID).limit(limit)))
+        timings.append((time.perf_counter() - start) * 1000)
+    stats = collection.find(query, NO_ID).limit(limit).explain()["executionStats"]
+    timings.sort()
+    return {
+        "matched": matched,
+        "p50_ms": round(percentile(timings, 50), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "mean_ms": round(statistics.fmean(timings), 2),
+        "keys_examined": stats["totalKeysExamined"],
+        "docs_examined": stats["totalDocsExamined"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default=BENCH_DB_NAME)
+    parser.add_argument("--radius", type=float, default=50, help="miles")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=1000, help="matches the API's list limit")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    asyncio.run(ensure_indexes(args.mongo, args.db_name))
+    db = MongoClient(args.mongo)[args.db_name]
+
+    results = {"jobs": db.jobs.estimated_document_count(), "radius_miles": args.radius, "centers": {}}
+    print(f"{results['jobs']} jobs, radius {args.radius} mi, limit {args.limit}")
+    print(f"{'center':<20} {'mode':<6} {'matched':>8} {'p50 ms':>8} {'p95 ms':>8} {'keys':>9} {'docs':>9}")
+    for center in CENTERS:
+        rows = {
+            "geo": measure(db.jobs, geo_query(center, args.radius), args.repeat, args.limit),
+            "regex": measure(db.jobs, regex_query(center), args.repeat, args.limit),
+        }
+        results["centers"][center] = rows
+        for mode, row in rows.items():
+            print(f"{center:<20} {mode:<6} {row['matched']:>8} {row['p50_ms']:>8} {row['p95_ms']:>8} "
+                  f"{row['keys_examined']:>9} {row['docs_examined']:>9}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Cold-import budget for the backend: fails when importing the app gets slower or heavier.
+
+    python -m benchmarks.importtime                        # import server, median of 5, 800 ms budget
+    python -m benchmarks.importtime --module app --budget-ms 400 --top 20
+
+Imports ``--module`` from ``backend/`` in fresh interpreters under
+``python -X importtime`` with ``MONGO_URL``/``DB_NAME`` unset (importing the
+app must not need a database), and takes the median of ``--runs`` cumulative
+import times. Prints the modules with the largest self time, then exits
+non-zero if the median exceeds ``--budget-ms`` or if any ``--forbid`` module
+(heavy libraries and anything only some features need) was imported at all.
+The forbidden-module check is machine independent; the budget is not, so set
+it from a baseline measured on the machine that runs the check.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# Loaded only by the features that use them (profiling, the database client) or not at all
+DEFAULT_FORBIDDEN = ["pandas", "numpy", "boto3", "botocore", "jq", "typer", "cProfile", "pstats", "motor"]
+
+
+def import_profile(module: str) -> dict:
+    """``{name: (self_us, cumulative_us)}`` for one cold import of ``module``."""
+    env = {key: value for key, value in os.environ.items() if key not in ("MONGO_URL", "DB_NAME")}
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=BACKEND_DIR,
+                            env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="server", help="backend module to import")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=800.0, help="maximum median cumulative import time")
+    parser.add_argument("--forbid", nargs="*", default=DEFAULT_FORBIDDEN,
+                        help="top-level packages that must not be imported")
+    parser.add_argument("--top", type=int, default=15, help="modules to list by self time")
+    parser.add_argument("--output", help="write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    runs = [import_profile(args.module) for _ in range(args.runs)]
+    totals = sorted(run[args.module][1] / 1000 for run in runs)
+    median_ms = statistics.median(totals)
+    profile = runs[[run[args.module][1] / 1000 for run in runs].index(totals[len(totals) // 2])]
+    forbidden = sorted(name for name in profile if name.split(".")[0] in set(args.forbid))
+
+    print(f"import {args.module}: median {median_ms:.1f} ms over {args.runs} runs "
+          f"(min {totals[0]:.1f}, max {totals[-1]:.1f}), budget {args.budget_ms:.0f} ms, {len(profile)} modules")
+    print(f"{'self ms':>8} {'cumul. ms':>9}  module")
+    for name, (self_us, cumulative_us) in sorted(profile.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"{self_us / 1000:>8.1f} {cumulative_us / 1000:>9.1f}  {name}")
+    if args.output:
+        Path(args.output).write_text(json.dumps({
+            "module": args.module, "median_ms": median_ms, "runs_ms": totals, "budget_ms": args.budget_ms,
+            "modules": len(profile), "forbidden_imported": forbidden,
+        }, indent=2))
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"import {args.module} took {median_ms:.1f} ms, over the {args.budget_ms:.0f} ms budget")
+    if forbidden:
+        failures.append(f"import {args.module} loaded modules that should be imported lazily: {', '.join(forbidden)}")
+    if failures:
+        sys.exit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Legitimate login latency during a credential-stuffing burst, with and without throttling.
+
+    python -m benchmarks.login_attack --attackers 32 --duration 20
+
+Boots the FastAPI backend three times: no attack (baseline), attack with the
+rate limiter off, attack with it on. In each run a few "users" log in with
+correct passwords from their own addresses, pausing between logins, while
+``--attackers`` tasks hammer ``/api/auth/login`` with wrong passwords for a
+list of known accounts from a handful of addresses. Client addresses are set
+with ``X-Forwarded-For``, which uvicorn trusts from localhost. ``--warmup``
+lets the attackers drain their initial bursts before users are measured.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import httpx
+
+from benchmarks.run import ROOT_DIR, percentile, wait_until_ready
+
+
+async def legit_user(client, emails, password, index, pause, latencies, statuses, stop):
+    i = index
+    while not stop.is_set():
+        email = emails[i % len(emails)]
+        i += 7
+        start = time.perf_counter()
+        response = await client.post("/api/auth/login", json={"email": email, "password": password},
+                                     headers={"X-Forwarded-For": f"192.168.{index}.{i % 250 + 1}"})
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] += 1
+        await asyncio.sleep(pause)
+
+
+async def attacker(client, index, emails, addresses, statuses, stop):
+    i = 0
+    while not stop.is_set():
+        i += 1
+        try:
+            response = await client.post(
+                "/api/auth/login", json={"email": emails[(index * 31 + i) % len(emails)], "password": "hunter2"},
+                headers={"X-Forwarded-For": addresses[(index + i) % len(addresses)]},
+            )
+            statuses[response.status_code] += 1
+        except httpx.HTTPError:
+            statuses["error"] += 1
+
+
+async def attack(base_url, manifest, attackers, args):
+    legit_latencies, legit_statuses, attack_statuses = [], Counter(), Counter()
+    stop = asyncio.Event()
+    addresses = [f"10.66.0.{n}" for n in range(1, args.attacker_ips + 1)]
+    # Real accounts on both sides so every unthrottled attempt costs a bcrypt check;
+    # the halves don't overlap, so per-email limits never lock the legitimate users out
+    half = len(manifest["seekers"]) // 2
+    users, targets = manifest["seekers"][:half], manifest["seekers"][half:]
+    limits = httpx.Limits(max_connections=attackers + args.users + 4)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        tasks = [asyncio.create_task(attacker(client, n, targets, addresses, attack_statuses, stop))
+                 for n in range(attackers)]
+        await asyncio.sleep(args.warmup if attackers else 1)
+        tasks += [asyncio.create_task(legit_user(client, users, manifest["password"], n, args.pause,
+                                                 legit_latencies, legit_statuses, stop))
+                  for n in range(args.users)]
+        await asyncio.sleep(args.duration)
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    legit_latencies.sort()
+    return {
+        "legit": {"requests": len(legit_latencies), "statuses": dict(legit_statuses),
+                  "p50_ms": round(percentile(legit_latencies, 50), 1),
+                  "p95_ms": round(percentile(legit_latencies, 95), 1),
+                  "p99_ms": round(percentile(legit_latencies, 99), 1)},
+        "attack": {"requests": sum(attack_statuses.values()), "statuses": dict(attack_statuses)},
+    }
+
+
+def run_once(attackers: int, limited: bool, args) -> dict:
+    manifest_path = Path(tempfile.mkstemp(suffix=".json")[1])
+    env = {**os.environ, "PYTHONPATH": str(ROOT_DIR),
+           "LOGIN_RATE_LIMIT_PER_IP": args.per_ip if limited else "off",
+           "LOGIN_RATE_LIMIT_PER_EMAIL": args.per_email if limited else "off"}
+    command = [sys.executable, "-m", "benchmarks.serve", "--backend", "fastapi", "--port", str(args.port),
+               "--seekers", str(args.seekers), "--jobs", "100", "--applications", "0",
+               "--manifest", str(manifest_path)]
+    process = subprocess.Popen(command, cwd=ROOT_DIR, env=env)
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_until_ready(base_url, process))
+        return asyncio.run(attack(base_url, json.loads(manifest_path.read_text()), attackers, args))
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        manifest_path.unlink(missing_ok=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--attackers", type=int, default=32, help="concurrent attacking connections")
+    parser.add_argument("--attacker-ips", type=int, default=4)
+    parser.add_argument("--users", type=int, default=2, help="concurrent legitimate users")
+    parser.add_argument("--pause", type=float, default=0.5, help="seconds between a user's logins")
+    parser.add_argument("--seekers", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=15.0)
+    parser.add_argument("--per-ip", default="10/60")
+    parser.add_argument("--per-email", default="5/300")
+    parser.add_argument("--output", help="write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    results = {}
+    scenarios = (("baseline", 0, False), ("unthrottled", args.attackers, False), ("throttled", args.attackers, True))
+    for name, attackers, limited in scenarios:
+        results[name] = run_once(attackers, limited, args)
+        legit, attack_result = results[name]["legit"], results[name]["attack"]
+        print(f"{name:<12} legit logins: {legit['requests']:>5}  p50 {legit['p50_ms']:>8} ms  "
+              f"p95 {legit['p95_ms']:>8} ms  p99 {legit['p99_ms']:>8} ms  {legit['statuses']}")
+        print(f"{'':<12} attack requests: {attack_result['requests']:>5}  {attack_result['statuses']}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
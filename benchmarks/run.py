@@ -0,0 +1,348 @@
+"""Local load test: boot a backend, drive a mixed workload, report per-endpoint latency.
+
+    python -m benchmarks.run --backend fastapi --concurrency 32 --duration 30 --output results.json
+    python -m benchmarks.run --backend fastapi --compare results.json --max-regression 10
+
+Unlike the ``*_backend_test.py`` scripts this never touches a remote deployment:
+``benchmarks.serve`` is started as a subprocess against a seeded local database
+(in-memory by default, or a local ``mongod`` via ``--mongo``).
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Session:
+    def __init__(self, token: str, user: dict):
+        self.token = token
+        self.user = user
+        self.job_ids = []
+
+    @property
+    def headers(self):
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+class Workload:
+    """Weighted operations for one backend; ``run`` returns (endpoint label, response)."""
+
+    login_token_key = "access_token"
+    # (operation, endpoint label, weight)
+    operations = []
+
+    def __init__(self, manifest: dict, rng: random.Random):
+        self.manifest = manifest
+        self.rng = rng
+        self.seekers = []
+        self.employers = []
+        self.searches = ["engineer", "data", "remote", "developer", "austin"]
+
+    async def login(self, client, email):
+        response = await client.post("/api/auth/login", json={"email": email, "password": self.manifest["password"]})
+        response.raise_for_status()
+        body = response.json()
+        return Session(body[self.login_token_key], body["user"])
+
+    async def setup(self, client, sessions: int):
+        seekers = self.manifest["seekers"][:sessions]
+        employers = self.manifest["employers"][:max(1, sessions // 4)]
+        self.seekers = [await self.login(client, email) for email in seekers]
+        self.employers = [await self.login(client, email) for email in employers]
+
+    def pick(self):
+        names, _, weights = zip(*self.operations)
+        return self.rng.choices(names, weights)[0]
+
+    @property
+    def labels(self):
+        return {name: label for name, label, _ in self.operations}
+
+    def job_id(self):
+        return self.rng.choice(self.manifest["job_ids"])
+
+
+class FastAPIWorkload(Workload):
+    operations = [
+        ("list_jobs", "GET /api/jobs", 30),
+        ("search_jobs", "GET /api/jobs?search", 15),
+        ("get_job", "GET /api/jobs/{id}", 20),
+        ("my_applications", "GET /api/my-applications", 10),
+        ("me", "GET /api/auth/me", 5),
+        ("my_jobs", "GET /api/my-jobs", 5),
+        ("job_applications", "GET /api/job-applications/{id}", 5),
+        ("apply", "POST /api/applications", 5),
+        ("generate_resume", "POST /api/generate-document", 3),
+        ("login", "POST /api/auth/login", 2),
+    ]
+
+    async def setup(self, client, sessions):
+        await super().setup(client, sessions)
+        for employer in self.employers:
+            response = await client.get("/api/my-jobs", headers=employer.headers)
+            employer.job_ids = [job["id"] for job in response.json()]
+
+    async def run(self, client, name):
+        if name == "list_jobs":
+            return "GET /api/jobs", await client.get("/api/jobs")
+        if name == "search_jobs":
+            return "GET /api/jobs?search", await client.get("/api/jobs", params={"search": self.rng.choice(self.searches)})
+        if name == "get_job":
+            return "GET /api/jobs/{id}", await client.get(f"/api/jobs/{self.job_id()}")
+        if name == "my_applications":
+            seeker = self.rng.choice(self.seekers)
+            return "GET /api/my-applications", await client.get("/api/my-applications", headers=seeker.headers)
+        if name == "me":
+            seeker = self.rng.choice(self.seekers)
+            return "GET /api/auth/me", await client.get("/api/auth/me", headers=seeker.headers)
+        if name == "my_jobs":
+            employer = self.rng.choice(self.employers)
+            return "GET /api/my-jobs", await client.get("/api/my-jobs", headers=employer.headers)
+        if name == "job_applications":
+            employer = self.rng.choice(self.employers)
+            job_id = self.rng.choice(employer.job_ids) if employer.job_ids else self.job_id()
+            return "GET /api/job-applications/{id}", await client.get(f"/api/job-applications/{job_id}", headers=employer.headers)
+        if name == "apply":
+            seeker = self.rng.choice(self.seekers)
+            payload = {"job_id": self.job_id(), "resume_content": "resume", "cover_letter_content": "letter"}
+            return "POST /api/applications", await client.post("/api/applications", json=payload, headers=seeker.headers)
+        if name == "generate_resume":
+            seeker = self.rng.choice(self.seekers)
+            payload = {"document_type": "resume"}
+            return "POST /api/generate-document", await client.post("/api/generate-document", json=payload, headers=seeker.headers)
+        if name == "login":
+            payload = {"email": self.rng.choice(self.manifest["seekers"]), "password": self.manifest["password"]}
+            return "POST /api/auth/login", await client.post("/api/auth/login", json=payload)
+        raise ValueError(name)
+
+
+class FlaskWorkload(Workload):
+    login_token_key = "token"
+    operations = [
+        ("list_jobs", "GET /api/jobs", 40),
+        ("get_job", "GET /api/jobs/{id}", 25),
+        ("applications", "GET /api/applications", 15),
+        ("me", "GET /api/auth/me", 5),
+        ("apply", "POST /api/applications", 7),
+        ("generate_resume", "POST /api/ai/generate", 5),
+        ("login", "POST /api/auth/login", 3),
+    ]
+
+    async def run(self, client, name):
+        if name == "list_jobs":
+            return "GET /api/jobs", await client.get("/api/jobs")
+        if name == "get_job":
+            return "GET /api/jobs/{id}", await client.get(f"/api/jobs/{self.job_id()}")
+        if name == "applications":
+            session = self.rng.choice(self.seekers + self.employers)
+            return "GET /api/applications", await client.get("/api/applications", headers=session.headers)
+        if name == "me":
+            seeker = self.rng.choice(self.seekers)
+            return "GET /api/auth/me", await client.get("/api/auth/me", headers=seeker.headers)
+        if name == "apply":
+            seeker = self.rng.choice(self.seekers)
+            payload = {"job_id": self.job_id(), "resume_content": "resume", "cover_letter_content": "letter"}
+            return "POST /api/applications", await client.post("/api/applications", json=payload, headers=seeker.headers)
+        if name == "generate_resume":
+            seeker = self.rng.choice(self.seekers)
+            return "POST /api/ai/generate", await client.post("/api/ai/generate", json={"document_type": "resume"}, headers=seeker.headers)
+        if name == "login":
+            payload = {"email": self.rng.choice(self.manifest["seekers"]), "password": self.manifest["password"]}
+            return "POST /api/auth/login", await client.post("/api/auth/login", json=payload)
+        raise ValueError(name)
+
+
+WORKLOADS = {"fastapi": FastAPIWorkload, "flask": FlaskWorkload}
+
+
+async def wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode}")
+            try:
+                if (await client.get("/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError("server did not become ready")
+
+
+async def drive(base_url: str, workload: Workload, concurrency: int, duration: float, warmup: float, sessions: int):
+    latencies = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    errors = defaultdict(int)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        await workload.setup(client, sessions)
+        measure_from = time.monotonic() + warmup
+        stop_at = measure_from + duration
+
+        async def worker():
+            while True:
+                now = time.monotonic()
+                if now >= stop_at:
+                    return
+                name = workload.pick()
+                start = time.perf_counter()
+                try:
+                    label, response = await workload.run(client, name)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    label, status = workload.labels[name], "error"
+                elapsed = time.perf_counter() - start
+                if now < measure_from:
+                    continue
+                latencies[label].append(elapsed)
+                statuses[label][str(status)] += 1
+                if status == "error" or int(status) >= 500:
+                    errors[label] += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return summarize(latencies, statuses, errors, duration)
+
+
+def _stats(values, duration):
+    values = sorted(values)
+    return {
+        "requests": len(values),
+        "throughput_rps": round(len(values) / duration, 2),
+        "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def summarize(latencies, statuses, errors, duration):
+    endpoints = {}
+    for label in sorted(latencies):
+        endpoints[label] = {
+            **_stats(latencies[label], duration),
+            "errors": errors.get(label, 0),
+            "status_codes": dict(statuses[label]),
+        }
+    everything = [value for values in latencies.values() for value in values]
+    return {"overall": {**_stats(everything, duration), "errors": sum(errors.values())}, "endpoints": endpoints}
+
+
+def print_report(result: dict):
+    header = f"{'endpoint':<36}{'reqs':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    print(header)
+    print("-" * len(header))
+    rows = list(result["endpoints"].items()) + [("TOTAL", result["overall"])]
+    for label, stats in rows:
+        print(f"{label:<36}{stats['requests']:>8}{stats['throughput_rps']:>10}{stats['p50_ms']:>10}"
+              f"{stats['p95_ms']:>10}{stats['p99_ms']:>10}{stats['errors']:>8}")
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> list:
+    """Print p95/throughput deltas against a previous JSON result; return the regressions."""
+    regressions = []
+    print(f"\n{'endpoint':<36}{'p95 base':>10}{'p95 now':>10}{'delta':>9}{'rps base':>10}{'rps now':>10}")
+    pairs = [(label, stats, baseline["endpoints"].get(label)) for label, stats in current["endpoints"].items()]
+    pairs.append(("TOTAL", current["overall"], baseline.get("overall")))
+    for label, now, base in pairs:
+        if not base or not base["p95_ms"]:
+            continue
+        delta = (now["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+        print(f"{label:<36}{base['p95_ms']:>10}{now['p95_ms']:>10}{delta:>8.1f}%"
+              f"{base['throughput_rps']:>10}{now['throughput_rps']:>10}")
+        if delta > max_regression:
+            regressions.append(label)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=sorted(WORKLOADS), default="fastapi")
+    parser.add_argument("--mongo", default="memory", help="'memory' or a local MongoDB URL")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--workers", type=int, default=1, help="FastAPI worker processes")
+    parser.add_argument("--url", help="benchmark an already running server instead of booting one")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--sessions", type=int, default=20, help="logged-in seekers (employers get a quarter)")
+    parser.add_argument("--seekers", type=int, default=200)
+    parser.add_argument("--employers", type=int, default=20)
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--applications", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write JSON results to this path")
+    parser.add_argument("--compare", help="baseline JSON results to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="allowed p95 increase in percent")
+    args = parser.parse_args(argv)
+
+    manifest_path = Path(tempfile.mkstemp(suffix=".json")[1])
+    process = None
+    base_url = args.url
+    try:
+        if not base_url:
+            base_url = f"http://127.0.0.1:{args.port}"
+            command = [
+                sys.executable, "-m", "benchmarks.serve", "--backend", args.backend, "--mongo", args.mongo,
+                "--port", str(args.port), "--seekers", str(args.seekers), "--employers", str(args.employers),
+                "--jobs", str(args.jobs), "--applications", str(args.applications), "--seed", str(args.seed),
+                "--manifest", str(manifest_path), "--workers", str(args.workers),
+            ]
+            process = subprocess.Popen(command, cwd=ROOT_DIR, env={**os.environ, "PYTHONPATH": str(ROOT_DIR)})
+            asyncio.run(wait_until_ready(base_url, process))
+            manifest = json.loads(manifest_path.read_text())
+        else:
+            from benchmarks.seed import build_dataset, manifest as build_manifest
+            manifest = build_manifest(build_dataset(args.seekers, args.employers, args.jobs, args.applications, args.seed))
+
+        workload = WORKLOADS[args.backend](manifest, random.Random(args.seed))
+        result = asyncio.run(drive(base_url, workload, args.concurrency, args.duration, args.warmup, args.sessions))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        manifest_path.unlink(missing_ok=True)
+
+    result["config"] = {
+        "backend": args.backend, "mongo": "memory" if args.mongo == "memory" else "mongod",
+        "concurrency": args.concurrency, "duration": args.duration, "warmup": args.warmup,
+        "sessions": args.sessions, "seed": args.seed, "dataset": manifest["counts"],
+        "workers": args.workers, "cpus": os.cpu_count(), "python": platform.python_version(), "platform": platform.platform(),
+    }
+    print_report(result)
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+    if args.compare:
+        regressions = compare(result, json.loads(Path(args.compare).read_text()), args.max_regression)
+        if regressions:
+            print(f"\np95 regressed more than {args.max_regression}% on: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Search latency for ordinary and pathological inputs, raw ``$regex`` vs. tokenized prefixes.
+
+    python -m benchmarks.search                                   # in-memory (mongomock, Python ``re``)
+    python -m benchmarks.search --mongo mongodb://localhost:27017 --skip-seed
+
+"before" is the query ``get_jobs`` used to build -- the raw input in three
+case-insensitive ``$regex`` clauses; "after" is ``search.search_clause``. A few
+adversarial job titles are seeded so backtracking-prone patterns have something
+to chew on. In memory the regexes run on Python's backtracking engine, which
+shows the blow-up most clearly; against ``mongod`` (PCRE) the "before" column
+is also bounded by the server's own match limits.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from repositories import ACTIVE, JOB_FIELDS  # noqa: E402
+from search import SEARCH_MAX_TIME_MS, search_clause, search_terms  # noqa: E402
+
+from benchmarks.seed import build_dataset, seed_database  # noqa: E402
+from benchmarks.serve import BENCH_DB_NAME, _sync_database  # noqa: E402
+
+INPUTS = [
+    "engineer",
+    "senior data",
+    ".*.*.*.*.*a",
+    "(a+)+$",
+    "(a|aa)+$",
+    "(x+x+)+y",
+    "|".join(["a" * i for i in range(1, 40)]),
+    "a" * 100,
+]
+
+ADVERSARIAL_TITLES = ["a" * 24 + "!", "x" * 24, "Senior " + "a" * 20 + " Engineer"]
+
+
+def raw_query(text: str) -> dict:
+    return {"is_active": True, "$or": [{field: {"$regex": text, "$options": "i"}}
+                                       for field in ("title", "company", "location")]}
+
+
+def safe_query(text: str) -> dict:
+    return {"is_active": True, **(search_clause(text) or {})}
+
+
+def measure(collection, query: dict, repeat: int, max_time_ms=None) -> dict:
+    timings, matched, error = [], 0, None
+    for _ in range(repeat):
+        cursor = collection.find(query, JOB_FIELDS).limit(1000)
+        if max_time_ms:
+            cursor = cursor.max_time_ms(max_time_ms)
+        start = time.perf_counter()
+        try:
+            matched = len(list(cursor))
+        except Exception as exc:  # invalid pattern or exceeded time budget
+            error = type(exc).__name__
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"matched": matched, "median_ms": round(statistics.median(timings), 2),
+            "max_ms": round(max(timings), 2), "error": error}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default="memory", help="'memory' or a MongoDB URL")
+    parser.add_argument("--db-name", default=BENCH_DB_NAME)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--skip-seed", action="store_true", help="use the jobs already in the database")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args(argv)
+
+    db = _sync_database(args.mongo, args.db_name)
+    if not args.skip_seed:
+        dataset = build_dataset(50, 10, args.jobs, 0)
+        for title in ADVERSARIAL_TITLES:
+            job = dict(dataset["jobs"][0], id=title, title=title)
+            dataset["jobs"].append({**job, "search_terms": search_terms(job)})
+        seed_database(db, dataset)
+    # The partial index JobRepository.ensure_indexes creates
+    db.jobs.create_index([("search_terms", 1)], partialFilterExpression=ACTIVE)
+
+    results = {"jobs": db.jobs.count_documents({}), "mongo": "memory" if args.mongo == "memory" else "mongod",
+               "inputs": {}}
+    print(f"{results['jobs']} jobs ({results['mongo']}), median of {args.repeat}")
+    print(f"{'input':<32} {'before ms':>10} {'after ms':>10} {'before n':>9} {'after n':>8}  note")
+    for text in INPUTS:
+        before = measure(db.jobs, raw_query(text), args.repeat)
+        after = measure(db.jobs, safe_query(text), args.repeat, SEARCH_MAX_TIME_MS)
+        results["inputs"][text] = {"before": before, "after": after}
+        label = text if len(text) <= 30 else text[:27] + "..."
+        note = ", ".join(f"{name} {row['error']}" for name, row in (("before", before), ("after", after)) if row["error"])
+        print(f"{label:<32} {before['median_ms']:>10} {after['median_ms']:>10} "
+              f"{before['matched']:>9} {after['matched']:>8}  {note}")
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
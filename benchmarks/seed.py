@@ -0,0 +1,41 @@
+"""Small deterministic benchmark dataset, materialized in memory and inserted directly into Mongo."""
+from benchmarks.datagen import (
+    PASSWORD, DatasetSpec, application_counts, chunks, generate_applications, generate_employers,
+    generate_jobs, generate_seekers,
+)
+
+
+def build_dataset(seekers: int, employers: int, jobs: int, applications: int, seed: int = 42) -> dict:
+    """Build documents in memory; the same seed always yields the same dataset."""
+    spec = DatasetSpec(seekers, employers, jobs, applications, seed=seed)
+    counts = application_counts(spec)
+    users = [doc for chunk in chunks(spec.seekers) for doc in generate_seekers(spec, chunk)]
+    users += [doc for chunk in chunks(spec.employers) for doc in generate_employers(spec, chunk)]
+    return {
+        "users": users,
+        "jobs": [doc for chunk in chunks(spec.jobs) for doc in generate_jobs(spec, chunk)],
+        "applications": [doc for chunk in chunks(spec.seekers) for doc in generate_applications(spec, chunk, counts)],
+    }
+
+
+def seed_database(db, dataset: dict, batch_size: int = 1000):
+    """Replace the users/jobs/applications collections of a sync (PyMongo or mongomock) database."""
+    for name in ("users", "jobs", "applications"):
+        collection = db[name]
+        collection.delete_many({})
+        docs = dataset[name]
+        for start in range(0, len(docs), batch_size):
+            collection.insert_many([dict(doc) for doc in docs[start:start + batch_size]], ordered=False)
+    # Derived from applications; rebuild with JobStatsRepository.rebuild
+    db.job_stats.delete_many({})
+
+
+def manifest(dataset: dict) -> dict:
+    """What the load generator needs to know about the seeded data."""
+    return {
+        "password": PASSWORD,
+        "seekers": [u["email"] for u in dataset["users"] if u["role"] == "job_seeker"],
+        "employers": [u["email"] for u in dataset["users"] if u["role"] == "employer"],
+        "job_ids": [j["id"] for j in dataset["jobs"]],
+        "counts": {name: len(docs) for name, docs in dataset.items()},
+    }
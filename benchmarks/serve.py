@@ -0,0 +1,123 @@
+"""Boot one of the backends on localhost against a seeded local database.
+
+    python -m benchmarks.serve --backend fastapi --mongo memory --port 8001 --manifest /tmp/m.json
+
+``--mongo memory`` swaps the database for an in-process mongomock store, so no
+``mongod`` is needed; any other value is used as a MongoDB URL (point it at a
+local ``mongod``, never at production -- the benchmark database is wiped).
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / "backend"
+
+BENCH_DB_NAME = "smart_job_tracker_bench"
+
+
+def _prepare_environment(mongo: str, db_name: str):
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ["MONGO_URL"] = "mongodb://localhost:27017/" if mongo == "memory" else mongo
+    os.environ["DB_NAME"] = db_name
+    # Keep the seeded jobs in place for the whole run
+    os.environ.setdefault("JOB_SWEEP_INTERVAL_SECONDS", "0")
+    # All load-test traffic comes from one IP; benchmarks.login_attack turns throttling back on
+    os.environ.setdefault("LOGIN_RATE_LIMIT_PER_IP", "off")
+    os.environ.setdefault("LOGIN_RATE_LIMIT_PER_EMAIL", "off")
+
+
+def _sync_database(mongo: str, db_name: str):
+    if mongo == "memory":
+        import mongomock
+        return mongomock.MongoClient()[db_name]
+    from pymongo import MongoClient
+    return MongoClient(mongo)[db_name]
+
+
+def _memory_database(sync_db):
+    from mongomock_motor import AsyncMongoMockClient
+    return AsyncMongoMockClient(mock_mongo_client=sync_db.client)[sync_db.name]
+
+
+def rebuild_job_stats(mongo: str, sync_db):
+    """Seeded applications bypass the API, so derive their job_stats counters the way the migration does."""
+    import asyncio
+    from repositories import Repositories
+
+    async def rebuild():
+        if mongo == "memory":
+            return await Repositories(_memory_database(sync_db)).job_stats.rebuild()
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(mongo)
+        try:
+            return await Repositories(client[sync_db.name]).job_stats.rebuild()
+        finally:
+            client.close()
+
+    return asyncio.run(rebuild())
+
+
+def load_fastapi(mongo: str, sync_db):
+    import server
+    if mongo == "memory":
+        server.use_database(_memory_database(sync_db))
+    return server.app
+
+
+def load_flask(mongo: str, sync_db):
+    import app as flask_backend
+    if mongo == "memory":
+        flask_backend.use_database(_memory_database(sync_db))
+    return flask_backend.create_app()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["fastapi", "flask"], default="fastapi")
+    parser.add_argument("--mongo", default="memory", help="'memory' or a MongoDB URL")
+    parser.add_argument("--db-name", default=BENCH_DB_NAME)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--workers", type=int, default=1, help="FastAPI worker processes (backend/launcher.py)")
+    parser.add_argument("--seekers", type=int, default=200)
+    parser.add_argument("--employers", type=int, default=20)
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--applications", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--manifest", help="write the seeded-data manifest (JSON) to this path")
+    args = parser.parse_args(argv)
+
+    from benchmarks.seed import build_dataset, manifest, seed_database
+
+    _prepare_environment(args.mongo, args.db_name)
+    sync_db = _sync_database(args.mongo, args.db_name)
+    dataset = build_dataset(args.seekers, args.employers, args.jobs, args.applications, seed=args.seed)
+    seed_database(sync_db, dataset)
+    rebuild_job_stats(args.mongo, sync_db)
+    if args.manifest:
+        Path(args.manifest).write_text(json.dumps({"backend": args.backend, **manifest(dataset)}))
+
+    if args.backend == "fastapi" and args.workers > 1:
+        # Seeded before the fork, so with --mongo memory every worker starts from the same copy
+        # (writes then stay in the worker that made them)
+        import server
+        from launcher import serve
+        app = load_fastapi(args.mongo, sync_db)
+        # A MongoDB URL needs nothing here: each worker's lifespan handler opens its own client
+        post_fork = (lambda: server.use_database(_memory_database(sync_db))) if args.mongo == "memory" else None
+        serve(app, args.host, args.port, args.workers, post_fork=post_fork, log_level="warning")
+    elif args.backend == "fastapi":
+        import uvicorn
+        uvicorn.run(load_fastapi(args.mongo, sync_db), host=args.host, port=args.port, log_level="warning")
+    else:
+        import logging
+        from werkzeug.serving import run_simple
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        run_simple(args.host, args.port, load_flask(args.mongo, sync_db), threaded=True)
+
+
+if __name__ == "__main__":
+    main()
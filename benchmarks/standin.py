@@ -0,0 +1,450 @@
+"""A local MongoDB stand-in for hermetic tests and benchmarks of either backend, with round trips counted.
+
+    with MongoStandIn("memory", rtt_ms=1) as stand_in:      # or "mongod", or a MongoDB URL
+        stand_in.seed(build_dataset(50, 10, 200, 500))
+        with TestClient(stand_in.fastapi_app()) as client, stand_in.round_trips.measure() as trips:
+            client.get("/api/jobs")
+        print(trips.count, trips.by_command())
+
+``"memory"`` serves the apps from an in-process mongomock store wrapped in
+``CountingDatabase``: every Motor call is counted as the command it would send
+and can be delayed by ``rtt_ms`` of simulated round trip, so N+1 loops show up
+in wall time too. ``"mongod"`` spawns a throwaway ``mongod`` from ``PATH`` in a
+temp dir (``LocalMongod``); a URL uses an existing server (never production --
+the database is wiped). ``"replset"`` spawns a two-member replica set instead,
+so reads routed to a secondary can be told apart (``RoundTrip.server``). With a real server the counter is registered as a
+PyMongo command listener, so it sees exactly what the driver sends, and the
+database profiler is switched on so ``docs_examined`` can report scans.
+"""
+import asyncio
+import inspect
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional
+
+from pymongo import MongoClient, monitoring
+from pymongo.errors import PyMongoError
+from pymongo.write_concern import WriteConcern
+
+from benchmarks.seed import manifest, seed_database
+from benchmarks.serve import _memory_database, _prepare_environment, _sync_database, rebuild_job_stats
+
+TEST_DB_NAME = "smart_job_tracker_test"
+
+# ``server`` is the "host:port" that answered; ``None`` in memory
+RoundTrip = namedtuple("RoundTrip", "command collection seconds server", defaults=(None,))
+
+# Driver housekeeping rather than application queries
+IGNORED_COMMANDS = frozenset({"endSessions", "hello", "isMaster", "ismaster", "saslStart", "saslContinue"})
+
+# Motor method -> the wire command it sends
+COMMAND_NAMES = {
+    "find_one": "find", "insert_one": "insert", "insert_many": "insert", "update_one": "update",
+    "update_many": "update", "replace_one": "update", "delete_one": "delete", "delete_many": "delete",
+    "count_documents": "aggregate", "estimated_document_count": "count", "find_one_and_update": "findAndModify",
+    "find_one_and_replace": "findAndModify", "find_one_and_delete": "findAndModify", "bulk_write": "bulkWrite",
+    "create_index": "createIndexes", "create_indexes": "createIndexes", "drop_index": "dropIndexes",
+    "index_information": "listIndexes", "list_indexes": "listIndexes",
+}
+CURSOR_METHODS = frozenset({"find", "aggregate"})
+
+
+class RoundTripWindow:
+    """The round trips recorded inside one ``RoundTripCounter.measure()`` block."""
+
+    def __init__(self):
+        self.trips: List[RoundTrip] = []
+        self.wall_seconds = 0.0
+        self.started_at = datetime.utcnow()
+        self.ended_at = None
+
+    @property
+    def count(self) -> int:
+        return len(self.trips)
+
+    @property
+    def db_seconds(self) -> float:
+        return sum(trip.seconds for trip in self.trips)
+
+    def by_command(self) -> Counter:
+        return Counter(f"{trip.command} {trip.collection}" if trip.collection else trip.command
+                       for trip in self.trips)
+
+
+class RoundTripCounter(monitoring.CommandListener):
+    """Records every database round trip, from ``CountingDatabase`` or as a PyMongo command listener."""
+
+    def __init__(self):
+        self.trips: List[RoundTrip] = []
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def record(self, command: str, collection: Optional[str], seconds: float, server: Optional[str] = None):
+        with self._lock:
+            self.trips.append(RoundTrip(command, collection, seconds, server))
+
+    def reset(self):
+        with self._lock:
+            self.trips = []
+
+    @property
+    def count(self) -> int:
+        return len(self.trips)
+
+    @contextmanager
+    def measure(self):
+        window = RoundTripWindow()
+        first = len(self.trips)
+        start = time.perf_counter()
+        try:
+            yield window
+        finally:
+            window.wall_seconds = time.perf_counter() - start
+            window.ended_at = datetime.utcnow()
+            window.trips = self.trips[first:]
+
+    # PyMongo command monitoring
+    def started(self, event):
+        if event.command_name not in IGNORED_COMMANDS:
+            collection = event.command.get(event.command_name)
+            self._collections[event.request_id] = collection if isinstance(collection, str) else None
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        if event.command_name not in IGNORED_COMMANDS:
+            host, port = event.connection_id
+            self.record(event.command_name, self._collections.pop(event.request_id, None),
+                        event.duration_micros / 1_000_000, f"{host}:{port}")
+
+
+class CountingCursor:
+    """Counts the first fetch of a Motor-compatible cursor; chained calls keep the wrapper."""
+
+    def __init__(self, cursor, round_trip):
+        self._cursor = cursor
+        self._round_trip = round_trip
+        self._fetched = False
+
+    def __getattr__(self, name):
+        attr = getattr(self._cursor, name)
+        if not callable(attr):
+            return attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return self if result is self._cursor else result
+
+        return chained
+
+    async def to_list(self, length=None):
+        await self._fetch()
+        return await self._cursor.to_list(length)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self._fetch()
+        return await self._cursor.__anext__()
+
+    async def _fetch(self):
+        if not self._fetched:
+            self._fetched = True
+            await self._round_trip()
+
+
+class CountingCollection:
+    def __init__(self, collection, counter: RoundTripCounter, rtt: float):
+        self._collection = collection
+        self._counter = counter
+        self._rtt = rtt
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name in CURSOR_METHODS:
+            return lambda *args, **kwargs: CountingCursor(attr(*args, **kwargs), self._round_trip_for(name))
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+        round_trip = self._round_trip_for(COMMAND_NAMES.get(name, name))
+
+        async def counted(*args, **kwargs):
+            await round_trip()
+            return await attr(*args, **kwargs)
+
+        return counted
+
+    def _round_trip_for(self, command: str):
+        async def round_trip():
+            start = time.perf_counter()
+            if self._rtt:
+                await asyncio.sleep(self._rtt)
+            self._counter.record(command, self._collection.name, time.perf_counter() - start)
+
+        return round_trip
+
+
+class CountingDatabase:
+    """Wraps a Motor-compatible database (mongomock-motor) so every call is one counted round trip."""
+
+    def __init__(self, database, counter: RoundTripCounter, rtt: float = 0.0):
+        self._database = database
+        self._counter = counter
+        self._rtt = rtt
+
+    def __getattr__(self, name):
+        attr = getattr(self._database, name)
+        if hasattr(attr, "find_one"):
+            return CountingCollection(attr, self._counter, self._rtt)
+        return attr
+
+    def __getitem__(self, name):
+        return CountingCollection(self._database[name], self._counter, self._rtt)
+
+    def get_collection(self, name, **kwargs):
+        return CountingCollection(self._database.get_collection(name, **kwargs), self._counter, self._rtt)
+
+    async def command(self, command, *args, **kwargs):
+        start = time.perf_counter()
+        if self._rtt:
+            await asyncio.sleep(self._rtt)
+        self._counter.record(command if isinstance(command, str) else next(iter(command)), None,
+                             time.perf_counter() - start)
+        return await self._database.command(command, *args, **kwargs)
+
+
+class MongodNotFound(RuntimeError):
+    pass
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class LocalMongod:
+    """Throwaway ``mongod`` processes on free localhost ports with their data in a temp dir.
+
+    ``replica_set="rs0", members=2`` starts a replica set whose first member is
+    the primary and the others priority-0 secondaries, to exercise read routing.
+    """
+
+    def __init__(self, binary: Optional[str] = None, startup_timeout: float = 30.0,
+                 replica_set: Optional[str] = None, members: int = 1):
+        self.binary = binary or os.environ.get("MONGOD_BINARY") or shutil.which("mongod")
+        self.startup_timeout = startup_timeout
+        self.replica_set = replica_set
+        self.members = members if replica_set else 1
+        self.dbpath = None
+        self.processes = []
+        self.addresses: List[str] = []
+        self.url = None
+
+    @property
+    def primary(self) -> str:
+        return self.addresses[0]
+
+    @property
+    def secondaries(self) -> List[str]:
+        return self.addresses[1:]
+
+    def start(self) -> str:
+        if not self.binary:
+            raise MongodNotFound("mongod is not on PATH; install MongoDB or set MONGOD_BINARY")
+        self.dbpath = tempfile.mkdtemp(prefix="mongod-")
+        try:
+            for member in range(self.members):
+                port = free_port()
+                path = os.path.join(self.dbpath, str(member))
+                os.mkdir(path)
+                args = [self.binary, "--dbpath", path, "--port", str(port), "--bind_ip", "127.0.0.1",
+                        "--logpath", os.path.join(path, "mongod.log")]
+                if self.replica_set:
+                    args += ["--replSet", self.replica_set]
+                self.processes.append(subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL))
+                self.addresses.append(f"127.0.0.1:{port}")
+            for process, address in zip(self.processes, self.addresses):
+                self._wait_until(process, address, lambda client: client.admin.command("ping"))
+            if self.replica_set:
+                self._initiate()
+        except BaseException:
+            self.stop()
+            raise
+        if self.replica_set:
+            self.url = f"mongodb://{','.join(self.addresses)}/?replicaSet={self.replica_set}"
+        else:
+            self.url = f"mongodb://{self.primary}/"
+        return self.url
+
+    def _initiate(self):
+        members = [{"_id": n, "host": address, "priority": 1 if n == 0 else 0}
+                   for n, address in enumerate(self.addresses)]
+        with MongoClient(self.primary, directConnection=True) as client:
+            client.admin.command("replSetInitiate", {"_id": self.replica_set, "members": members})
+
+        def all_members_up(client):
+            states = [member["stateStr"] for member in client.admin.command("replSetGetStatus")["members"]]
+            if states.count("PRIMARY") != 1 or states.count("SECONDARY") != len(states) - 1:
+                raise PyMongoError(f"replica set members are {states}")
+
+        self._wait_until(self.processes[0], self.primary, all_members_up)
+
+    def _wait_until(self, process, address: str, check):
+        deadline = time.monotonic() + self.startup_timeout
+        with MongoClient(address, directConnection=True, serverSelectionTimeoutMS=500) as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"mongod {address} exited with status {process.returncode}; "
+                                       f"see its mongod.log under {self.dbpath}")
+                try:
+                    check(client)
+                    return
+                except PyMongoError as exc:
+                    if time.monotonic() > deadline:
+                        raise RuntimeError(f"mongod {address} not ready within {self.startup_timeout}s: {exc}")
+                    time.sleep(0.2)
+
+    def stop(self):
+        for process in self.processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        if self.dbpath:
+            shutil.rmtree(self.dbpath, ignore_errors=True)
+        self.processes, self.addresses, self.dbpath = [], [], None
+
+    def __enter__(self) -> str:
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class MongoStandIn:
+    """A seeded local database both backends can be pointed at in-process.
+
+    ``mongo`` is ``"memory"``, ``"mongod"`` (spawn one), ``"replset"`` (spawn a
+    primary and a secondary) or a MongoDB URL. The apps are the real ``server``
+    and ``app`` modules, so a process holds one stand-in at a time.
+    """
+
+    def __init__(self, mongo: str = "memory", db_name: str = TEST_DB_NAME, rtt_ms: float = 0.0):
+        self.mongo = mongo
+        self.db_name = db_name
+        self.rtt = rtt_ms / 1000
+        self.round_trips = RoundTripCounter()
+        self.url = None
+        self.sync_db = None
+        self.manifest = None
+        self._mongod = None
+        self._secondary_clients = []
+
+    @property
+    def in_memory(self) -> bool:
+        return self.url is None
+
+    def start(self) -> "MongoStandIn":
+        if self.mongo in ("mongod", "replset"):
+            self._mongod = LocalMongod(replica_set="rs0", members=2) if self.mongo == "replset" else LocalMongod()
+            self.url = self._mongod.start()
+        elif self.mongo != "memory":
+            self.url = self.mongo
+        _prepare_environment(self.url or "memory", self.db_name)
+        self.sync_db = _sync_database(self.url or "memory", self.db_name)
+        if not self.in_memory:
+            # Every client created from here on reports its commands (PyMongo listeners can't be removed)
+            monitoring.register(self.round_trips)
+            # Profile every operation so docs_examined() can read what each one scanned; profiling is
+            # per member, so reads routed to a secondary are profiled there
+            self._secondary_clients = [MongoClient(address, directConnection=True, readPreference="secondaryPreferred")
+                                       for address in self.secondaries]
+            for db in self._member_databases():
+                db.command("profile", 2)
+        return self
+
+    @property
+    def secondaries(self) -> List[str]:
+        """Addresses of the spawned replica set's secondaries; empty otherwise."""
+        return self._mongod.secondaries if self._mongod is not None else []
+
+    def _member_databases(self):
+        return [self.sync_db] + [client[self.db_name] for client in self._secondary_clients]
+
+    def seed(self, dataset: dict) -> dict:
+        """Replace the data with ``dataset`` (``benchmarks.seed.build_dataset``); returns its manifest."""
+        db = self.sync_db
+        if self.secondaries:
+            # Wait for a majority so the secondary has the data before the first routed read
+            db = db.with_options(write_concern=WriteConcern("majority"))
+        seed_database(db, dataset)
+        rebuild_job_stats(self.url or "memory", self.sync_db)
+        self.manifest = manifest(dataset)
+        return self.manifest
+
+    def docs_examined(self, window: RoundTripWindow) -> Optional[int]:
+        """Documents the server examined during ``window``; ``None`` in memory, where nothing scans."""
+        if self.in_memory:
+            return None
+        examined = 0
+        for db in self._member_databases():
+            entries = db["system.profile"].find(
+                {"ts": {"$gte": window.started_at, "$lte": window.ended_at},
+                 "ns": {"$ne": f"{self.db_name}.system.profile"}},
+                {"docsExamined": 1},
+            )
+            examined += sum(entry.get("docsExamined", 0) for entry in entries)
+        return examined
+
+    def async_database(self):
+        """A counted Motor-compatible handle on the in-memory store."""
+        return CountingDatabase(_memory_database(self.sync_db), self.round_trips, self.rtt)
+
+    def fastapi_app(self):
+        """``server.app`` on this database; run it with its lifespan (``with TestClient(app)``)."""
+        import server
+
+        if self.in_memory:
+            server.use_database(self.async_database())
+        return server.app
+
+    def flask_app(self):
+        import app as flask_backend
+
+        if self.in_memory:
+            flask_backend.use_database(self.async_database())
+        return flask_backend.create_app()
+
+    def stop(self):
+        for client in self._secondary_clients:
+            client.close()
+        self._secondary_clients = []
+        if self.sync_db is not None:
+            self.sync_db.client.close()
+            self.sync_db = None
+        if self._mongod is not None:
+            self._mongod.stop()
+            self._mongod = None
+
+    def __enter__(self) -> "MongoStandIn":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
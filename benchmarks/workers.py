@@ -0,0 +1,51 @@
+"""Throughput and latency of the FastAPI backend with 1 worker vs. N (``backend/launcher.py``).
+
+    python -m benchmarks.workers --workers 4 --concurrency 64 --duration 20
+
+Runs ``benchmarks.run`` once per worker count with the same workload and prints
+the overall numbers side by side. Extra arguments are passed to
+``benchmarks.run`` (e.g. ``--mongo mongodb://localhost:27017/``). Worker
+processes only add throughput up to the number of cores; with the in-memory
+database each worker serves its own forked copy of the seeded data.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from launcher import default_workers  # noqa: E402
+
+from benchmarks import run  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, default_workers()],
+                        help="worker counts to compare (default: 1 and one per core)")
+    parser.add_argument("--output", help="write JSON results to this path")
+    args, run_args = parser.parse_known_args(argv)
+
+    results = {}
+    for workers in dict.fromkeys(args.workers):
+        path = Path(tempfile.mkstemp(suffix=".json")[1])
+        try:
+            run.main([*run_args, "--workers", str(workers), "--output", str(path)])
+            results[workers] = json.loads(path.read_text())
+        finally:
+            path.unlink(missing_ok=True)
+
+    print(f"\n{os.cpu_count()} CPUs")
+    print(f"{'workers':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for workers, result in results.items():
+        overall = result["overall"]
+        print(f"{workers:>8}{overall['throughput_rps']:>10}{overall['p50_ms']:>10}{overall['p95_ms']:>10}"
+              f"{overall['p99_ms']:>10}{overall['errors']:>8}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
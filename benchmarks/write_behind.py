@@ -0,0 +1,151 @@
+"""Application insert throughput at fixed arrival rates: direct writes vs. the write-behind queue.
+
+    python -m benchmarks.write_behind                                   # 1k/5k/10k applies/s, in memory
+    python -m benchmarks.write_behind --mongo mongodb://localhost:27017/ --rates 1000 5000 10000
+
+Drives the storage path of ``POST /api/applications`` in-process (no HTTP, so
+the arrival rate is not capped by the web server): an open-loop generator
+starts ``rate`` applies per second for ``--duration`` seconds. "direct" awaits
+``Repositories.submit_application`` per apply (an insert and a ``job_stats``
+upsert each); "write-behind" awaits ``WriteBehindQueue.put`` and lets the queue
+store micro-batches through ``Repositories.store_applications``. Reported:
+the rate actually sustained (stored / time until the last write landed),
+acknowledgement latency, database writes issued and writes refused by
+backpressure.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+from repositories import Repositories  # noqa: E402
+from writebehind import WriteBehindFull, WriteBehindQueue  # noqa: E402
+
+from benchmarks.run import percentile  # noqa: E402
+from benchmarks.seed import build_dataset, seed_database  # noqa: E402
+from benchmarks.serve import BENCH_DB_NAME, _memory_database, _sync_database  # noqa: E402
+
+
+class CountingRepositories(Repositories):
+    """Counts the write commands each path sends."""
+
+    writes = 0
+
+    async def submit_application(self, job, application):
+        self.writes += 2
+        return await super().submit_application(job, application)
+
+    async def store_applications(self, jobs, applications):
+        self.writes += 2
+        return await super().store_applications(jobs, applications)
+
+
+def application(job: dict, seeker_id: str) -> dict:
+    return {"id": str(uuid.uuid4()), "job_id": job["id"], "job_seeker_id": seeker_id,
+            "resume_content": "Resume", "cover_letter_content": "Cover letter",
+            "applied_at": datetime.utcnow(), "status": "applied", "status_updated_at": None, "status_history": []}
+
+
+async def drive(repos, jobs, seekers, rate, duration, writer=None) -> dict:
+    rng = random.Random(rate)
+    latencies, rejected, tasks = [], 0, []
+
+    async def apply():
+        nonlocal rejected
+        job = rng.choice(jobs)
+        app = application(job, rng.choice(seekers))
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                await repos.submit_application(job, app)
+            else:
+                await writer.put((job, app))
+        except WriteBehindFull:
+            rejected += 1
+            return
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    total = int(rate * duration)
+    start = time.perf_counter()
+    for n in range(total):
+        # Open loop: sleep until the next arrival is due, never waiting for earlier applies
+        delay = start + n / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(apply()))
+    offered_s = time.perf_counter() - start
+    await asyncio.gather(*tasks)
+    if writer is not None:
+        await writer.stop()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    stored = total - rejected
+    return {"offered": total, "offered_per_s": round(total / offered_s), "stored": stored, "rejected": rejected,
+            "stored_per_s": round(stored / elapsed), "ack_p50_ms": round(percentile(latencies, 50), 2),
+            "ack_p99_ms": round(percentile(latencies, 99), 2), "db_writes": repos.writes}
+
+
+async def measure(async_db, sync_db, jobs, seekers, rate, args) -> dict:
+    results = {}
+    for mode in ("direct", "write-behind"):
+        sync_db.applications.delete_many({})
+        sync_db.job_stats.delete_many({})
+        repos = CountingRepositories(async_db)
+
+        async def flush(batch, repos=repos):
+            return await repos.store_applications({job["id"]: job for job, _ in batch}, [app for _, app in batch])
+
+        writer = None
+        if mode == "write-behind":
+            writer = WriteBehindQueue(flush, name="bench", max_batch=args.batch_size,
+                                      max_delay=args.batch_delay_ms / 1000, max_pending=args.queue_limit)
+            writer.start()
+        results[mode] = await drive(repos, jobs, seekers, rate, args.duration, writer)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default="memory", help="'memory' or a MongoDB URL")
+    parser.add_argument("--db-name", default=BENCH_DB_NAME)
+    parser.add_argument("--rates", type=int, nargs="+", default=[1000, 5000, 10000], help="applies per second")
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--batch-delay-ms", type=float, default=20)
+    parser.add_argument("--queue-limit", type=int, default=10000)
+    parser.add_argument("--output", help="write JSON results to this path")
+    args = parser.parse_args(argv)
+
+    sync_db = _sync_database(args.mongo, args.db_name)
+    dataset = build_dataset(500, 20, 1000, 0)
+    seed_database(sync_db, dataset)
+    jobs = [job for job in dataset["jobs"] if job["is_active"]]
+    seekers = [user["id"] for user in dataset["users"] if user["role"] == "job_seeker"]
+
+    async def run_all():
+        if args.mongo == "memory":
+            async_db = _memory_database(sync_db)
+        else:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            async_db = AsyncIOMotorClient(args.mongo)[args.db_name]
+        return {rate: await measure(async_db, sync_db, jobs, seekers, rate, args) for rate in args.rates}
+
+    results = asyncio.run(run_all())
+    print(f"{'rate/s':>7} {'mode':<13} {'offered/s':>9} {'stored/s':>9} {'ack p50 ms':>11} {'ack p99 ms':>11} "
+          f"{'db writes':>10} {'rejected':>9}")
+    for rate, modes in results.items():
+        for mode, row in modes.items():
+            print(f"{rate:>7} {mode:<13} {row['offered_per_s']:>9} {row['stored_per_s']:>9} {row['ack_p50_ms']:>11} "
+                  f"{row['ack_p99_ms']:>11} {row['db_writes']:>10} {row['rejected']:>9}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
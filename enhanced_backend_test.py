@@ -4,6 +4,7 @@ Enhanced Backend API Testing for Smart Job Tracker
 Focus on testing the enhanced my-applications endpoint and application system improvements
 """
 
+import os
 import requests
 import json
 import time
@@ -11,7 +12,7 @@ import sys
 from typing import Dict, Any, Optional
 
 # Backend URL from environment
-BACKEND_URL = "https://2f24e3f7-369e-430c-babb-ae3802580ea2.preview.emergentagent.com/api"
+BACKEND_URL = os.environ.get("BACKEND_URL", "https://2f24e3f7-369e-430c-babb-ae3802580ea2.preview.emergentagent.com/api")
 
 class EnhancedJobTrackerTester:
     def __init__(self):
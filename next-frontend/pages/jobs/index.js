@@ -7,6 +7,7 @@ import { jobsAPI } from '../../utils/api'
 export default function Jobs() {
   const [jobs, setJobs] = useState([])
   const [loading, setLoading] = useState(true)
+  const [suggestions, setSuggestions] = useState([])
   const [filters, setFilters] = useState({
     search: '',
     location: '',
@@ -17,6 +18,25 @@ export default function Jobs() {
     fetchJobs()
   }, [])
 
+  // Typeahead: debounced, served from the backend's in-memory index
+  useEffect(() => {
+    const q = filters.search.trim()
+    if (!q) {
+      setSuggestions([])
+      return
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const response = await jobsAPI.suggest(q)
+        // The search box matches titles and companies; locations have their own filter
+        setSuggestions(response.data.filter(suggestion => suggestion.kind !== 'location'))
+      } catch (error) {
+        setSuggestions([])
+      }
+    }, 150)
+    return () => clearTimeout(timer)
+  }, [filters.search])
+
   const fetchJobs = async () => {
     try {
       const response = await jobsAPI.getAll()
@@ -72,9 +92,16 @@ export default function Jobs() {
                 name="search"
                 className="input-field"
                 placeholder="Job title or company"
+                list="search-suggestions"
+                autoComplete="off"
                 value={filters.search}
                 onChange={handleFilterChange}
               />
+              <datalist id="search-suggestions">
+                {suggestions.map(suggestion => (
+                  <option key={`${suggestion.kind}:${suggestion.value}`} value={suggestion.value} />
+                ))}
+              </datalist>
             </div>
             
             <div>
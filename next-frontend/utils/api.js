@@ -31,6 +31,7 @@ export const authAPI = {
 export const jobsAPI = {
   getAll: () => api.get('/jobs'),
   getById: (id) => api.get(`/jobs/${id}`),
+  suggest: (q, kind) => api.get('/jobs/suggest', { params: { q, kind } }),
   create: (jobData) => api.post('/jobs', jobData),
 }
 
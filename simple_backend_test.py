@@ -4,12 +4,13 @@ Simplified Backend API Testing for Smart Job Tracker
 Focus on core functionality that works
 """
 
+import os
 import requests
 import json
 import time
 
 # Backend URL from environment
-BACKEND_URL = "https://2f24e3f7-369e-430c-babb-ae3802580ea2.preview.emergentagent.com/api"
+BACKEND_URL = os.environ.get("BACKEND_URL", "https://2f24e3f7-369e-430c-babb-ae3802580ea2.preview.emergentagent.com/api")
 
 def test_core_functionality():
     """Test the core working functionality"""
@@ -0,0 +1,65 @@
+"""Fixtures running both backends in-process against a seeded local database (``benchmarks.standin``).
+
+``TEST_MONGO`` picks the database: ``memory`` (default), ``mongod`` (spawned in a
+temp dir), ``replset`` (a spawned primary and secondary) or a MongoDB URL.
+``TEST_MONGO_RTT_MS`` delays each in-memory round trip to mimic a real network.
+"""
+import os
+
+import pytest
+
+from benchmarks.seed import build_dataset
+from benchmarks.standin import MongoStandIn
+
+# seekers, employers, jobs, applications: small enough to seed in well under a second
+TEST_DATASET = (50, 10, 200, 500)
+
+
+def pytest_configure(config):
+    # Budget marker, query_budget fixture and the budget summary
+    config.pluginmanager.import_plugin("tests.querybudget")
+
+
+@pytest.fixture(scope="session")
+def stand_in():
+    with MongoStandIn(os.environ.get("TEST_MONGO", "memory"),
+                      rtt_ms=float(os.environ.get("TEST_MONGO_RTT_MS", 0))) as stand_in:
+        stand_in.seed(build_dataset(*TEST_DATASET))
+        yield stand_in
+
+
+@pytest.fixture
+def round_trips(stand_in):
+    stand_in.round_trips.reset()
+    return stand_in.round_trips
+
+
+@pytest.fixture
+def fastapi_client(stand_in):
+    from fastapi.testclient import TestClient
+
+    with TestClient(stand_in.fastapi_app()) as client:
+        # Index creation and warm-up ran in the lifespan handler
+        stand_in.round_trips.reset()
+        yield client
+
+
+@pytest.fixture
+def flask_client(stand_in):
+    app = stand_in.flask_app()
+    app.testing = True
+    with app.test_client() as client:
+        yield client
+
+
+@pytest.fixture
+def login(stand_in):
+    """``login(client, email)`` -> Authorization headers, for either backend's client."""
+
+    def login(client, email):
+        response = client.post("/api/auth/login", json={"email": email, "password": stand_in.manifest["password"]})
+        assert response.status_code == 200, response.text
+        body = response.json() if callable(response.json) else response.json
+        return {"Authorization": f"Bearer {body.get('access_token') or body['token']}"}
+
+    return login
@@ -0,0 +1,110 @@
+"""pytest plugin: per-endpoint database and latency budgets.
+
+    @pytest.mark.budget(commands=3, docs_examined=150, wall_ms=250)
+    def test_my_applications(fastapi_client, login, query_budget):
+        headers = login(fastapi_client, email)
+        with query_budget.measure("GET /api/my-applications"):
+            fastapi_client.get("/api/my-applications", headers=headers)
+
+Each ``measure`` block must stay within the test's ``budget`` marker:
+
+* ``commands``: database round trips, as counted by the stand-in
+  (``benchmarks.standin.RoundTripCounter``), so an N+1 loop fails at once;
+* ``docs_examined``: documents the server scanned, read from the database
+  profiler -- only enforced against a real ``mongod`` (``TEST_MONGO``);
+* ``wall_ms``: elapsed time of the block, multiplied by ``BUDGET_WALL_FACTOR``
+  (default 1; ``0`` skips wall-time checks on slow or shared machines).
+
+Budgets are set for the dataset seeded by ``tests/conftest.py`` (``TEST_DATASET``).
+A failure lists the commands the block sent. ``BUDGET_REPORT=path`` writes
+every measurement as JSON; the terminal summary shows them as a table.
+"""
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import pytest
+
+LIMITS = ("commands", "docs_examined", "wall_ms")
+
+# Every measurement of the session, for the summary and BUDGET_REPORT
+measurements = []
+
+
+class Budget(NamedTuple):
+    commands: Optional[int] = None
+    docs_examined: Optional[int] = None
+    wall_ms: Optional[float] = None
+
+
+class BudgetExceeded(AssertionError):
+    pass
+
+
+class QueryBudget:
+    """Measures blocks of a test against its ``budget`` marker."""
+
+    def __init__(self, stand_in, budget: Budget, wall_factor: float, test_id: str):
+        self.stand_in = stand_in
+        self.budget = budget
+        self.wall_factor = wall_factor
+        self.test_id = test_id
+
+    @contextmanager
+    def measure(self, label: str, **overrides):
+        budget = self.budget._replace(**overrides)
+        with self.stand_in.round_trips.measure() as window:
+            yield window
+        measurement = {
+            "test": self.test_id, "label": label, "commands": window.count,
+            "docs_examined": self.stand_in.docs_examined(window),
+            "wall_ms": round(window.wall_seconds * 1000, 2),
+            "budget": budget._asdict(), "by_command": dict(window.by_command()),
+        }
+        measurements.append(measurement)
+        over = self.exceeded(measurement, budget)
+        if over:
+            sent = ", ".join(f"{name} x{count}" for name, count in window.by_command().most_common())
+            raise BudgetExceeded(f"{label} exceeded its budget: {'; '.join(over)}. Commands sent: {sent or 'none'}")
+
+    def exceeded(self, measurement: dict, budget: Budget) -> list:
+        over = []
+        if budget.commands is not None and measurement["commands"] > budget.commands:
+            over.append(f"{measurement['commands']} commands > {budget.commands}")
+        examined = measurement["docs_examined"]
+        if budget.docs_examined is not None and examined is not None and examined > budget.docs_examined:
+            over.append(f"{examined} documents examined > {budget.docs_examined}")
+        if budget.wall_ms is not None and self.wall_factor > 0:
+            limit = budget.wall_ms * self.wall_factor
+            if measurement["wall_ms"] > limit:
+                over.append(f"{measurement['wall_ms']:.1f} ms > {limit:.0f} ms")
+        return over
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "budget(commands=None, docs_examined=None, wall_ms=None): limits for query_budget.measure blocks"
+    )
+
+
+@pytest.fixture
+def query_budget(request, stand_in):
+    marker = request.node.get_closest_marker("budget")
+    budget = Budget(**marker.kwargs) if marker else Budget()
+    return QueryBudget(stand_in, budget, float(os.environ.get("BUDGET_WALL_FACTOR", 1)), request.node.nodeid)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not measurements:
+        return
+    terminalreporter.section("query budgets")
+    terminalreporter.write_line(f"{'commands':>12} {'docs examined':>15} {'wall ms':>15}  endpoint")
+    for row in measurements:
+        budget = row["budget"]
+        cells = [f"{'-' if row[name] is None else row[name]}/{'-' if budget[name] is None else budget[name]}"
+                 for name in LIMITS]
+        terminalreporter.write_line(f"{cells[0]:>12} {cells[1]:>15} {cells[2]:>15}  {row['label']}")
+    if os.environ.get("BUDGET_REPORT"):
+        Path(os.environ["BUDGET_REPORT"]).write_text(json.dumps(measurements, indent=2))
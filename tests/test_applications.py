@@ -0,0 +1,39 @@
+"""One application per seeker and job, enforced by the unique ``(job_seeker_id, job_id)`` index."""
+import pytest
+
+from repositories import ApplicationRepository
+
+
+@pytest.fixture
+def racing(monkeypatch):
+    """Makes the "already applied" check always miss, as when two requests race past it."""
+    async def not_found(self, job_id, job_seeker_id):
+        return None
+
+    monkeypatch.setattr(ApplicationRepository, "find_for_seeker", not_found)
+
+
+def test_unique_index_exists(stand_in, fastapi_client):
+    indexes = stand_in.sync_db.applications.index_information().values()
+    assert {"key": [("job_seeker_id", 1), ("job_id", 1)], "unique": True} in [
+        {"key": index["key"], "unique": index.get("unique", False)} for index in indexes
+    ]
+
+
+@pytest.mark.parametrize("backend", ["fastapi", "flask"])
+def test_second_application_is_rejected(stand_in, fastapi_client, flask_client, login, racing, backend):
+    client = fastapi_client if backend == "fastapi" else flask_client
+    seeker = stand_in.manifest["seekers"][-1 if backend == "fastapi" else -2]
+    headers = login(client, seeker)
+    db = stand_in.sync_db
+    seeker_id = db.users.find_one({"email": seeker})["id"]
+    job_id = db.jobs.find_one({"is_active": True, "id": {"$nin": db.applications.distinct(
+        "job_id", {"job_seeker_id": seeker_id})}})["id"]
+    stats = db.job_stats.find_one({"job_id": job_id}) or {}
+
+    payload = {"job_id": job_id, "resume_content": "Resume", "cover_letter_content": "Letter"}
+    responses = [client.post("/api/applications", json=payload, headers=headers) for _ in range(2)]
+    assert [response.status_code for response in responses] == [200, 400]
+    assert db.applications.count_documents({"job_id": job_id, "job_seeker_id": seeker_id}) == 1
+    after = db.job_stats.find_one({"job_id": job_id})
+    assert after.get("applications", 0) == stats.get("applications", 0) + 1
@@ -0,0 +1,59 @@
+"""Near-duplicate postings (``backend/dedup.py``): flagged against the same employer's jobs only, hidden from listings."""
+import pytest
+
+from dedup import DUPLICATE_THRESHOLD, signature, similarity
+
+DESCRIPTION = ("Design, build and operate the ingestion pipelines behind our analytics platform. You will own "
+               "streaming jobs end to end, from schema design and capacity planning to on-call, work closely with "
+               "the product analysts who depend on fresh data every morning, review pull requests from the wider "
+               "data team, keep our warehouse costs predictable as traffic grows, and mentor two junior engineers "
+               "who joined this spring. We value clear writing, small reversible changes and calm incident work.")
+JOB = {"title": "Dedup Pipeline Engineer", "company": "Acme", "description": DESCRIPTION,
+       "requirements": "Python, Kafka, five years of data engineering", "location": "Austin, TX",
+       "job_type": "full_time"}
+
+
+def test_reworded_repost_is_above_the_threshold():
+    original = signature(DESCRIPTION)
+    assert similarity(original, signature(DESCRIPTION.replace("two junior", "three junior"))) >= DUPLICATE_THRESHOLD
+    assert similarity(original, signature(DESCRIPTION + " Apply today!")) >= DUPLICATE_THRESHOLD
+
+
+def test_unrelated_posting_is_below_the_threshold():
+    other = ("Lead our retail stores' visual merchandising: plan seasonal floor layouts, train store teams on "
+             "displays and report weekly on sell-through for the regional manager.")
+    assert similarity(signature(DESCRIPTION), signature(other)) < DUPLICATE_THRESHOLD
+
+
+@pytest.fixture
+def employers(stand_in, fastapi_client, login):
+    return [login(fastapi_client, email) for email in stand_in.manifest["employers"][:3]]
+
+
+def post(client, headers, **changes):
+    response = client.post("/api/jobs", json={**JOB, **changes}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def listed(client, title, **params):
+    jobs = client.get("/api/jobs", params={"search": title, **params}).json()
+    return {job["id"] for job in jobs if job["title"] == title}
+
+
+def test_repost_by_the_same_employer_is_flagged_and_hidden(stand_in, fastapi_client, employers):
+    title = "Dedup Repost Engineer"
+    first = post(fastapi_client, employers[0], title=title)
+    repost = post(fastapi_client, employers[0], title=title, description=DESCRIPTION + " Apply today!")
+    assert stand_in.sync_db.jobs.find_one({"id": repost})["duplicate_of"] == first
+    assert listed(fastapi_client, title) == {first}
+    assert listed(fastapi_client, title, include_duplicates="true") == {first, repost}
+
+
+def test_same_text_from_another_employer_is_not_flagged(stand_in, fastapi_client, employers):
+    title = "Dedup Shared Template Engineer"
+    # Employers not used above, so the first posting is not itself a repost
+    first = post(fastapi_client, employers[1], title=title)
+    other = post(fastapi_client, employers[2], title=title)
+    assert stand_in.sync_db.jobs.find_one({"id": other})["duplicate_of"] is None
+    assert listed(fastapi_client, title) == {first, other}
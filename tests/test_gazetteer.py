@@ -0,0 +1,31 @@
+"""Offline geocoding of job locations (``backend/gazetteer.py``)."""
+import pytest
+
+from gazetteer import geocode
+
+AUSTIN = (-97.7431, 30.2672)
+PARIS = (2.3522, 48.8566)
+PORTLAND_OR = (-122.6784, 45.5152)
+
+
+@pytest.mark.parametrize("location,point", [
+    ("Austin, TX", AUSTIN),
+    ("Austin, Texas, USA", AUSTIN),
+    ("austin tx", None),
+    ("Paris", PARIS),
+    ("Paris, France", PARIS),
+    ("Portland", PORTLAND_OR),
+    ("Portland, Oregon", PORTLAND_OR),
+    ("New York, NY 10001", (-74.0060, 40.7128)),
+    ("London, England", (-0.1278, 51.5074)),
+    # A region we know that isn't the bare name's: not the wrong city
+    ("Paris, TX", None),
+    ("Portland, ME", None),
+    # Not a region: the city itself
+    ("Austin, Downtown", AUSTIN),
+    ("Remote - US", None),
+    ("Atlantis", None),
+    (None, None),
+])
+def test_geocode(location, point):
+    assert geocode(location) == point
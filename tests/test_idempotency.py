@@ -0,0 +1,101 @@
+"""``Idempotency-Key`` handling (``backend/idempotency.py``) on the FastAPI and Flask apps."""
+import uuid
+from datetime import datetime
+
+import pytest
+
+from idempotency import REPLAYED_HEADER, IdempotencyStore, Outcome, fingerprint, scoped_key
+
+JOB = {"title": "Idempotent Engineer", "company": "Acme", "description": "Retries safely", "requirements": "HTTP",
+       "location": "Austin, TX", "job_type": "full_time"}
+
+
+@pytest.fixture
+def employer(stand_in, fastapi_client, login):
+    return login(fastapi_client, stand_in.manifest["employers"][0])
+
+
+def post_job(client, headers, key, **changes):
+    return client.post("/api/jobs", json={**JOB, **changes}, headers={**headers, "Idempotency-Key": key})
+
+
+def test_retry_replays_the_first_response(stand_in, fastapi_client, employer):
+    key = str(uuid.uuid4())
+    first = post_job(fastapi_client, employer, key, title="Replay Engineer")
+    retry = post_job(fastapi_client, employer, key, title="Replay Engineer")
+    assert first.status_code == retry.status_code == 200
+    assert retry.json()["id"] == first.json()["id"] and retry.headers[REPLAYED_HEADER] == "true"
+    assert REPLAYED_HEADER not in first.headers
+    assert stand_in.sync_db.jobs.count_documents({"title": "Replay Engineer"}) == 1
+
+
+def test_same_key_with_another_body_is_rejected(fastapi_client, employer):
+    key = str(uuid.uuid4())
+    assert post_job(fastapi_client, employer, key).status_code == 200
+    response = post_job(fastapi_client, employer, key, title="Something Else")
+    assert response.status_code == 422
+
+
+def test_retry_while_the_first_request_runs_gets_409(stand_in, fastapi_client, employer):
+    key = str(uuid.uuid4())
+    body = fastapi_client.build_request("POST", "/api/jobs", json=JOB).content
+    stand_in.sync_db.idempotency_keys.insert_one({
+        "key": scoped_key("POST", "/api/jobs", employer["Authorization"], key),
+        "fingerprint": fingerprint(body), "state": "pending", "created_at": datetime.utcnow(),
+    })
+    response = post_job(fastapi_client, employer, key)
+    assert response.status_code == 409 and response.headers["Retry-After"] == "1"
+
+
+def test_flask_retry_replays_the_first_response(stand_in, flask_client, login):
+    headers = {**login(flask_client, stand_in.manifest["employers"][0]), "Idempotency-Key": str(uuid.uuid4())}
+    job = {**JOB, "title": "Flask Replay Engineer"}
+    first = flask_client.post("/api/jobs", json=job, headers=headers)
+    retry = flask_client.post("/api/jobs", json=job, headers=headers)
+    assert first.status_code == retry.status_code
+    assert retry.get_data() == first.get_data() and retry.headers[REPLAYED_HEADER] == "true"
+
+
+def test_login_responses_are_not_stored(stand_in, fastapi_client):
+    credentials = {"email": stand_in.manifest["seekers"][0], "password": stand_in.manifest["password"]}
+    before = stand_in.sync_db.idempotency_keys.count_documents({})
+    for _ in range(2):
+        response = fastapi_client.post("/api/auth/login", json=credentials, headers={"Idempotency-Key": "login"})
+        assert response.status_code == 200 and REPLAYED_HEADER not in response.headers
+    assert stand_in.sync_db.idempotency_keys.count_documents({}) == before
+
+
+@pytest.mark.parametrize("status", [401, 409, 429, 503])
+def test_transient_answers_are_released_for_a_retry(fastapi_client, status):
+    import server
+
+    store = IdempotencyStore(lambda: server.repos)
+    key = f"transient-{status}-{uuid.uuid4()}"
+
+    async def answer_then_retry():
+        assert (await store.begin(key, "body"))[0] == Outcome.NEW
+        await store.complete(key, "body", status, [], b"{}")
+        return (await store.begin(key, "body"))[0]
+
+    assert fastapi_client.portal.call(answer_then_retry) == Outcome.NEW
+
+
+@pytest.mark.parametrize("backend", ["fastapi", "flask"])
+def test_retried_registration_answers_409_without_a_token(stand_in, fastapi_client, flask_client, backend):
+    client = fastapi_client if backend == "fastapi" else flask_client
+    email = f"register-{uuid.uuid4()}@example.com"
+    user = {"email": email, "password": "Secret123!", "role": "job_seeker", "full_name": "Retry Register"}
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+
+    first = client.post("/api/auth/register", json=user, headers=headers)
+    retry = client.post("/api/auth/register", json=user, headers=headers)
+    assert first.status_code == 200 and REPLAYED_HEADER not in first.headers
+    assert retry.status_code == 409 and retry.headers[REPLAYED_HEADER] == "true"
+    if backend == "fastapi":
+        token, retry_body = first.json()["access_token"], retry.content
+    else:
+        token, retry_body = first.get_json()["token"], retry.get_data()
+    assert token.encode() not in retry_body
+    assert stand_in.sync_db.users.count_documents({"email": email}) == 1
+    stored = [record["response"]["body"] for record in stand_in.sync_db.idempotency_keys.find({"state": "done"})]
+    assert not any(token.encode() in body for body in stored)
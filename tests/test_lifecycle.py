@@ -0,0 +1,86 @@
+"""Job expiry and archival (``backend/lifecycle.py``), and applying to jobs that no longer take applications."""
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+import repositories
+from lifecycle import ARCHIVE_AFTER, sweep
+from repositories import Repositories
+
+# Before the seeded jobs (``benchmarks.datagen.EPOCH``), so sweeps at these times touch only the jobs below
+EXPIRED_AT = datetime(2000, 1, 1)
+
+
+@pytest.fixture
+def expired_job(stand_in):
+    """``expired_job(applications=0)``: an active job past ``EXPIRED_AT``, with that many applications."""
+
+    def expired_job(applications: int = 0) -> str:
+        job_id = f"expired-{uuid.uuid4()}"
+        stand_in.sync_db.jobs.insert_one({"id": job_id, "title": "Expired Engineer", "employer_id": "expired",
+                                          "is_active": True, "created_at": EXPIRED_AT - timedelta(days=60),
+                                          "expires_at": EXPIRED_AT})
+        stand_in.sync_db.applications.insert_many([
+            {"id": f"{job_id}-{n}", "job_id": job_id, "job_seeker_id": f"expired-seeker-{n}"}
+            for n in range(applications)
+        ])
+        return job_id
+
+    return expired_job
+
+
+def run_sweep(fastapi_client, now):
+    import server
+
+    return fastapi_client.portal.call(lambda: sweep(server.repos, now=now))
+
+
+def test_sweep_expires_then_archives(stand_in, fastapi_client, expired_job, monkeypatch):
+    monkeypatch.setattr(repositories, "ARCHIVE_PAGE_SIZE", 2)
+    job_id = expired_job(applications=5)
+    db = stand_in.sync_db
+
+    result = run_sweep(fastapi_client, EXPIRED_AT + timedelta(days=1))
+    assert result == {"deactivated": 1, "archived_jobs": 0, "archived_applications": 0}
+    assert db.jobs.find_one({"id": job_id})["is_active"] is False
+
+    result = run_sweep(fastapi_client, EXPIRED_AT + ARCHIVE_AFTER + timedelta(days=1))
+    assert result == {"deactivated": 0, "archived_jobs": 1, "archived_applications": 5}
+    assert db.jobs.count_documents({"id": job_id}) == 0 and db.jobs_archive.count_documents({"id": job_id}) == 1
+    assert db.applications.count_documents({"job_id": job_id}) == 0
+    assert db.applications_archive.count_documents({"job_id": job_id}) == 5
+
+
+def test_application_written_during_archival_is_archived(stand_in, fastapi_client, expired_job, monkeypatch):
+    job_id = expired_job(applications=2)
+    stand_in.sync_db.jobs.update_one({"id": job_id}, {"$set": {"is_active": False}})
+    archive = Repositories._archive
+    late = {"id": f"{job_id}-late", "job_id": job_id, "job_seeker_id": "late-seeker"}
+
+    async def archive_then_insert(collection, docs):
+        await archive(collection, docs)
+        # A write-behind flush landing after the first page was read
+        if collection.name == "applications_archive" and not stand_in.sync_db.applications.find_one({"id": late["id"]}):
+            stand_in.sync_db.applications.insert_one(dict(late))
+
+    monkeypatch.setattr(Repositories, "_archive", staticmethod(archive_then_insert))
+    result = run_sweep(fastapi_client, EXPIRED_AT + ARCHIVE_AFTER + timedelta(days=1))
+    assert result["archived_applications"] == 3
+    assert stand_in.sync_db.applications_archive.count_documents({"job_id": job_id}) == 3
+    assert stand_in.sync_db.applications.count_documents({"job_id": job_id}) == 0
+
+
+@pytest.mark.parametrize("backend", ["fastapi", "flask"])
+def test_inactive_job_rejects_applications(stand_in, fastapi_client, flask_client, login, backend):
+    client = fastapi_client if backend == "fastapi" else flask_client
+    seeker = stand_in.manifest["seekers"][0]
+    headers = login(client, seeker)
+    db = stand_in.sync_db
+    seeker_id = db.users.find_one({"email": seeker})["id"]
+    job_id = db.jobs.find_one({"is_active": False, "id": {"$nin": db.applications.distinct(
+        "job_id", {"job_seeker_id": seeker_id})}})["id"]
+    payload = {"job_id": job_id, "resume_content": "Resume", "cover_letter_content": "Letter"}
+    response = client.post("/api/applications", json=payload, headers=headers)
+    assert response.status_code == 400
+    assert db.applications.count_documents({"job_id": job_id, "job_seeker_id": seeker_id}) == 0
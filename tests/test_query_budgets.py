@@ -0,0 +1,108 @@
+"""Database round-trip and latency budgets for the hot endpoints of both backends.
+
+Run with ``python -m pytest tests/``; see ``tests/querybudget.py`` for the
+limits and ``tests/conftest.py`` for the dataset they are set against (its
+busiest seeker has 96 applications, its busiest employer 78 jobs, so the
+``docs_examined`` limits sit well below a collection scan of 500 applications
+and 200 jobs; those params are skipped unless ``TEST_MONGO`` is a real database).
+Raising a budget should come with a reason in the commit message.
+"""
+import os
+
+import pytest
+
+budget = pytest.mark.budget
+
+
+@pytest.fixture(scope="module")
+def accounts(stand_in):
+    """Seeded ids and emails the endpoints below need, picked from the data itself."""
+    db = stand_in.sync_db
+    busiest_job = next(db.applications.aggregate([
+        {"$group": {"_id": "$job_id", "n": {"$sum": 1}}}, {"$sort": {"n": -1, "_id": 1}}, {"$limit": 1},
+    ]))["_id"]
+    busiest_seeker = next(db.applications.aggregate([
+        {"$group": {"_id": "$job_seeker_id", "n": {"$sum": 1}}}, {"$sort": {"n": -1, "_id": 1}}, {"$limit": 1},
+    ]))["_id"]
+    seeker = db.users.find_one({"id": busiest_seeker})
+    employer = db.users.find_one({"id": db.jobs.find_one({"id": busiest_job})["employer_id"]})
+    applied = set(db.applications.distinct("job_id", {"job_seeker_id": seeker["id"]}))
+    open_jobs = [job["id"] for job in db.jobs.find({"is_active": True}, {"id": 1}).sort("id", 1)
+                 if job["id"] not in applied]
+    return {
+        "seeker": seeker["email"], "employer": employer["email"],
+        "job_id": open_jobs[0], "own_job_id": busiest_job, "open_job_ids": open_jobs[1:11],
+    }
+
+
+# docs_examined comes from the database profiler, so those limits are their own params, skipped in memory
+profiled = pytest.mark.skipif(os.environ.get("TEST_MONGO", "memory") == "memory",
+                              reason="docs_examined is read from mongod's profiler")
+
+
+def read(role, path, id, docs_examined=None, **limits):
+    """``role, path`` params: one for the command and wall-time limits, one for ``docs_examined`` if given."""
+    params = [pytest.param(role, path, marks=budget(**limits), id=id)]
+    if docs_examined is not None:
+        params.append(pytest.param(role, path, marks=[budget(docs_examined=docs_examined), profiled],
+                                   id=f"{id}-docs-examined"))
+    return params
+
+
+FASTAPI_READS = [
+    *read(None, "/api/jobs", "jobs", commands=1, docs_examined=250, wall_ms=150),
+    *read(None, "/api/jobs?search=engineer&job_type=full_time&min_salary=50000", "jobs-search",
+          commands=1, docs_examined=250, wall_ms=150),
+    *read(None, "/api/jobs/facets", "facets", commands=1, docs_examined=250, wall_ms=150),
+    *read(None, "/api/jobs/suggest?q=eng", "suggest", commands=0, wall_ms=50),
+    *read(None, "/api/jobs/{job_id}", "job", commands=1, docs_examined=1, wall_ms=50),
+    *read("seeker", "/api/auth/me", "me", commands=1, docs_examined=1, wall_ms=50),
+    *read("seeker", "/api/my-applications", "my-applications", commands=3, docs_examined=200, wall_ms=150),
+    *read("employer", "/api/my-jobs", "my-jobs", commands=2, docs_examined=100, wall_ms=100),
+    *read("employer", "/api/job-applications/{own_job_id}", "job-applications",
+          commands=4, docs_examined=100, wall_ms=150),
+    *read("employer", "/api/employer/analytics", "analytics", commands=3, docs_examined=300, wall_ms=150),
+]
+
+FLASK_READS = [
+    *read(None, "/api/jobs", "jobs", commands=1, docs_examined=250, wall_ms=150),
+    *read(None, "/api/jobs/{job_id}", "job", commands=1, docs_examined=1, wall_ms=50),
+    *read("seeker", "/api/auth/me", "me", commands=1, docs_examined=1, wall_ms=50),
+    *read("seeker", "/api/applications", "applications-seeker", commands=1, docs_examined=100, wall_ms=100),
+    *read("employer", "/api/applications", "applications-employer", commands=2, docs_examined=300, wall_ms=150),
+]
+
+
+@pytest.mark.parametrize("role,path", FASTAPI_READS)
+def test_fastapi_read(fastapi_client, login, query_budget, accounts, role, path):
+    headers = login(fastapi_client, accounts[role]) if role else {}
+    with query_budget.measure(f"FastAPI GET {path}"):
+        response = fastapi_client.get(path.format(**accounts), headers=headers)
+    assert response.status_code == 200, response.text
+
+
+@pytest.mark.parametrize("role,path", FLASK_READS)
+def test_flask_read(flask_client, login, query_budget, accounts, role, path):
+    headers = login(flask_client, accounts[role]) if role else {}
+    with query_budget.measure(f"Flask GET {path}"):
+        response = flask_client.get(path.format(**accounts), headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+
+
+@budget(commands=5, wall_ms=150)
+def test_fastapi_apply(fastapi_client, login, query_budget, accounts):
+    headers = login(fastapi_client, accounts["seeker"])
+    payload = {"job_id": accounts["job_id"], "resume_content": "Resume", "cover_letter_content": "Letter"}
+    with query_budget.measure("FastAPI POST /api/applications"):
+        response = fastapi_client.post("/api/applications", json=payload, headers=headers)
+    assert response.status_code == 200, response.text
+
+
+@budget(commands=5, wall_ms=250)
+def test_fastapi_bulk_apply_is_not_per_job(fastapi_client, login, query_budget, accounts):
+    headers = login(fastapi_client, accounts["seeker"])
+    payload = {"job_ids": accounts["open_job_ids"], "resume_content": "Resume", "cover_letter_content": "Letter"}
+    with query_budget.measure(f"FastAPI POST /api/applications/bulk ({len(payload['job_ids'])} jobs)"):
+        response = fastapi_client.post("/api/applications/bulk", json=payload, headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(response.json()["applied"]) == len(payload["job_ids"])
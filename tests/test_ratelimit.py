@@ -0,0 +1,88 @@
+"""Login throttling (``backend/ratelimit.py``): bucket arithmetic, the 429 answer, and no lockout by email alone."""
+import asyncio
+
+import pytest
+
+from ratelimit import Limit, LoginRateLimiter, MemoryBucketStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_limit_spec():
+    limit = Limit.parse("5/300")
+    assert (limit.capacity, limit.refill_rate) == (5, 5 / 300)
+    assert Limit.parse("off") is None and Limit.parse("0") is None and Limit.parse(None) is None
+
+
+def test_bucket_refills_one_token_per_period_over_capacity():
+    clock = Clock()
+    store, limit = MemoryBucketStore(clock=clock), Limit.parse("5/300")
+    assert [store.take_sync("key", limit)[0] for _ in range(5)] == [True] * 5
+    assert store.take_sync("key", limit) == (False, pytest.approx(60))
+    clock.now += 45
+    assert store.take_sync("key", limit) == (False, pytest.approx(15))
+    clock.now += 15
+    assert store.take_sync("key", limit) == (True, 0.0)
+    # Idle time refills up to the capacity, not beyond
+    clock.now += 3600
+    assert [store.take_sync("key", limit)[0] for _ in range(6)] == [True] * 5 + [False]
+
+
+def test_other_clients_cannot_lock_out_an_email():
+    limiter = LoginRateLimiter(per_email=Limit.parse("5/300"))
+
+    async def scenario():
+        for _ in range(20):
+            await limiter.check("203.0.113.9", "victim@example.com")
+        attacker = await limiter.check("203.0.113.9", "Victim@Example.com ")
+        victim = await limiter.check("198.51.100.7", "victim@example.com")
+        return attacker, victim
+
+    attacker, victim = asyncio.run(scenario())
+    assert attacker == 60 and victim is None
+
+
+def test_successful_login_refills_the_email_bucket():
+    limiter = LoginRateLimiter(per_email=Limit.parse("5/300"))
+
+    async def scenario():
+        for _ in range(4):
+            await limiter.check("198.51.100.7", "user@example.com")
+        await limiter.succeeded("198.51.100.7", "user@example.com")
+        return [await limiter.check("198.51.100.7", "user@example.com") for _ in range(6)]
+
+    assert asyncio.run(scenario()) == [None] * 5 + [60]
+
+
+@pytest.mark.parametrize("backend", ["fastapi", "flask"])
+def test_over_the_limit_answers_429_with_retry_after(stand_in, fastapi_client, flask_client, monkeypatch, backend):
+    import app
+    import server
+
+    client = fastapi_client if backend == "fastapi" else flask_client
+    module = server if backend == "fastapi" else app
+    monkeypatch.setattr(module, "login_limiter", LoginRateLimiter(per_email=Limit.parse("2/60")))
+    credentials = {"email": stand_in.manifest["seekers"][1], "password": "wrong"}
+
+    statuses = [client.post("/api/auth/login", json=credentials).status_code for _ in range(3)]
+    assert statuses == [401, 401, 429]
+    response = client.post("/api/auth/login", json={**credentials, "password": stand_in.manifest["password"]})
+    assert response.status_code == 429 and 1 <= int(response.headers["Retry-After"]) <= 30
+
+
+def test_failed_guesses_from_elsewhere_do_not_block_the_user(stand_in, fastapi_client, monkeypatch):
+    import server
+
+    limiter = LoginRateLimiter(per_email=Limit.parse("5/300"))
+    monkeypatch.setattr(server, "login_limiter", limiter)
+    email = stand_in.manifest["seekers"][2]
+    for _ in range(10):
+        fastapi_client.portal.call(limiter.check, "203.0.113.9", email)
+    response = fastapi_client.post("/api/auth/login", json={"email": email, "password": stand_in.manifest["password"]})
+    assert response.status_code == 200
@@ -0,0 +1,68 @@
+"""Job listing reads go to secondaries; auth and read-after-write paths stay on the primary.
+
+The routing itself needs a replica set: run with ``TEST_MONGO=replset``.
+"""
+import pytest
+from pymongo.read_preferences import Primary, SecondaryPreferred
+
+JOB = {"title": "Routing Engineer", "company": "Acme", "description": "Routes reads", "requirements": "Python",
+       "location": "Remote", "job_type": "full_time"}
+
+
+def test_listing_reads_prefer_secondaries(stand_in, fastapi_client):
+    import app as flask_backend
+    import server
+
+    stand_in.flask_app()
+    for repos in (server.repos, flask_backend.get_repositories()):
+        listing = repos.jobs.listing.read_preference
+        assert isinstance(listing, SecondaryPreferred) and listing.max_staleness == 90
+        assert repos.jobs.collection.read_preference == Primary()
+        assert repos.users.collection.read_preference == Primary()
+
+
+class HandleSpy:
+    """Delegates to a collection handle, recording the methods called on it."""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.calls = []
+
+    def __getattr__(self, name):
+        self.calls.append(name)
+        return getattr(self._collection, name)
+
+
+def test_listing_reads_use_the_listing_handle(stand_in, fastapi_client):
+    import server
+
+    jobs = server.repos.jobs
+    listing, primary = jobs.listing, jobs.collection
+    jobs.listing, jobs.collection = HandleSpy(listing), HandleSpy(primary)
+    try:
+        job_id = stand_in.sync_db.jobs.find_one({"is_active": True})["id"]
+        assert fastapi_client.get("/api/jobs?search=routing").status_code == 200
+        assert fastapi_client.get("/api/jobs/facets?search=routing").status_code == 200
+        assert jobs.listing.calls == ["find", "aggregate"] and jobs.collection.calls == []
+
+        assert fastapi_client.get(f"/api/jobs/{job_id}").status_code == 200
+        assert jobs.collection.calls == ["find_one"] and len(jobs.listing.calls) == 2
+    finally:
+        jobs.listing, jobs.collection = listing, primary
+
+
+def test_listing_on_secondary_and_own_jobs_on_primary(stand_in, fastapi_client, login):
+    if not stand_in.secondaries:
+        pytest.skip("needs a replica set (TEST_MONGO=replset)")
+    with stand_in.round_trips.measure() as listing:
+        assert fastapi_client.get("/api/jobs").status_code == 200
+    servers = {trip.server for trip in listing.trips if trip.command == "find"}
+    assert servers and servers <= set(stand_in.secondaries)
+
+    headers = login(fastapi_client, stand_in.manifest["employers"][0])
+    posted = fastapi_client.post("/api/jobs", json=JOB, headers=headers)
+    assert posted.status_code == 200, posted.text
+    with stand_in.round_trips.measure() as own_jobs:
+        response = fastapi_client.get("/api/my-jobs", headers=headers)
+    assert posted.json()["id"] in {job["id"] for job in response.json()}
+    assert not {trip.server for trip in own_jobs.trips} & set(stand_in.secondaries)
@@ -0,0 +1,70 @@
+"""Salary strings to annualized ``salary_min``/``salary_max`` (``backend/salary.py``), and filtering on them."""
+import pytest
+
+from salary import parse_salary
+
+
+@pytest.mark.parametrize("text,low,high,currency,period", [
+    # The docstring's examples
+    ("$80,000 - $100,000", 80_000, 100_000, "USD", "year"),
+    ("$45/hr", 93_600, 93_600, "USD", "hour"),
+    ("€60k-€75k", 60_000, 75_000, "EUR", "year"),
+    ("Up to $120K", None, 120_000, "USD", "year"),
+    ("$60-75k", 60_000, 75_000, "USD", "year"),
+    ("$80,000 - 100,000", 80_000, 100_000, "USD", "year"),
+    ("$150k+", 150_000, None, "USD", "year"),
+    ("From $50/hour", 104_000, None, "USD", "hour"),
+    ("£3,000 per month", 36_000, 36_000, "GBP", "month"),
+    ("90000 USD", 90_000, 90_000, "USD", "year"),
+    # Unmarked numbers next to a currency amount are not pay
+    ("$150,000/year + 401k match", 150_000, 150_000, "USD", "year"),
+    ("$120k - $150k + 401(k)", 120_000, 150_000, "USD", "year"),
+    ("2 years exp, $80k", 80_000, 80_000, "USD", "year"),
+    ("$25/hr, 5 days", 52_000, 52_000, "USD", "hour"),
+    # Lakh and crore
+    ("₹12 LPA", 1_200_000, 1_200_000, "INR", "year"),
+    ("12-15 lakhs", 1_200_000, 1_500_000, "INR", "year"),
+    ("10 to 12 LPA", 1_000_000, 1_200_000, "INR", "year"),
+    ("₹ 8 lakhs per annum", 800_000, 800_000, "INR", "year"),
+    ("1.2 crore", 12_000_000, 12_000_000, "INR", "year"),
+])
+def test_parse_salary(text, low, high, currency, period):
+    assert parse_salary(text) == {"salary_min": low, "salary_max": high, "salary_currency": currency,
+                                  "salary_period": period}
+
+
+@pytest.mark.parametrize("text", [None, "", "Competitive", "401k matching"])
+def test_no_salary(text):
+    assert parse_salary(text) == {"salary_min": None, "salary_max": None, "salary_currency": None,
+                                  "salary_period": None}
+
+
+OPEN_ENDED = {"Open Ended Floor Engineer": "$150k+", "Open Ended Ceiling Engineer": "Up to $120K"}
+
+
+@pytest.fixture
+def open_ended(stand_in, fastapi_client, login):
+    """Posts the OPEN_ENDED jobs once per session."""
+    if stand_in.sync_db.jobs.count_documents({"title": {"$in": list(OPEN_ENDED)}}):
+        return
+    headers = login(fastapi_client, stand_in.manifest["employers"][0])
+    for title, salary in OPEN_ENDED.items():
+        job = {"title": title, "company": "Acme", "description": "Pay varies", "requirements": "None",
+               "salary": salary, "location": "Austin, TX", "job_type": "full_time"}
+        assert fastapi_client.post("/api/jobs", json=job, headers=headers).status_code == 200
+
+
+@pytest.mark.parametrize("params,expected", [
+    ({"min_salary": 100_000}, {"Open Ended Floor Engineer", "Open Ended Ceiling Engineer"}),
+    ({"min_salary": 500_000}, {"Open Ended Floor Engineer"}),
+    ({"max_salary": 200_000}, {"Open Ended Floor Engineer", "Open Ended Ceiling Engineer"}),
+    ({"max_salary": 100_000}, {"Open Ended Ceiling Engineer"}),
+])
+def test_open_ended_ranges_match_on_their_open_side(fastapi_client, open_ended, params, expected):
+    jobs = fastapi_client.get("/api/jobs", params={"search": "open ended", **params}).json()
+    assert {job["title"] for job in jobs} & set(OPEN_ENDED) == expected
+
+
+def test_open_ended_floor_is_banded_by_its_minimum(fastapi_client, open_ended):
+    facets = fastapi_client.get("/api/jobs/facets", params={"search": "open ended floor"}).json()
+    assert facets["salary_band"] == [{"min": 150_000, "max": 200_000, "count": 1}]
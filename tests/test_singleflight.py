@@ -0,0 +1,88 @@
+"""Identical concurrent job reads share one MongoDB command (``server.job_reads``)."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from singleflight import SingleFlight
+
+CALLERS = 20
+
+
+class Gate:
+    """Wraps ``server.job_reads``; the shared read starts only once ``callers`` requests have joined it."""
+
+    def __init__(self, reads, callers: int):
+        self.reads = reads
+        self.callers = callers
+        self.reached = 0
+        self.opened = asyncio.Event()
+
+    async def do(self, key, fn):
+        self.reached += 1
+        if self.reached == self.callers:
+            self.opened.set()
+
+        async def gated():
+            await self.opened.wait()
+            return await fn()
+
+        return await self.reads.do(key, gated)
+
+
+@pytest.mark.parametrize("path", ["/api/jobs/{job_id}", "/api/jobs?search=engineer"], ids=["job", "jobs"])
+def test_concurrent_identical_reads_send_one_find(stand_in, fastapi_client, monkeypatch, path):
+    import server
+
+    job_id = stand_in.sync_db.jobs.find_one({"is_active": True})["id"]
+    monkeypatch.setattr(server, "job_reads", Gate(server.job_reads, CALLERS))
+    with ThreadPoolExecutor(CALLERS) as pool, stand_in.round_trips.measure() as window:
+        responses = list(pool.map(lambda _: fastapi_client.get(path.format(job_id=job_id)), range(CALLERS)))
+    assert [response.status_code for response in responses] == [200] * CALLERS
+    assert len({response.text for response in responses}) == 1
+    assert dict(window.by_command()) == {"find jobs": 1}
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_read():
+    async def scenario():
+        reads = SingleFlight("test")
+        release = asyncio.Event()
+        executions = []
+
+        async def read():
+            executions.append(1)
+            await release.wait()
+            return "job"
+
+        first = asyncio.ensure_future(reads.do("key", read))
+        second = asyncio.ensure_future(reads.do("key", read))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        assert await second == "job"
+        assert first.cancelled() and executions == [1] and reads.in_flight() == 0
+
+    asyncio.run(scenario())
+
+
+def test_read_outlives_its_only_caller():
+    async def scenario():
+        reads = SingleFlight("test")
+        release = asyncio.Event()
+        finished = []
+
+        async def read():
+            await release.wait()
+            finished.append(1)
+
+        caller = asyncio.ensure_future(reads.do("key", read))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert caller.cancelled() and finished == [1] and reads.in_flight() == 0
+
+    asyncio.run(scenario())
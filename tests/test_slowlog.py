@@ -0,0 +1,78 @@
+"""Slow query log (``backend/slowlog.py``): values never reach the shape, explains only when enabled."""
+import asyncio
+
+from slowlog import SlowQueryLog, command_shape
+
+
+def test_filter_values_starting_with_dollar_are_redacted():
+    shape = command_shape("find", {"find": "users", "filter": {"email": "$admin", "role": {"$in": ["$x"]},
+                                                              "name": {"$eq": "$secret"}},
+                                   "sort": {"created_at": -1}})
+    assert shape == {"find": "users", "filter": {"email": "?", "role": {"$in": "?"}, "name": {"$eq": "?"}},
+                     "sort": {"created_at": -1}}
+
+
+def test_update_values_starting_with_dollar_are_redacted():
+    shape = command_shape("update", {"update": "users", "updates": [
+        {"q": {"id": "u1"}, "u": {"$set": {"bio": "$HOME"}}},
+    ]})
+    assert shape["updates"] == [{"q": {"id": "?"}, "u": {"$set": {"bio": "?"}}}]
+
+
+def test_aggregation_expressions_keep_field_paths():
+    shape = command_shape("aggregate", {"aggregate": "applications", "pipeline": [
+        {"$match": {"job_seeker_id": "$not-a-path", "$expr": {"$gt": ["$a", "$b"]}, "x": {"$gt": 1}}},
+        {"$group": {"_id": "$job_id", "n": {"$sum": 1}}},
+        {"$facet": {"days": [{"$match": {"day": "$leak"}}, {"$unwind": "$by_day"}]}},
+        {"$lookup": {"from": "jobs", "pipeline": [{"$match": {"id": "$leak"}}], "as": "job"}},
+        {"$sort": {"n": -1}},
+    ]})
+    assert shape["pipeline"] == [
+        {"$match": {"job_seeker_id": "?", "$expr": {"$gt": "?"}, "x": {"$gt": "?"}}},
+        {"$group": {"_id": "$job_id", "n": {"$sum": "?"}}},
+        {"$facet": {"days": [{"$match": {"day": "?"}}, {"$unwind": "$by_day"}]}},
+        {"$lookup": {"from": "?", "pipeline": [{"$match": {"id": "?"}}], "as": "?"}},
+        {"$sort": {"n": -1}},
+    ]
+
+
+def test_expr_in_a_find_filter_keeps_field_paths():
+    shape = command_shape("find", {"find": "jobs", "filter": {"$expr": {"$toBool": "$flag"}, "flag": "$flag"}})
+    assert shape["filter"] == {"$expr": {"$toBool": "$flag"}, "flag": "?"}
+
+
+class Repos:
+    """Stands in for ``Repositories``: records explain commands and the entries written."""
+
+    def __init__(self):
+        self.explained = []
+        self.slow_queries = self
+        self.db = self
+        self.added = []
+
+    async def command(self, command):
+        self.explained.append(command)
+        return {}
+
+    async def add(self, entries):
+        self.added.extend(entries)
+
+
+def flush_one(log):
+    log._pending.append(({"command": "find", "fingerprint": "f"}, {"find": "jobs", "filter": {"id": "1"}}))
+    return asyncio.run(log.flush())
+
+
+def test_explain_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("SLOW_QUERY_EXPLAIN", raising=False)
+    repos = Repos()
+    log = SlowQueryLog.from_env(lambda: repos)
+    assert not log.explain
+    assert flush_one(log) == 1 and repos.explained == [] and "explain" not in repos.added[0]
+
+
+def test_explain_when_enabled(monkeypatch):
+    monkeypatch.setenv("SLOW_QUERY_EXPLAIN", "on")
+    repos = Repos()
+    log = SlowQueryLog.from_env(lambda: repos)
+    assert flush_one(log) == 1 and len(repos.explained) == 1
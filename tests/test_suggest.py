@@ -0,0 +1,54 @@
+"""Typeahead index refreshes (``backend/suggest.py``): stale lookups never wait on the aggregation."""
+import asyncio
+import threading
+import time
+
+from suggest import SuggestionIndex
+
+NEW_TERMS = {"title": [("Zeta Wrangler", 5)], "company": [], "location": []}
+
+
+def test_stale_index_is_served_while_one_background_rebuild_runs(fastapi_client, monkeypatch):
+    import server
+
+    release, calls = threading.Event(), []
+
+    async def slow_counts():
+        calls.append(1)
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        return NEW_TERMS
+
+    monkeypatch.setattr(server.repos.jobs, "suggestion_counts", slow_counts)
+    before = fastapi_client.get("/api/jobs/suggest?q=eng").json()
+    server.suggestions.built_at -= server.suggestions.max_age + 1
+
+    for _ in range(5):
+        response = fastapi_client.get("/api/jobs/suggest?q=eng")
+        assert response.status_code == 200 and response.json() == before
+    assert fastapi_client.get("/api/jobs/suggest?q=zeta").json() == []
+    assert len(calls) == 1
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while server.suggestions.stale and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert fastapi_client.get("/api/jobs/suggest?q=zeta").json() == [
+        {"value": "Zeta Wrangler", "kind": "title", "count": 5}
+    ]
+    assert len(calls) == 1
+
+
+def test_failed_refresh_keeps_the_old_index():
+    index = SuggestionIndex(max_age=300)
+    index.build({"title": [("Data Engineer", 3)]})
+    index.built_at -= 301
+
+    async def failing():
+        raise TimeoutError("operation exceeded time limit")
+
+    assert index.claim_refresh() and not index.claim_refresh()
+    asyncio.run(index.refresh(failing))
+    assert [match["value"] for match in index.suggest("dat")] == ["Data Engineer"]
+    # Retried after RETRY_AFTER rather than on the next keystroke
+    assert not index.stale and not index.claim_refresh()
@@ -0,0 +1,106 @@
+"""Application status changes (``backend/workflow.py``, ``Repositories.update_application_statuses``)."""
+import uuid
+from datetime import datetime
+
+import pytest
+
+from repositories import ApplicationRepository
+from workflow import STATUSES, TRANSITIONS, can_transition
+
+ALLOWED = [(old, new) for old in STATUSES for new in sorted(TRANSITIONS[old])]
+
+
+@pytest.mark.parametrize("old,new", ALLOWED)
+def test_allowed_transitions(old, new):
+    assert can_transition(old, new)
+
+
+@pytest.mark.parametrize("old,new", [("applied", "hired"), ("applied", "offered"), ("interviewing", "screening"),
+                                     ("hired", "rejected"), ("rejected", "applied"), ("unknown", "screening")])
+def test_forbidden_transitions(old, new):
+    assert not can_transition(old, new)
+
+
+@pytest.fixture
+def pipeline(stand_in, fastapi_client, login):
+    """A fresh job of the third employer with four applications in ``applied``, and its stats document."""
+    db = stand_in.sync_db
+    email = stand_in.manifest["employers"][3]
+    employer_id = db.users.find_one({"email": email})["id"]
+    job_id = f"workflow-{uuid.uuid4()}"
+    db.jobs.insert_one({"id": job_id, "title": "Workflow Engineer", "employer_id": employer_id, "is_active": True})
+    ids = [f"{job_id}-{n}" for n in range(4)]
+    db.applications.insert_many([{"id": app_id, "job_id": job_id, "job_seeker_id": f"workflow-seeker-{n}",
+                                  "status": "applied", "applied_at": datetime.utcnow()}
+                                 for n, app_id in enumerate(ids)])
+    db.job_stats.insert_one({"job_id": job_id, "employer_id": employer_id, "applications": 4,
+                             "by_status": {"applied": 4}, "by_day": {}})
+    return {"job_id": job_id, "ids": ids, "headers": login(fastapi_client, email)}
+
+
+def patch(client, headers, ids, status):
+    response = client.patch("/api/applications/status", json={"application_ids": ids, "status": status},
+                            headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def by_status(stand_in, job_id):
+    return stand_in.sync_db.job_stats.find_one({"job_id": job_id})["by_status"]
+
+
+def test_allowed_move_updates_applications_and_stats(stand_in, fastapi_client, pipeline):
+    result = patch(fastapi_client, pipeline["headers"], pipeline["ids"][:2], "screening")
+    assert sorted(result["updated"]) == pipeline["ids"][:2] and result["failed"] == []
+    app = stand_in.sync_db.applications.find_one({"id": pipeline["ids"][0]})
+    assert app["status"] == "screening" and app["status_history"][-1]["from_status"] == "applied"
+    assert by_status(stand_in, pipeline["job_id"]) == {"applied": 2, "screening": 2}
+
+
+def test_forbidden_move_is_reported_and_skipped(stand_in, fastapi_client, pipeline):
+    first, second = pipeline["ids"][:2]
+    patch(fastapi_client, pipeline["headers"], [first], "rejected")
+    result = patch(fastapi_client, pipeline["headers"], [first, second], "rejected")
+    assert result["unchanged"] == [first] and result["updated"] == [second]
+
+    result = patch(fastapi_client, pipeline["headers"], [pipeline["ids"][2]], "hired")
+    assert result["failed"] == [{"id": pipeline["ids"][2], "reason": "invalid_transition_from_applied"}]
+    assert stand_in.sync_db.applications.find_one({"id": pipeline["ids"][2]})["status"] == "applied"
+    assert by_status(stand_in, pipeline["job_id"]) == {"applied": 2, "rejected": 2}
+
+
+def test_another_employers_applications_are_not_found(stand_in, fastapi_client, login, pipeline):
+    other = login(fastapi_client, stand_in.manifest["employers"][4])
+    result = patch(fastapi_client, other, pipeline["ids"][:1], "screening")
+    assert result["failed"] == [{"id": pipeline["ids"][0], "reason": "not_found"}] and result["updated"] == []
+    assert stand_in.sync_db.applications.find_one({"id": pipeline["ids"][0]})["status"] == "applied"
+    assert by_status(stand_in, pipeline["job_id"]) == {"applied": 4}
+
+
+def test_lost_race_is_a_conflict_and_not_counted(stand_in, fastapi_client, pipeline, monkeypatch):
+    loser = pipeline["ids"][0]
+    set_status = ApplicationRepository.set_status
+
+    async def after_a_concurrent_change(self, ids_by_status, status, change):
+        # Another request moved one application between our read and our write
+        stand_in.sync_db.applications.update_one({"id": loser}, {"$set": {"status": "rejected"}})
+        stand_in.sync_db.job_stats.update_one({"job_id": pipeline["job_id"]},
+                                              {"$inc": {"by_status.applied": -1, "by_status.rejected": 1}})
+        return await set_status(self, ids_by_status, status, change)
+
+    monkeypatch.setattr(ApplicationRepository, "set_status", after_a_concurrent_change)
+    result = patch(fastapi_client, pipeline["headers"], pipeline["ids"][:2], "screening")
+    assert result["updated"] == [pipeline["ids"][1]]
+    assert result["failed"] == [{"id": loser, "reason": "conflict"}]
+    assert stand_in.sync_db.applications.find_one({"id": loser})["status"] == "rejected"
+    assert by_status(stand_in, pipeline["job_id"]) == {"applied": 2, "rejected": 1, "screening": 1}
+
+
+def test_counters_predating_stats_do_not_go_negative(stand_in, fastapi_client, pipeline):
+    stand_in.sync_db.job_stats.update_one({"job_id": pipeline["job_id"]}, {"$set": {"by_status": {"applied": 1}}})
+    patch(fastapi_client, pipeline["headers"], pipeline["ids"][:3], "screening")
+    assert by_status(stand_in, pipeline["job_id"]) == {"applied": 0, "screening": 3}
+
+    stand_in.sync_db.job_stats.update_one({"job_id": pipeline["job_id"]}, {"$unset": {"by_status": ""}})
+    patch(fastapi_client, pipeline["headers"], pipeline["ids"][3:], "rejected")
+    assert by_status(stand_in, pipeline["job_id"]) == {"applied": 0, "rejected": 1}
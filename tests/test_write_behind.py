@@ -0,0 +1,69 @@
+"""Write-behind application inserts: retried batches are stored and counted once, rejections are reported."""
+import asyncio
+
+import pytest
+
+import writebehind
+from writebehind import WriteBehindQueue
+
+
+@pytest.fixture
+def queued(stand_in, fastapi_client, monkeypatch):
+    """``queued(applications)`` runs them through a write-behind queue flushing with the app's own flush."""
+    import server
+
+    monkeypatch.setattr(writebehind, "retry_delay", lambda attempt: 0)
+    job = stand_in.sync_db.jobs.find_one({"is_active": True}, {"_id": 0})
+
+    def applications(*seekers):
+        return [(job, server.Application(job_id=job["id"], job_seeker_id=seeker, resume_content="Resume",
+                                         cover_letter_content="Letter").dict()) for seeker in seekers]
+
+    async def run(batch):
+        queue = WriteBehindQueue(server._store_applications, name="test")
+        queue.start()
+        for item in batch:
+            await queue.put(item)
+        await queue.stop()
+
+    def queued(batch):
+        asyncio.run(run(batch))
+        return job["id"]
+
+    queued.applications = applications
+    return queued
+
+
+def stats(stand_in, job_id):
+    return (stand_in.sync_db.job_stats.find_one({"job_id": job_id}) or {}).get("applications", 0)
+
+
+def test_failed_stats_write_does_not_duplicate_the_batch(stand_in, queued, monkeypatch):
+    import server
+
+    record = server.repos.job_stats.record_applications
+    failures = iter(range(writebehind.STEP_ATTEMPTS))
+
+    async def flaky(jobs, applications):
+        if next(failures, None) is not None:
+            raise ConnectionError("stats write lost")
+        await record(jobs, applications)
+
+    monkeypatch.setattr(server.repos.job_stats, "record_applications", flaky)
+    batch = queued.applications("wb-seeker-1", "wb-seeker-2")
+    before = stats(stand_in, batch[0][0]["id"])
+    job_id = queued(batch)
+
+    ids = [app["id"] for _, app in batch]
+    assert stand_in.sync_db.applications.count_documents({"id": {"$in": ids}}) == 2
+    assert stats(stand_in, job_id) == before + 2
+
+
+def test_rejected_items_are_counted_as_dropped(stand_in, queued):
+    batch = queued.applications("wb-seeker-3", "wb-seeker-4")
+    # Another application already holds the first one's id: rejected, not mistaken for an earlier attempt
+    stand_in.sync_db.applications.insert_one({**batch[0][1], "job_seeker_id": "wb-seeker-other"})
+    dropped = writebehind.DROPPED.get(queue="test")
+    queued(batch)
+    assert writebehind.DROPPED.get(queue="test") == dropped + 1
+    assert stand_in.sync_db.applications.count_documents({"job_seeker_id": "wb-seeker-4"}) == 1